@@ -0,0 +1,246 @@
+"""
+HTML parsing benchmark: lxml fast path vs the original BeautifulSoup path
+
+Runs every source parser in html_parsing against the saved page of that source
+in benchmarks/fixtures and compares it with the BeautifulSoup(..., 'html.parser')
+code it replaced. For each source it reports median parse time and peak RSS
+growth (measured in a fresh child process, since lxml allocates outside the
+Python heap), and checks that both paths extract the same results.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_html_parsing [--repeat 20] [--json results.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+import html_parsing
+from benchmarks.memory import PeakRSS
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+
+# The BeautifulSoup extraction each scraper used before html_parsing existed
+
+def legacy_yelp_search(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    cards = soup.find_all('div', {'data-testid': 'serp-ia-card'}) or soup.find_all('div', class_=re.compile('businessName'))
+    results = []
+    for card in cards[:15]:
+        name_elem = card.find('a') or card.find('h3')
+        if name_elem:
+            results.append((name_elem.get_text(strip=True), name_elem.get('href', '')))
+    return results
+
+
+def legacy_yelp_website(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    website_elem = soup.find('a', {'data-testid': 'website-url'}) or soup.find('a', string=re.compile('website', re.I))
+    return website_elem.get('href') if website_elem else None
+
+
+def legacy_yellowpages(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    results = []
+    for card in soup.find_all('div', class_='result')[:10]:
+        name_elem = card.find('a', class_='business-name')
+        website_elem = card.find('a', class_='track-visit-website')
+        if name_elem:
+            results.append((name_elem.get_text(strip=True), website_elem.get('href') if website_elem else None))
+    return results
+
+
+def legacy_bbb(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    names = []
+    for card in soup.find_all('div', class_='result-item')[:10]:
+        name_elem = card.find('h4') or card.find('a')
+        if name_elem:
+            names.append(name_elem.get_text(strip=True))
+    return names
+
+
+def legacy_clutch(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    results = []
+    for card in soup.find_all('div', class_='provider-row')[:15]:
+        name_elem = card.find('h3') or card.find('a', class_='company_title')
+        website_elem = card.find('a', class_='website_link')
+        if name_elem:
+            results.append((name_elem.get_text(strip=True), website_elem.get('href') if website_elem else None))
+    return results
+
+
+def legacy_ycombinator(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    cards = soup.find_all('div', class_='_company_86jzd_338') or soup.find_all('a', href=re.compile('/companies/'))
+    companies = []
+    for card in cards[:30]:
+        name_elem = card.find('span', class_='_coName_86jzd_453') or card.find('h3') or card.text.strip()
+        name = name_elem.text.strip() if hasattr(name_elem, 'text') else str(name_elem).strip()
+        batch_elem = card.find('span', class_='_batch_86jzd_461')
+        desc_elem = card.find('span', class_='_coDescription_86jzd_478')
+        companies.append({
+            'name': name,
+            'batch': batch_elem.text.strip() if batch_elem else 'Unknown',
+            'description': desc_elem.text.strip() if desc_elem else ''
+        })
+    return companies
+
+
+def legacy_github_orgs(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    results = []
+    for card in soup.find_all('div', class_='Box-row')[:20]:
+        name_elem = card.find('a', class_='f3')
+        if name_elem:
+            followers_elem = card.find('span', string=re.compile('followers'))
+            followers = followers_elem.text.strip() if followers_elem else '0'
+            results.append((name_elem.text.strip(), name_elem.get('href', ''), followers))
+    return results
+
+
+def legacy_producthunt(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    cards = soup.find_all('div', {'data-test': 'post-item'}) or soup.find_all('a', href=re.compile('/posts/'))
+    results = []
+    for card in cards[:15]:
+        name_elem = card.find('h3') or card.find('strong')
+        if name_elem:
+            desc_elem = card.find('p') or card.find('span')
+            results.append((name_elem.text.strip(), desc_elem.text.strip() if desc_elem else ''))
+    return results
+
+
+def legacy_builtwith(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    links = soup.find_all('a', href=re.compile(r'^https?://[^/]+/?$'))
+    return [(link.text.strip(), link.get('href')) for link in links[:10]]
+
+
+def legacy_angellist_jobs(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    results = []
+    for card in soup.find_all('div', class_='job-card')[:10]:
+        title_elem = card.find('h3')
+        company_elem = card.find('h4')
+        if title_elem and company_elem:
+            results.append((title_elem.text.strip(), company_elem.text.strip()))
+    return results
+
+
+def legacy_page_emails(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    found_emails = re.findall(EMAIL_PATTERN, content.decode('utf-8', 'replace'))
+    for link in soup.find_all('a', href=re.compile(r'^mailto:')):
+        email = link.get('href', '').replace('mailto:', '').split('?')[0]
+        if email:
+            found_emails.append(email)
+    for section in soup.find_all(['div', 'section'], class_=re.compile(r'contact|email', re.I)):
+        found_emails.extend(re.findall(EMAIL_PATTERN, section.get_text()))
+    return found_emails
+
+
+CASES = [
+    # (fixture, legacy parser, fast parser)
+    ('yelp_search.html', legacy_yelp_search, lambda c: html_parsing.parse_yelp_search(c, limit=15)),
+    ('yelp_business.html', legacy_yelp_website, html_parsing.parse_yelp_website),
+    ('yellowpages_search.html', legacy_yellowpages, lambda c: html_parsing.parse_yellowpages(c, limit=10)),
+    ('bbb_search.html', legacy_bbb, lambda c: html_parsing.parse_bbb(c, limit=10)),
+    ('clutch_search.html', legacy_clutch, lambda c: html_parsing.parse_clutch(c, limit=15)),
+    ('ycombinator_companies.html', legacy_ycombinator, lambda c: html_parsing.parse_ycombinator(c, limit=30)),
+    ('github_orgs.html', legacy_github_orgs, lambda c: html_parsing.parse_github_orgs(c, limit=20)),
+    ('producthunt_startup_tools.html', legacy_producthunt, lambda c: html_parsing.parse_producthunt(c, limit=15)),
+    ('builtwith_technology.html', legacy_builtwith, lambda c: html_parsing.parse_builtwith(c, limit=10)),
+    ('angellist_jobs.html', legacy_angellist_jobs, lambda c: html_parsing.parse_angellist_jobs(c, limit=10)),
+    ('company_home.html', legacy_page_emails, html_parsing.extract_page_emails),
+    ('company_contact.html', legacy_page_emails, html_parsing.extract_page_emails),
+    ('company_no_emails.html', legacy_page_emails, html_parsing.extract_page_emails),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def time_parser(parser, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _rss_child(case_index, use_fast, conn):
+    fixture, legacy, fast = CASES[case_index]
+    content = load_fixture(fixture)
+    parser = fast if use_fast else legacy
+    # Warm up so one-off library initialisation is not counted against the parse
+    parser(b'<html><body><div class="warmup">x</div></body></html>')
+    with PeakRSS() as memory:
+        parser(content)
+    conn.send(memory.growth_mb)
+    conn.close()
+
+
+def peak_rss_mb(case_index, use_fast):
+    """Peak RSS growth of a single parse, measured in a fresh process"""
+    context = multiprocessing.get_context('spawn')
+    parent, child = context.Pipe()
+    process = context.Process(target=_rss_child, args=(case_index, use_fast, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'fixture':32} {'bs4 ms':>9} {'lxml ms':>9} {'speedup':>8} {'bs4 MB':>8} {'lxml MB':>8}  match")
+    for index, (fixture, legacy, fast) in enumerate(CASES):
+        content = load_fixture(fixture)
+        legacy_result = legacy(content)
+        fast_result = fast(content)
+        match = sorted(map(str, legacy_result or [])) == sorted(map(str, fast_result or [])) \
+            if isinstance(legacy_result, list) else legacy_result == fast_result
+
+        legacy_s = time_parser(legacy, content, args.repeat)
+        fast_s = time_parser(fast, content, args.repeat)
+        legacy_mb = peak_rss_mb(index, use_fast=False)
+        fast_mb = peak_rss_mb(index, use_fast=True)
+
+        results.append({
+            'fixture': fixture,
+            'bytes': len(content),
+            'bs4_ms': legacy_s * 1000,
+            'lxml_ms': fast_s * 1000,
+            'speedup': legacy_s / fast_s if fast_s else None,
+            'bs4_peak_rss_mb': legacy_mb,
+            'lxml_peak_rss_mb': fast_mb,
+            'results_match': match
+        })
+        print(f"{fixture:32} {legacy_s * 1000:9.2f} {fast_s * 1000:9.2f} {legacy_s / fast_s:7.1f}x "
+              f"{legacy_mb:8.1f} {fast_mb:8.1f}  {'yes' if match else 'NO'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Data-scale benchmark for LeadManager
+
+Builds synthetic lead and company histories of increasing size and measures
+the storage layer at each size, in a fresh process per size so RSS figures
+are not polluted by the previous one:
+
+    save_data / load_data   wall time, peak RSS during load, RSS after load
+    add_lead                throughput on top of the loaded history
+    get_statistics          median latency
+    get_new_leads           median latency
+    get_top_leads           outreach queue build (first call), then median latency of top 5
+
+Results are written as JSON so storage regressions can be compared across
+releases.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_lead_manager [--sizes 10000,100000,1000000] [--json lead_manager_bench.json]
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.memory import PeakRSS, current_rss_mb
+
+PLATFORMS = [('Reddit', 'r/forhire'), ('Reddit', 'r/hiring'), ('GitHub', 'jobs'),
+             ('HackerNews', 'Who is Hiring'), ('AngelList', 'Acme'), ('Discord', 'Dev Jobs')]
+COMPANY_SOURCES = ['Yelp', 'YellowPages', 'Clutch', 'Y Combinator', 'GitHub', 'BuiltWith', 'Google Maps']
+WORDS = ('backend python node.js typescript remote api database aws docker kubernetes react '
+         'hiring looking for engineer developer full stack startup team contract senior').split()
+
+
+def synthetic_lead(i, rng, now):
+    platform_name, source = rng.choice(PLATFORMS)
+    created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+    lead = {
+        'platform': platform_name,
+        'source': source,
+        'title': ' '.join(rng.choice(WORDS) for _ in range(8)),
+        'author': f"user{rng.randint(1, 10 ** 6)}",
+        'content': (' '.join(rng.choice(WORDS) for _ in range(80))[:460] +
+                    (f" mail {rng.choice(['jobs', 'info', 'jane'])}@startup{i % 997}.io" if rng.random() < 0.4 else '')),
+        'url': f"https://reddit.com/r/{source}/comments/{i:x}/post/",
+        'created_at': created.isoformat(),
+        'timestamp': created.isoformat(),
+        'status': 'new' if rng.random() < 0.7 else 'contacted',
+        'id': i + 1
+    }
+    if lead['status'] == 'contacted':
+        lead['contacted_email'] = f"jobs{i}@example.io"
+        lead['contacted_at'] = now.isoformat()
+    return lead
+
+
+def synthetic_company(i, rng, now):
+    name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+    emails = [f"{prefix}@company{i}.io" for prefix in rng.sample(['info', 'careers', 'hello', 'jobs'], rng.randint(1, 3))]
+    return {
+        'name': name,
+        'website': f"https://company{i}.io",
+        'source': rng.choice(COMPANY_SOURCES),
+        'type': 'Software Development',
+        'real_emails': emails,
+        'email_count': len(emails),
+        'discovered_at': (now - timedelta(hours=rng.randint(0, 24 * 365))).isoformat(),
+        'status': 'new' if rng.random() < 0.8 else 'contacted',
+        'id': i + 1
+    }
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run_size(size, companies, add_sample, repeat, conn):
+    """Measure one dataset size; runs in its own process inside a scratch directory"""
+    # LeadManager reads and writes relative to the working directory
+    from config import BotConfig
+    from data_manager import LeadManager
+    from records import Company, Lead
+
+    config = BotConfig(google_sheets_creds=None)
+    rng = random.Random(size)
+    now = datetime.now()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+
+        # History is seeded directly; add_lead would also append every row to the monthly CSV
+        manager = LeadManager(config)
+        manager.leads.extend(Lead.from_dict(synthetic_lead(i, rng, now)) for i in range(size))
+        manager.companies.extend(Company.from_dict(synthetic_company(i, rng, now)) for i in range(companies))
+        manager.seen_urls.update(lead.url for lead in manager.leads)
+        manager.company_index.add_many((company, company.id, company.discovered_at) for company in manager.companies)
+
+        start = time.perf_counter()
+        manager.save_data()
+        save_s = time.perf_counter() - start
+        data_bytes = sum(os.path.getsize(name) for name in os.listdir('.') if os.path.isfile(name))
+
+        del manager
+        gc.collect()
+        baseline_mb = current_rss_mb()
+
+        manager = LeadManager(config)
+        with PeakRSS() as memory:
+            start = time.perf_counter()
+            manager.load_data()
+            load_s = time.perf_counter() - start
+        loaded_mb = current_rss_mb()
+
+        stats_ms = median_ms(manager.get_statistics, repeat)
+        new_leads_ms = median_ms(manager.get_new_leads, repeat)
+        start = time.perf_counter()
+        manager.build_outreach_queue()
+        queue_build_s = time.perf_counter() - start
+        top_leads_ms = median_ms(lambda: manager.get_top_leads(5), repeat)
+
+        new_leads = [Lead.from_dict(synthetic_lead(size + i, rng, now)) for i in range(add_sample)]
+        start = time.perf_counter()
+        for lead in new_leads:
+            manager.add_lead(lead)
+        add_s = time.perf_counter() - start
+
+        conn.send({
+            'leads': size,
+            'companies': companies,
+            'data_bytes': data_bytes,
+            'save_data_s': round(save_s, 4),
+            'load_data_s': round(load_s, 4),
+            'load_peak_rss_mb': round(memory.peak_mb - baseline_mb, 1),
+            'rss_after_load_mb': round(loaded_mb - baseline_mb, 1),
+            'add_lead_per_s': round(add_sample / add_s, 1) if add_s else None,
+            'get_statistics_ms': round(stats_ms, 3),
+            'get_new_leads_ms': round(new_leads_ms, 3),
+            'outreach_queue_build_s': round(queue_build_s, 4),
+            'get_top_leads_ms': round(top_leads_ms, 3)
+        })
+        conn.close()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="Comma-separated lead counts")
+    parser.add_argument('--company-ratio', type=float, default=0.1, help="Companies per lead")
+    parser.add_argument('--add-sample', type=int, default=2000, help="Leads added through add_lead per size")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', default='lead_manager_bench.json', help="Where to write the results")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'leads':>9} {'save s':>8} {'load s':>8} {'load peak MB':>13} {'RSS MB':>8} "
+          f"{'add/s':>9} {'stats ms':>9} {'new ms':>8} {'queue s':>8} {'top5 ms':>8}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        parent, child = context.Pipe()
+        process = context.Process(target=run_size, args=(size, int(size * args.company_ratio),
+                                                         args.add_sample, args.repeat, child))
+        process.start()
+        child.close()
+        try:
+            result = parent.recv()
+        except EOFError:
+            # Most likely killed for running out of memory - that is a result too
+            result = {'leads': size, 'error': f"worker exited with code {process.exitcode}"}
+        process.join()
+        results.append(result)
+
+        if 'error' in result:
+            print(f"{size:>9} {result['error']}")
+        else:
+            print(f"{size:>9} {result['save_data_s']:8.2f} {result['load_data_s']:8.2f} "
+                  f"{result['load_peak_rss_mb']:13.1f} {result['rss_after_load_mb']:8.1f} "
+                  f"{result['add_lead_per_s'] or 0:9.0f} {result['get_statistics_ms']:9.2f} "
+                  f"{result['get_new_leads_ms']:8.2f} {result['outreach_queue_build_s']:8.2f} "
+                  f"{result['get_top_leads_ms']:8.3f}")
+
+    report = {
+        'benchmark': 'lead_manager',
+        'revision': git_revision(),
+        'run_at': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Recipient domain checks: one batch of concurrent lookups vs one at a time
+
+Resolves a discovery run's worth of recipient domains against the local DNS
+stand-in (a mix of MX, A-only, null-MX, NXDOMAIN, SERVFAIL and silent
+domains), first one domain per batch - what a per-email check before each
+send amounts to - then all domains in one batch, then again from the cache.
+Checks every domain gets the expected verdict.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mx [--domains 300] [--latency 0.02] [--json results.json]
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.dns_standin import DNSStandIn
+from mx_check import MXResolver
+
+KINDS = [
+    ('mx', {'mx': ['mail.{}']}, True),
+    ('web', {'a': ['192.0.2.1']}, True),
+    ('v6', {'aaaa': ['2001:db8::1']}, True),
+    ('nullmx', {'mx': ['']}, False),
+    ('gone', None, False),
+    ('broken', 'servfail', None),
+]
+
+
+def build_zones(count):
+    zones, expected = {}, {}
+    for i in range(count):
+        kind, zone, verdict = KINDS[i % len(KINDS)]
+        domain = f"{kind}-{i}.example"
+        if isinstance(zone, dict):
+            zone = {key: [value.format(domain) for value in values] for key, values in zone.items()}
+        if zone is not None:
+            zones[domain] = zone
+        expected[domain] = verdict
+    # A couple of domains whose server never answers
+    for i in range(2):
+        zones[f"silent-{i}.example"] = 'drop'
+        expected[f"silent-{i}.example"] = None
+    return zones, expected
+
+
+def timed(server, resolver, batches):
+    server.reset_stats()
+    start = time.perf_counter()
+    results = {}
+    for batch in batches:
+        results.update(resolver.check(batch))
+    return time.perf_counter() - start, server.queries, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--domains', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds the stand-in waits before answering")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    zones, expected = build_zones(args.domains)
+    domains = list(expected)
+    server = DNSStandIn(zones, latency=args.latency).start()
+    report = {}
+    try:
+        def resolver():
+            return MXResolver([server.address], timeout=0.5, attempts=1)
+
+        cases = [
+            ('one at a time', resolver(), [[domain] for domain in domains]),
+            ('batched', resolver(), [domains]),
+        ]
+        for name, instance, batches in cases:
+            seconds, queries, results = timed(server, instance, batches)
+            wrong = sum(results.get(domain) != verdict for domain, verdict in expected.items())
+            report[name] = {'seconds': round(seconds, 3), 'queries': queries, 'wrong': wrong}
+            print(f"{name:15} {len(domains)} domains  {seconds * 1000:8.0f} ms  {queries:4} queries  {wrong} wrong")
+
+        cached = cases[1][1]
+        seconds, queries, _ = timed(server, cached, [domains])
+        report['cached'] = {'seconds': round(seconds, 3), 'queries': queries}
+        print(f"{'cached':15} {len(domains)} domains  {seconds * 1000:8.0f} ms  {queries:4} queries")
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Parse throughput: inline on fetch threads vs the parse_pool worker processes
+
+Simulates the scrapers' situation - several threads each parsing fetched
+pages - over the saved fixtures, once with everything parsed inline under the
+GIL and once per pool size with the pages handed to parse_pool. Reports pages
+per second and checks the pool returns the same results as inline parsing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parse_pool [--pages 400] [--threads 8] [--workers 1,2,4] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import html_parsing
+import parse_pool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+CASES = [
+    ('yelp_search.html', html_parsing.parse_yelp_search),
+    ('yellowpages_search.html', html_parsing.parse_yellowpages),
+    ('clutch_search.html', html_parsing.parse_clutch),
+    ('ycombinator_companies.html', html_parsing.parse_ycombinator),
+    ('github_orgs.html', html_parsing.parse_github_orgs),
+    ('company_home.html', html_parsing.extract_page_emails),
+    ('company_contact.html', html_parsing.extract_page_emails),
+    ('company_no_emails.html', html_parsing.extract_page_emails),
+]
+
+
+def load_pages(count):
+    pages = []
+    for name, parser in CASES:
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            pages.append((parser, f.read()))
+    return [pages[i % len(pages)] for i in range(count)]
+
+
+def run(pages, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda page: parse_pool.parse(page[0], page[1]), pages))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8, help="Concurrent fetch threads handing pages to the parser")
+    parser.add_argument('--workers', default='1,2,4', help="Comma-separated parse pool sizes")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    print(f"{os.cpu_count()} CPUs, {args.pages} pages, {args.threads} threads")
+    print(f"{'mode':12} {'seconds':>8} {'pages/s':>9}  match")
+
+    results = []
+    parse_pool.configure(0)
+    inline_s, expected = run(pages, args.threads)
+    results.append({'mode': 'inline', 'workers': 0, 'seconds': inline_s, 'pages_per_s': args.pages / inline_s})
+    print(f"{'inline':12} {inline_s:8.2f} {args.pages / inline_s:9.1f}  -")
+
+    for workers in [int(w) for w in args.workers.split(',') if w]:
+        pool = parse_pool.configure(workers)
+        pool.parse_many(html_parsing.parse_bbb, [b'<html></html>'] * workers)  # start the processes first
+        seconds, got = run(pages, args.threads)
+        match = got == expected
+        results.append({'mode': 'pool', 'workers': workers, 'seconds': seconds,
+                        'pages_per_s': args.pages / seconds, 'results_match': match})
+        print(f"{'pool x' + str(workers):12} {seconds:8.2f} {args.pages / seconds:9.1f}  {'yes' if match else 'NO'}")
+    parse_pool.configure(0)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+End-to-end scraper benchmarks over recorded fixtures, with no network access
+
+Every scenario runs the real scraper code against benchmarks.replay's local
+HTTP stand-in and reports throughput, latency percentiles (per run and per
+HTTP request), peak RSS and how much politeness sleep was skipped:
+
+    jobs         JobAggregator.get_all_jobs
+    maps         GoogleMapsCompanyFinder.search_software_companies over HTTP (no browser)
+    companies    CompanyOutreachManager.find_all_companies (browser sources off)
+    enrichment   CompanyOutreachManager.extract_real_emails on the found companies
+
+Usage (from the repository root):
+    python -m benchmarks.bench_replay [--repeat 5] [--latency 0.02] [--json results.json]
+
+--trace writes a span file; `python tracing.py FILE` totals it by span name.
+
+--fail-hosts replays an outage: matching hosts (a regex, e.g.
+'www\.reddit\.com|www\.yelp\.com') answer everything with --fail-status.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import time
+
+from benchmarks.memory import PeakRSS
+from benchmarks.replay import ReplayServer, SleepRecorder, install, no_network
+from company_finder import CompanyOutreachManager
+from config import BotConfig
+from job_sources import JobAggregator
+import tracing
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_ms(values):
+    return {f"p{p}": round(percentile(values, p) * 1000, 3) for p in (50, 95, 99)} if values else {}
+
+
+def run_scenario(name, server, target, work, repeat, verbose):
+    adapters = install(target, server)
+    run_latencies = []
+    items = 0
+    sleeps = SleepRecorder()
+    server.reset_stats()
+
+    with no_network(), sleeps, PeakRSS() as memory:
+        for _ in range(repeat):
+            quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                start = time.perf_counter()
+                with tracing.span(f"bench.{name}"):
+                    result = work()
+                run_latencies.append(time.perf_counter() - start)
+            items += len(result)
+
+    request_latencies = [latency for adapter in adapters for latency in adapter.latencies]
+    total_s = sum(run_latencies)
+    return {
+        'scenario': name,
+        'runs': repeat,
+        'items': items,
+        'items_per_run': items / repeat,
+        'throughput_items_per_s': items / total_s if total_s else None,
+        'run_latency_ms': summarize_ms(run_latencies),
+        'request_latency_ms': summarize_ms(request_latencies),
+        'requests': server.requests,
+        'unmatched_requests': server.misses,
+        'bytes_fetched': server.bytes_served,
+        'sleep_skipped_s': round(sleeps.seconds, 1),
+        'peak_rss_mb': round(memory.peak_mb, 1),
+        'rss_growth_mb': round(memory.growth_mb, 1)
+    }, result
+
+
+def print_result(result):
+    run = result['run_latency_ms']
+    req = result['request_latency_ms']
+    print(f"{result['scenario']:11} {result['items_per_run']:7.0f} items/run "
+          f"{result['throughput_items_per_s'] or 0:9.1f} items/s  "
+          f"run p50/p95/p99 {run.get('p50', 0):.0f}/{run.get('p95', 0):.0f}/{run.get('p99', 0):.0f} ms  "
+          f"req p50/p95/p99 {req.get('p50', 0):.1f}/{req.get('p95', 0):.1f}/{req.get('p99', 0):.1f} ms  "
+          f"{result['requests']} req  peak {result['peak_rss_mb']:.0f} MB  "
+          f"sleep skipped {result['sleep_skipped_s']:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated server latency per request (s)")
+    parser.add_argument('--companies', type=int, default=30, help="Companies to enrich per run")
+    parser.add_argument('--verbose', action='store_true', help="Show the scrapers' own output")
+    parser.add_argument('--fail-hosts', help="Regex of hosts that fail every request (rate-limited or blocked)")
+    parser.add_argument('--fail-status', type=int, default=429, help="Status the failing hosts answer with")
+    parser.add_argument('--retry-after', type=int, help="Retry-After seconds the failing hosts send")
+    parser.add_argument('--github-token', help="Search GitHub through GraphQL (any value works offline); REST without")
+    parser.add_argument('--trace', help="Append OTLP/JSON spans to this file (see python tracing.py FILE)")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+    tracing.configure(args.trace)
+
+    # No startup cache, so every run scrapes the sources instead of returning only what is new.
+    # The site map cache lives in memory: the first enrichment run maps each site, later runs reuse it.
+    config = BotConfig(enable_browser_sources=False, startup_cache_file=None, site_map_file=':memory:',
+                       github_token=args.github_token, github_state_file=None)
+    server = ReplayServer(latency=args.latency, fail_hosts=args.fail_hosts, fail_status=args.fail_status,
+                          retry_after=args.retry_after).start()
+    results = []
+    try:
+        aggregator = JobAggregator(config)
+        result, _ = run_scenario('jobs', server, aggregator, aggregator.get_all_jobs, args.repeat, args.verbose)
+        results.append(result)
+        print_result(result)
+
+        manager = CompanyOutreachManager(config)
+        result, _ = run_scenario('maps', server, manager.maps_finder, manager.maps_finder.search_software_companies,
+                                 args.repeat, args.verbose)
+        results.append(result)
+        print_result(result)
+
+        result, companies = run_scenario('companies', server, manager, manager.find_all_companies, args.repeat, args.verbose)
+        results.append(result)
+        print_result(result)
+
+        sample = [company for company in companies if company.get('website')][:args.companies]
+        result, _ = run_scenario('enrichment', server, manager,
+                                 lambda: manager.extract_real_emails([c.copy() for c in sample]),
+                                 args.repeat, args.verbose)
+        results.append(result)
+        print_result(result)
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
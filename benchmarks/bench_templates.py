@@ -0,0 +1,91 @@
+"""
+Outreach message building: per-recipient MIME vs cached templates
+
+For every lead, the old send path filled the template and built and
+serialized a new MIMEMultipart for each address it tried (up to three). The
+template library renders a lead once and reuses the serialized payload,
+adding only the recipient headers. Reports messages per second for both and
+checks they carry the same subject and body.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_templates [--leads 2000] [--recipients 3] [--json results.json]
+"""
+
+import argparse
+import email
+import json
+import time
+from email import policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from config import PersonalInfo
+from email_templates import TemplateLibrary
+from records import Lead
+
+SENDER = 'me@example.com'
+PERSONAL = PersonalInfo(name='Alex Doe', linkedin='https://linkedin.com/in/alexdoe', github='https://github.com/alexdoe')
+
+
+def leads(count):
+    platforms = ['Reddit', 'GitHub', 'HackerNews', 'AngelList']
+    return [Lead.from_dict({'id': i + 1, 'platform': platforms[i % len(platforms)], 'title': f"Backend role {i}",
+                            'url': f"https://example.com/jobs/{i}"}) for i in range(count)]
+
+
+def per_recipient(library, batch, recipients):
+    """The old send path: fill the template and serialize a fresh message for every address"""
+    messages = []
+    for lead in batch:
+        for n in range(recipients):
+            library.reload()
+            rendered = library.job_application(PERSONAL, lead)
+            msg = MIMEMultipart()
+            msg['From'] = SENDER
+            msg['To'] = f"jobs{n}@example.io"
+            msg['Subject'] = rendered.subject
+            msg.attach(MIMEText(rendered.body, 'plain'))
+            messages.append(msg.as_string())
+    return messages
+
+
+def cached(library, batch, recipients):
+    messages = []
+    for lead in batch:
+        for n in range(recipients):
+            messages.append(library.job_application(PERSONAL, lead).for_recipient(SENDER, f"jobs{n}@example.io"))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leads', type=int, default=2000)
+    parser.add_argument('--recipients', type=int, default=3, help="Addresses tried per lead")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    batch = leads(args.leads)
+    report = {}
+    outputs = {}
+    for name, build in (('per recipient', per_recipient), ('cached', cached)):
+        library = TemplateLibrary()
+        start = time.perf_counter()
+        outputs[name] = build(library, batch, args.recipients)
+        seconds = time.perf_counter() - start
+        report[name] = {'seconds': round(seconds, 3), 'messages_per_s': round(len(outputs[name]) / seconds, 1)}
+        print(f"{name:14} {len(outputs[name])} messages  {seconds * 1000:8.0f} ms  {len(outputs[name]) / seconds:9.0f}/s")
+
+    old = email.message_from_string(outputs['per recipient'][-1], policy=policy.default)
+    new = email.message_from_bytes(outputs['cached'][-1], policy=policy.default)
+    same = old['Subject'] == new['Subject'] and old['To'] == new['To'] and \
+        old.get_payload()[0].get_content() == new.get_payload()[0].get_content()
+    print(f"same subject, recipient and body: {same}")
+    report['same_content'] = same
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Local DNS stand-in for the recipient domain checks
+
+DNSStandIn is a UDP server on 127.0.0.1 answering MX/A/AAAA questions from
+a dict of zones, so mx_check.MXResolver can be exercised end to end with
+no network access:
+
+    server = DNSStandIn({
+        'example.com': {'mx': ['mail.example.com']},
+        'web-only.example': {'a': ['192.0.2.1']},
+        'no-mail.example': {'mx': ['']},            # null MX
+        'broken.example': 'servfail',
+        'silent.example': 'drop',                   # never answers
+    }).start()
+    resolver = MXResolver([server.address])
+
+Any other name gets NXDOMAIN with an SOA giving the negative TTL.
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict
+
+from mx_check import CLASS_IN, TYPE_A, TYPE_AAAA, TYPE_MX, TYPE_SOA, decode_name, encode_name
+
+_real_sleep = time.sleep
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        server = self.server
+        query_id, _ = struct.unpack_from('!HH', data)
+        name, offset = decode_name(data, 12)
+        rtype = struct.unpack_from('!H', data, offset)[0]
+        question = data[12:offset + 4]
+        server.record(name.lower(), rtype)
+
+        zone = server.zones.get(name.lower().rstrip('.'))
+        if zone == 'drop':
+            return
+        if server.latency:
+            _real_sleep(server.latency)
+
+        answers, authority, rcode = [], [], 0
+        if zone == 'servfail':
+            rcode = 2
+        elif zone is None:
+            rcode = 3
+        if isinstance(zone, dict):
+            ttl = zone.get('ttl', 300)
+            if rtype == TYPE_MX:
+                answers = [self._rr(TYPE_MX, ttl, struct.pack('!H', 10) + encode_name(exchange))
+                           for exchange in zone.get('mx', [])]
+            elif rtype == TYPE_A:
+                answers = [self._rr(TYPE_A, ttl, socket.inet_aton(address)) for address in zone.get('a', [])]
+            elif rtype == TYPE_AAAA:
+                answers = [self._rr(TYPE_AAAA, ttl, socket.inet_pton(socket.AF_INET6, address))
+                           for address in zone.get('aaaa', [])]
+        if rcode == 3 or (rcode == 0 and not answers):
+            soa = encode_name('ns.invalid') + encode_name('hostmaster.invalid') + \
+                struct.pack('!IIIII', 1, 3600, 600, 86400, server.negative_ttl)
+            authority = [self._rr(TYPE_SOA, server.negative_ttl, soa)]
+
+        # Response, recursion desired + available; the name in answers points back at the question
+        header = struct.pack('!HHHHHH', query_id, 0x8180 | rcode, 1, len(answers), len(authority), 0)
+        sock.sendto(header + question + b''.join(answers + authority), self.client_address)
+
+    @staticmethod
+    def _rr(rtype: int, ttl: int, rdata: bytes) -> bytes:
+        return b'\xc0\x0c' + struct.pack('!HHIH', rtype, CLASS_IN, ttl, len(rdata)) + rdata
+
+
+class DNSStandIn(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+
+    def __init__(self, zones: Dict, latency: float = 0.0, negative_ttl: int = 900, port: int = 0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.zones = {name.lower(): zone for name, zone in zones.items()}
+        self.latency = latency
+        self.negative_ttl = negative_ttl
+        self.queries = 0
+        self.by_type: Dict[int, int] = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def record(self, name: str, rtype: int):
+        with self._stats_lock:
+            self.queries += 1
+            self.by_type[rtype] = self.by_type.get(rtype, 0) + 1
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.queries = 0
+            self.by_type = {}
+
+    def start(self) -> 'DNSStandIn':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,71 @@
+"""
+Peak-memory measurement shared by the benchmarks
+
+tracemalloc only sees the Python heap, while lxml, the SSL stack and mmap'd
+files allocate outside it, so the benchmarks measure resident set size. On
+Linux the kernel's high-water mark (VmHWM) is reset through
+/proc/self/clear_refs before each measured block; elsewhere ru_maxrss is used,
+which can only report growth beyond the process' earlier peak.
+"""
+
+import resource
+import sys
+
+
+def _status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb():
+    rss = _status_kb('VmRSS')
+    if rss is not None:
+        return rss / 1024
+    return _maxrss_mb()
+
+
+def _maxrss_mb():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB everywhere else
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+class PeakRSS:
+    """Context manager recording RSS at entry and the peak RSS reached inside the block
+
+        with PeakRSS() as mem:
+            work()
+        print(mem.peak_mb, mem.growth_mb)
+    """
+
+    def __enter__(self):
+        self._exact = _reset_peak()
+        self.start_mb = current_rss_mb()
+        self._start_maxrss_mb = _maxrss_mb()
+        return self
+
+    def __exit__(self, *exc):
+        hwm = _status_kb('VmHWM') if self._exact else None
+        if hwm is not None:
+            self.peak_mb = hwm / 1024
+            self.growth_mb = max(0.0, self.peak_mb - self.start_mb)
+        else:
+            self.peak_mb = _maxrss_mb()
+            self.growth_mb = max(0.0, self.peak_mb - self._start_maxrss_mb)
+        self.end_mb = current_rss_mb()
+        return False
@@ -0,0 +1,295 @@
+"""
+Offline replay of recorded responses for the scrapers
+
+ReplayServer is a local HTTP stand-in serving the captured Reddit/GitHub/HN
+JSON (REST and GraphQL) and directory/startup/Maps/company HTML in benchmarks/fixtures. ReplayAdapter
+is mounted on a scraper's requests.Session and rewrites every outgoing
+request to that server, so the unmodified scraper code runs end to end with
+no network access:
+
+    server = ReplayServer().start()
+    aggregator = JobAggregator(config)
+    install(aggregator, server)
+    aggregator.get_all_jobs()
+
+JSON fixtures may contain the placeholders "{{now}}" (epoch seconds) and
+"{{now_iso}}" (ISO-8601 UTC), filled in when served so recency filters keep
+accepting the recorded posts. Any fixture may use "{{host}}" for the host the
+request was for.
+
+Hosts matching fail_hosts answer every request with fail_status (and a
+Retry-After header when retry_after is set), to replay a rate-limited or
+blocked source.
+"""
+
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Kept before SleepRecorder can patch time.sleep, for the simulated latency
+_real_sleep = time.sleep
+
+# (host regex, path regex, fixture file) - first match wins
+ROUTES: List[Tuple[str, str, str]] = [
+    (r'(www\.)?reddit\.com', r'/r/[^/]+/new\.json', 'reddit_new.json'),
+    (r'api\.github\.com', r'/search/issues', 'github_search_issues.json'),
+    (r'api\.github\.com', r'/graphql', 'github_graphql.json'),
+    (r'hacker-news\.firebaseio\.com', r'/v0/item/39217901\.json', 'hn_story.json'),
+    (r'hacker-news\.firebaseio\.com', r'/v0/item/\d+\.json', 'hn_comment.json'),
+    (r'angel\.co', r'/jobs', 'angellist_jobs.html'),
+    (r'www\.yelp\.com', r'/search', 'yelp_search.html'),
+    (r'www\.yelp\.com', r'/biz/.+', 'yelp_business.html'),
+    (r'www\.yellowpages\.com', r'/search', 'yellowpages_search.html'),
+    (r'www\.bbb\.org', r'/search', 'bbb_search.html'),
+    (r'clutch\.co', r'/developers', 'clutch_search.html'),
+    (r'www\.ycombinator\.com', r'/companies', 'ycombinator_companies.html'),
+    (r'github\.com', r'/search', 'github_orgs.html'),
+    (r'www\.producthunt\.com', r'/topics/.+', 'producthunt_startup_tools.html'),
+    (r'builtwith\.com', r'/technology/.+', 'builtwith_technology.html'),
+    (r'www\.google\.com', r'/maps/search/.+', 'google_maps_search.html'),
+    # Any other host is treated as a company website
+    (r'.+', r'/robots\.txt', 'company_robots.txt'),
+    (r'.+', r'/sitemap\.xml', 'company_sitemap.xml'),
+    (r'.+', r'/?', 'company_home.html'),
+    (r'.+', r'/contact(-us)?', 'company_contact.html'),
+    (r'.+', r'/(about|about-us|careers|team|jobs)', 'company_no_emails.html'),
+]
+
+CONTENT_TYPES = {
+    '.json': 'application/json; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+    '.txt': 'text/plain; charset=utf-8',
+    '.xml': 'application/xml; charset=utf-8',
+}
+
+
+class _FixtureCache:
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> bytes:
+        with self._lock:
+            if name not in self._files:
+                with open(os.path.join(self.root, name), 'rb') as f:
+                    self._files[name] = f.read()
+            return self._files[name]
+
+
+def render(body: bytes, host: str = '') -> bytes:
+    if b'{{' not in body:
+        return body
+    body = body.replace(b'{{host}}', host.encode())
+    now = datetime.now(timezone.utc)
+    body = body.replace(b'"{{now}}"', str(int(now.timestamp())).encode())
+    return body.replace(b'{{now_iso}}', now.strftime('%Y-%m-%dT%H:%M:%SZ').encode())
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle would hold the body back ~40ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        host, _, rest = self.path.lstrip('/').partition('/')
+        path = '/' + rest.split('?', 1)[0]
+
+        fixture = server.match(host, path)
+        if server.fail_hosts and server.fail_hosts.fullmatch(host):
+            fixture = None
+            body = b'Too Many Requests'
+            self.send_response(server.fail_status)
+            self.send_header('Content-Type', 'text/plain')
+            if server.retry_after is not None:
+                self.send_header('Retry-After', str(server.retry_after))
+        elif fixture is None:
+            body = b'Not Found'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain')
+        else:
+            body = render(server.fixtures.get(fixture), host)
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(fixture)[1], 'application/octet-stream'))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if server.latency:
+            _real_sleep(server.latency)
+        self.wfile.write(body)
+        server.record(host + path, fixture, len(body))
+
+    def do_POST(self):
+        # Request bodies (GraphQL queries) are read and ignored; the route alone picks the fixture
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes=None, fixtures_dir: str = FIXTURES, latency: float = 0.0, port: int = 0,
+                 fail_hosts: Optional[str] = None, fail_status: int = 429, retry_after: Optional[int] = None):
+        super().__init__(('127.0.0.1', port), ReplayHandler)
+        self.fail_hosts = re.compile(fail_hosts) if fail_hosts else None
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.routes = [(re.compile(h), re.compile(p), f) for h, p, f in (routes or ROUTES)]
+        self.fixtures = _FixtureCache(fixtures_dir)
+        self.latency = latency
+        self.requests = 0
+        self.bytes_served = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def match(self, host: str, path: str) -> Optional[str]:
+        for host_re, path_re, fixture in self.routes:
+            if host_re.fullmatch(host) and path_re.fullmatch(path):
+                return fixture
+        return None
+
+    def record(self, path: str, fixture: Optional[str], size: int):
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_served += size
+            if fixture is None:
+                self.misses += 1
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests = self.bytes_served = self.misses = 0
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # Streaming fetches that stop early hang up on purpose
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to the replay server instead of the real host"""
+
+    def __init__(self, server: ReplayServer, **kwargs):
+        super().__init__(**kwargs)
+        self.server = server
+        self.latencies: List[float] = []
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        parts = urlsplit(original_url)
+        request = request.copy()
+        request.url = f"{self.server.base_url}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else '')
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        self.latencies.append(time.perf_counter() - start)
+
+        response.url = original_url
+        return response
+
+
+def install(target, server: ReplayServer) -> List[ReplayAdapter]:
+    """Mount a ReplayAdapter on every requests.Session reachable from target"""
+    adapters = []
+    for session in _find_sessions(target):
+        adapter = ReplayAdapter(server)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        adapters.append(adapter)
+    return adapters
+
+
+def _find_sessions(target, seen=None):
+    seen = seen if seen is not None else set()
+    if id(target) in seen:
+        return
+    seen.add(id(target))
+
+    if isinstance(target, requests.Session):
+        yield target
+        return
+    if isinstance(target, (list, tuple)):
+        children = target
+    elif isinstance(target, dict):
+        children = target.values()
+    elif hasattr(target, '__dict__') and type(target).__module__ not in ('builtins',):
+        children = vars(target).values()
+    else:
+        return
+    for child in children:
+        yield from _find_sessions(child, seen)
+
+
+@contextmanager
+def no_network():
+    """Refuse any connection that is not to the loopback interface"""
+    original_connect = socket.socket.connect
+
+    def guarded_connect(sock, address):
+        host = address[0] if isinstance(address, tuple) else address
+        if sock.family in (socket.AF_INET, socket.AF_INET6) and host not in ('127.0.0.1', '::1', 'localhost'):
+            raise ConnectionRefusedError(f"Network access blocked during replay: {address}")
+        return original_connect(sock, address)
+
+    with mock.patch.object(socket.socket, 'connect', guarded_connect):
+        yield
+
+
+class SleepRecorder:
+    """Replaces time.sleep with a no-op that adds up the requested delays
+
+    The scrapers' politeness sleeps would otherwise dominate every timing; the
+    skipped total is reported next to the measurements instead.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._patch = None
+
+    def _sleep(self, seconds):
+        with self._lock:
+            self.seconds += seconds
+            self.calls += 1
+
+    def __enter__(self):
+        self._patch = mock.patch('time.sleep', self._sleep)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._patch.stop()
+        return False
@@ -17,97 +17,147 @@ NO EMAIL GUESSING - Only real, verified emails that actually exist!
 All data is fetched in real-time - no hardcoded company lists!
 """
 
+import os
 import requests
+import threading
 import time
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
-import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import List, Optional
 import json
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+import driver_helpers
+import html_parsing
+import http_client
+import parse_pool
+import tracing
+from records import Company
+from site_map import SiteMapCache
+from dedup import normalize_company_name, registrable_domain
+
+def company_key(company):
+    """Registrable domain of the website, else the normalized name; None when the company has no name"""
+    name = normalize_company_name(company.get('name'))
+    if not name:
+        return None
+    return registrable_domain(company.get('website')) or f"name:{name}"
 
 class GoogleMapsCompanyFinder:
-    def __init__(self):
-        self.setup_driver()
+    SEARCH_QUERIES = [
+        "software development company",
+        "tech startup",
+        "web development agency", 
+        "mobile app development",
+        "software consulting",
+        "IT services company"
+    ]
+    
+    def __init__(self, browser_fallback=True):
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Language': 'en-US,en;q=0.9'
+        })
+        self.browser_fallback = browser_fallback
+        # Chrome is only started the first time the HTTP path can't read a search
+        self.driver = None
     
     def setup_driver(self):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        
-        self.driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
+        self.driver = driver_helpers.chrome_driver()
     
     def search_software_companies(self, location="United States", limit=50):
-        companies = []
-        search_queries = [
-            "software development company",
-            "tech startup",
-            "web development agency", 
-            "mobile app development",
-            "software consulting",
-            "IT services company"
-        ]
+        return list(self.iter_software_companies(location, limit))
+    
+    def iter_software_companies(self, location="United States", limit=50):
+        """Yield companies from each Maps search, read over plain HTTP where possible"""
+        per_query = limit // len(self.SEARCH_QUERIES)
         
-        for query in search_queries:
+        for query in self.SEARCH_QUERIES:
             try:
-                search_url = f"https://www.google.com/maps/search/{query}+{location.replace(' ', '+')}"
-                self.driver.get(search_url)
-                time.sleep(3)
-                
-                # Scroll to load more results
-                for _ in range(3):
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(2)
+                places = self._search_http(query, location, per_query)
+                if places is None:
+                    if not self.browser_fallback:
+                        print(f"⚠ Google Maps search '{query}' unreadable over HTTP; browser fallback disabled")
+                        continue
+                    print(f"⚠ Google Maps search '{query}' unreadable over HTTP, falling back to the browser")
+                    places = self._search_browser(query, location, per_query)
                 
-                # Find company listings
-                company_elements = self.driver.find_elements(By.CSS_SELECTOR, "[data-result-index]")
+                for place in places:
+                    if place['website'] and place['name']:
+                        yield Company(
+                            name=place['name'],
+                            website=place['website'],
+                            phone=place['phone'],
+                            address=place['address'],
+                            source='Google Maps',
+                            query=query
+                        )
                 
-                for element in company_elements[:limit//len(search_queries)]:
-                    try:
-                        # Extract company name
-                        name_elem = element.find_element(By.CSS_SELECTOR, "h3, .qBF1Pd")
-                        company_name = name_elem.text if name_elem else "Unknown"
-                        
-                        # Click to get details
-                        element.click()
-                        time.sleep(2)
-                        
-                        # Extract website
-                        website = self.extract_website()
-                        
-                        # Extract other details
-                        phone = self.extract_phone()
-                        address = self.extract_address()
-                        
-                        if website and company_name != "Unknown":
-                            companies.append({
-                                'name': company_name,
-                                'website': website,
-                                'phone': phone,
-                                'address': address,
-                                'source': 'Google Maps',
-                                'query': query
-                            })
-                        
-                        # Go back to search results
-                        self.driver.back()
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        print(f"Error extracting company: {e}")
-                        continue
-                        
+                tracing.sleep(1)
             except Exception as e:
                 print(f"Error searching '{query}': {e}")
                 continue
-        
-        return companies
+    
+    @tracing.traced('maps.http')
+    def _search_http(self, query, location, limit):
+        """Places parsed from the search payload embedded in the Maps page, or None if it can't be read"""
+        search_url = f"https://www.google.com/maps/search/{query.replace(' ', '+')}+{location.replace(' ', '+')}?hl=en"
+        try:
+            response = http_client.fetch(self.session, search_url, timeout=10)
+        except requests.RequestException as e:
+            print(f"Google Maps request error: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        return parse_pool.parse(html_parsing.parse_google_maps, response.content, limit=limit)
+    
+    # Results list, one result card, and the heading of the details side panel
+    RESULTS_FEED = (By.CSS_SELECTOR, "div[role='feed']")
+    RESULT_CARD = (By.CSS_SELECTOR, "[data-result-index], div[role='feed'] div[role='article']")
+    PANEL_TITLE = (By.CSS_SELECTOR, "h1.DUwDvf, div[role='main'] h1")
+    
+    @tracing.traced('maps.selenium')
+    def _search_browser(self, query, location, limit):
+        """Places read by clicking through the results in Chrome (slower, kept as a fallback)"""
+        if self.driver is None:
+            self.setup_driver()
+        
+        search_url = f"https://www.google.com/maps/search/{query}+{location.replace(' ', '+')}"
+        self.driver.get(search_url)
+        if not driver_helpers.wait_for(self.driver, self.RESULT_CARD, timeout=15):
+            return []
+        
+        # Scroll the results list until enough are loaded or it stops growing
+        company_elements = driver_helpers.scroll_until_stable(self.driver, self.RESULTS_FEED, self.RESULT_CARD, limit)
+        
+        places = []
+        for element in company_elements:
+            try:
+                # Extract company name
+                company_name = element.get_attribute("aria-label")
+                if not company_name:
+                    name_elem = element.find_element(By.CSS_SELECTOR, "h3, .qBF1Pd")
+                    company_name = name_elem.text
+                if not company_name:
+                    continue
+                
+                # The details open in the side panel; wait until it shows this result
+                opened = driver_helpers.click_and_wait(
+                    self.driver, element,
+                    lambda driver: driver_helpers.text_of(driver, self.PANEL_TITLE) == company_name)
+                if not opened:
+                    continue
+                
+                places.append({
+                    'name': company_name,
+                    'website': self.extract_website(),
+                    'phone': self.extract_phone(),
+                    'address': self.extract_address()
+                })
+            except Exception as e:
+                print(f"Error extracting company: {e}")
+                continue
+        return places
     
     def extract_website(self):
         try:
@@ -131,15 +181,21 @@ class GoogleMapsCompanyFinder:
             return None
     
     def close(self):
-        self.driver.quit()
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
 
 class EnhancedEmailExtractor:
-    def __init__(self, hunter_api_key=None):
+    def __init__(self, hunter_api_key=None, site_maps: Optional[SiteMapCache] = None, enough_emails: int = 0):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.hunter_api_key = hunter_api_key
+        # Which pages exist on each site; without it every guessed path is probed
+        self.site_maps = site_maps
+        # Stop crawling a site once this many emails are found (0 = crawl every page)
+        self.enough_emails = enough_emails
     
     def extract_emails_from_website(self, website_url, company_name=None):
         emails = set()
@@ -160,6 +216,7 @@ class EnhancedEmailExtractor:
         # NO GUESSING - only return emails we actually found and verified
         return list(emails)
     
+    @tracing.traced('enrich.hunter')
     def _get_emails_from_hunter(self, website_url, company_name):
         """Use Hunter.io free API (100 searches/month free)"""
         emails = []
@@ -167,7 +224,7 @@ class EnhancedEmailExtractor:
             domain = self.extract_domain(website_url)
             url = f"https://api.hunter.io/v2/domain-search?domain={domain}&api_key={self.hunter_api_key}"
             
-            response = self.session.get(url, timeout=10)
+            response = http_client.fetch(self.session, url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 if 'data' in data and 'emails' in data['data']:
@@ -181,6 +238,7 @@ class EnhancedEmailExtractor:
         
         return emails
     
+    @tracing.traced('enrich.crawl')
     def _scrape_emails_from_website(self, website_url):
         """Deep web scraping for REAL emails only"""
         emails = set()
@@ -206,40 +264,41 @@ class EnhancedEmailExtractor:
             '/terms'
         ]
         
-        for page in pages_to_check:
+        if self.site_maps:
+            urls, crawl_delay = self.site_maps.pages_to_check(website_url, pages_to_check, self.session)
+        else:
+            urls, crawl_delay = [website_url.rstrip('/') + page for page in pages_to_check], 0
+        
+        for i, url in enumerate(urls):
+            if self.enough_emails and len(emails) >= self.enough_emails:
+                break
             try:
-                url = website_url.rstrip('/') + page
-                response = self.session.get(url, timeout=10)
+                if i:
+                    tracing.sleep(max(1.5, crawl_delay))  # Be respectful
+                scanner = html_parsing.EmailScanner()
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Method 1: Direct text email extraction
-                    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                    found_emails = re.findall(email_pattern, response.text)
-                    
-                    # Method 2: Look for mailto links
-                    mailto_links = soup.find_all('a', href=re.compile(r'^mailto:'))
-                    for link in mailto_links:
-                        email = link.get('href', '').replace('mailto:', '').split('?')[0]
-                        if email:
-                            found_emails.append(email)
-                    
-                    # Method 3: Look for contact forms with hidden emails
-                    contact_sections = soup.find_all(['div', 'section'], 
-                                                   class_=re.compile(r'contact|email', re.I))
-                    for section in contact_sections:
-                        section_emails = re.findall(email_pattern, section.get_text())
-                        found_emails.extend(section_emails)
-                    
-                    # Filter for relevant emails
-                    for email in found_emails:
-                        if self._is_relevant_email(email):
+                def take(candidates):
+                    for email in candidates:
+                        if self._is_relevant_email(email) and email not in emails:
                             emails.add(email)
                             print(f"     📧 Found real email: {email} on {url}")
                 
-                time.sleep(1.5)  # Be respectful
+                def on_chunk(chunk):
+                    # Plain-text addresses as the page arrives; stop reading once we have enough
+                    take(scanner.feed(chunk))
+                    return bool(self.enough_emails) and len(emails) >= self.enough_emails
+                
+                response = http_client.fetch(self.session, url, timeout=10, on_chunk=on_chunk)
+                if self.site_maps:
+                    self.site_maps.record(url, response.status_code)
+                
+                if response.ok and not response.stopped:
+                    take(scanner.finish())
+                    # Mailto links and contact sections (no DOM built for pages without emails)
+                    take(parse_pool.parse(html_parsing.extract_page_emails, response.content))
                 
+            except http_client.HostUnavailable:
+                break  # The site is down or blocking us; its other pages would fail too
             except Exception as e:
                 continue
         
@@ -365,410 +424,408 @@ class EnhancedEmailExtractor:
         return urlparse(url).netloc.replace('www.', '')
 
 class BusinessDirectoryFinder:
-    def __init__(self):
+    # Directory name -> (search method, whether it searches by location)
+    DIRECTORIES = {
+        'Yelp': ('_search_yelp_business', True),
+        'YellowPages': ('_search_yellowpages', True),
+        'BBB': ('_search_bbb', True),
+        'Clutch': ('_search_clutch', False),
+    }
+    
+    def __init__(self, max_workers=8, max_pages=3, per_directory=2):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        # The pool is shared by every directory; this keeps any one site from getting all of it
+        self._slots = {name: threading.BoundedSemaphore(per_directory) for name in self.DIRECTORIES}
     
     def search_companies(self, keywords="software development", location="United States"):
-        companies = []
-        
-        # Search multiple business directories
-        sources = [
-            self._search_yelp_business(keywords, location),
-            self._search_yellowpages(keywords, location),
-            self._search_bbb(keywords, location),
-            self._search_clutch(keywords),
-        ]
+        return list(self.iter_companies(keywords, location))
+    
+    def iter_companies(self, keywords="software development", location="United States"):
+        """Yield directory companies as the searches complete, deduplicated by website
         
-        for source_companies in sources:
-            companies.extend(source_companies)
+        keywords and location may each be a string or a list; every directory is
+        searched for every combination at once on a bounded thread pool. Each
+        search follows its result pages until one adds nothing new or max_pages
+        is reached, and Yelp detail pages are looked up on the same pool.
+        """
+        keyword_list = [keywords] if isinstance(keywords, str) else list(keywords)
+        location_list = [location] if isinstance(location, str) else list(location)
         
-        # Remove duplicates based on website
         seen_websites = set()
-        unique_companies = []
-        for company in companies:
-            website = company.get('website', '').lower()
-            if website and website not in seen_websites:
-                seen_websites.add(website)
-                unique_companies.append(company)
-        
-        return unique_companies
+        seen_results = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='directory') as pool:
+            # future -> (directory, keywords, location, page) for searches, or the company for detail lookups
+            pending = {}
+            
+            def search(directory, keywords, location, page):
+                method = getattr(self, self.DIRECTORIES[directory][0])
+                pending[pool.submit(tracing.bind(method), keywords, location, page)] = (directory, keywords, location, page)
+            
+            for directory, (_, by_location) in self.DIRECTORIES.items():
+                for keyword in keyword_list:
+                    for place in (location_list if by_location else [None]):
+                        search(directory, keyword, place, 1)
+            
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task = pending.pop(future)
+                        if isinstance(task, Company):
+                            task['website'] = future.result()
+                            ready = [task]
+                        else:
+                            directory, keyword, place, page = task
+                            ready = []
+                            new_results = 0
+                            for company, detail_url in future.result():
+                                result_key = (directory, company.get('name'), company.get('website') or detail_url)
+                                if result_key in seen_results:
+                                    continue
+                                seen_results.add(result_key)
+                                new_results += 1
+                                if detail_url:
+                                    pending[pool.submit(tracing.bind(self._extract_website_from_yelp_page), detail_url)] = company
+                                else:
+                                    ready.append(company)
+                            # An empty page, or one that only repeats earlier results, ends the listing
+                            if new_results and page < self.max_pages:
+                                search(directory, keyword, place, page + 1)
+                        
+                        # Remove duplicates based on website
+                        for company in ready:
+                            website = (company.get('website') or '').lower()
+                            if website and website not in seen_websites:
+                                seen_websites.add(website)
+                                yield company
+            finally:
+                # The consumer may stop early; don't start requests nobody will read
+                for future in pending:
+                    future.cancel()
+    
+    def _get(self, directory, url, timeout):
+        with self._slots[directory]:
+            return http_client.fetch(self.session, url, timeout=timeout)
+    
+    # Each search returns one result page as (company, detail page URL or None) pairs
     
-    def _search_yelp_business(self, keywords, location):
-        companies = []
+    def _search_yelp_business(self, keywords, location, page=1):
         try:
-            # Yelp business search
+            # Yelp business search, 10 results per page
             search_url = f"https://www.yelp.com/search?find_desc={keywords.replace(' ', '+')}&find_loc={location.replace(' ', '+')}"
-            response = self.session.get(search_url, timeout=10)
+            if page > 1:
+                search_url += f"&start={(page - 1) * 10}"
+            response = self._get('Yelp', search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                business_cards = soup.find_all('div', {'data-testid': 'serp-ia-card'}) or soup.find_all('div', class_=re.compile('businessName'))
-                
-                for card in business_cards[:15]:
-                    try:
-                        # Extract business name
-                        name_elem = card.find('a') or card.find('h3')
-                        if name_elem:
-                            name = name_elem.get_text(strip=True)
-                            business_url = name_elem.get('href', '')
-                            
-                            if business_url and name:
-                                # Get more details from business page
-                                website = self._extract_website_from_yelp_page(business_url)
-                                
-                                companies.append({
-                                    'name': name,
-                                    'website': website,
-                                    'source': 'Yelp',
-                                    'type': 'Business Directory',
-                                    'location': location
-                                })
-                    except Exception as e:
-                        continue
-            
-            time.sleep(1)
+                # The website is on the business page, fetched separately
+                return [(Company(
+                            name=name,
+                            website=None,
+                            source='Yelp',
+                            type='Business Directory',
+                            location=location
+                        ), business_url)
+                        for name, business_url in parse_pool.parse(html_parsing.parse_yelp_search, response.content, limit=None)
+                        if business_url and name]
         except Exception as e:
             print(f"Yelp search error: {e}")
-        
-        return companies
+        return []
     
     def _extract_website_from_yelp_page(self, business_url):
         try:
             if not business_url.startswith('http'):
                 business_url = 'https://www.yelp.com' + business_url
             
-            response = self.session.get(business_url, timeout=5)
+            response = self._get('Yelp', business_url, timeout=5)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                website_elem = soup.find('a', {'data-testid': 'website-url'}) or soup.find('a', string=re.compile('website', re.I))
-                if website_elem:
-                    return website_elem.get('href')
+                return parse_pool.parse(html_parsing.parse_yelp_website, response.content)
         except:
             pass
         return None
     
-    def _search_yellowpages(self, keywords, location):
-        companies = []
+    def _search_yellowpages(self, keywords, location, page=1):
         try:
             search_url = f"https://www.yellowpages.com/search?search_terms={keywords.replace(' ', '+')}&geo_location_terms={location.replace(' ', '+')}"
-            response = self.session.get(search_url, timeout=10)
+            if page > 1:
+                search_url += f"&page={page}"
+            response = self._get('YellowPages', search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                business_cards = soup.find_all('div', class_='result')
-                
-                for card in business_cards[:10]:
-                    try:
-                        name_elem = card.find('a', class_='business-name')
-                        website_elem = card.find('a', class_='track-visit-website')
-                        
-                        if name_elem:
-                            name = name_elem.get_text(strip=True)
-                            website = website_elem.get('href') if website_elem else None
-                            
-                            companies.append({
-                                'name': name,
-                                'website': website,
-                                'source': 'YellowPages',
-                                'type': 'Business Directory',
-                                'location': location
-                            })
-                    except Exception as e:
-                        continue
-            
-            time.sleep(1)
+                return [(Company(
+                            name=name,
+                            website=website,
+                            source='YellowPages',
+                            type='Business Directory',
+                            location=location
+                        ), None)
+                        for name, website in parse_pool.parse(html_parsing.parse_yellowpages, response.content, limit=None)]
         except Exception as e:
             print(f"YellowPages search error: {e}")
-        
-        return companies
+        return []
     
-    def _search_bbb(self, keywords, location):
-        companies = []
+    def _search_bbb(self, keywords, location, page=1):
         try:
             search_url = f"https://www.bbb.org/search?find_country=USA&find_text={keywords.replace(' ', '+')}&find_type=Business&find_loc={location.replace(' ', '+')}"
-            response = self.session.get(search_url, timeout=10)
+            if page > 1:
+                search_url += f"&page={page}"
+            response = self._get('BBB', search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                business_cards = soup.find_all('div', class_='result-item')
-                
-                for card in business_cards[:10]:
-                    try:
-                        name_elem = card.find('h4') or card.find('a')
-                        if name_elem:
-                            name = name_elem.get_text(strip=True)
-                            
-                            companies.append({
-                                'name': name,
-                                'website': None,  # BBB doesn't directly show websites in search
-                                'source': 'BBB',
-                                'type': 'Accredited Business',
-                                'location': location
-                            })
-                    except Exception as e:
-                        continue
-            
-            time.sleep(1)
+                return [(Company(
+                            name=name,
+                            website=None,  # BBB doesn't directly show websites in search
+                            source='BBB',
+                            type='Accredited Business',
+                            location=location
+                        ), None)
+                        for name in parse_pool.parse(html_parsing.parse_bbb, response.content, limit=None)]
         except Exception as e:
             print(f"BBB search error: {e}")
-        
-        return companies
+        return []
     
-    def _search_clutch(self, keywords):
-        companies = []
+    def _search_clutch(self, keywords, location=None, page=1):
         try:
-            # Clutch is specifically for software/tech companies
+            # Clutch is specifically for software/tech companies; its pages are numbered from 0
             search_url = f"https://clutch.co/developers?search={keywords.replace(' ', '+')}"
-            response = self.session.get(search_url, timeout=10)
+            if page > 1:
+                search_url += f"&page={page - 1}"
+            response = self._get('Clutch', search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                company_cards = soup.find_all('div', class_='provider-row')
-                
-                for card in company_cards[:15]:
-                    try:
-                        name_elem = card.find('h3') or card.find('a', class_='company_title')
-                        website_elem = card.find('a', class_='website_link')
-                        
-                        if name_elem:
-                            name = name_elem.get_text(strip=True)
-                            website = website_elem.get('href') if website_elem else None
-                            
-                            companies.append({
-                                'name': name,
-                                'website': website,
-                                'source': 'Clutch',
-                                'type': 'Software Development',
-                                'verified': True
-                            })
-                    except Exception as e:
-                        continue
-            
-            time.sleep(1)
+                return [(Company(
+                            name=name,
+                            website=website,
+                            source='Clutch',
+                            type='Software Development',
+                            verified=True
+                        ), None)
+                        for name, website in parse_pool.parse(html_parsing.parse_clutch, response.content, limit=None)]
         except Exception as e:
             print(f"Clutch search error: {e}")
-        
-        return companies
+        return []
 
 class StartupFinder:
-    def __init__(self):
+    # Source name -> scraper; the listings change slowly, so each is cached between runs
+    SOURCES = {
+        'Y Combinator': '_get_ycombinator_companies',
+        'GitHub': '_get_github_trending_organizations',
+        'ProductHunt': '_get_producthunt_companies',
+        'BuiltWith': '_get_builtwith_companies',
+    }
+    MAX_CACHED_KEYS = 5000
+    
+    def __init__(self, cache_path: Optional[str] = 'startup_cache.json', refresh_hours: float = 12):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.cache_path = cache_path
+        self.refresh_hours = refresh_hours
+        self.cache = self._load_cache()
     
     def get_funded_startups(self):
-        startups = []
-        
-        # Get startups from multiple free sources
-        sources = [
-            self._get_ycombinator_companies(),
-            self._get_github_trending_organizations(),
-            self._get_producthunt_companies(),
-            self._get_builtwith_companies(),
-        ]
-        
-        for source_startups in sources:
-            startups.extend(source_startups)
-        
-        return startups
+        return list(self.iter_funded_startups())
+    
+    def iter_funded_startups(self):
+        """Yield startups that are new since each source's last fetch, as each source finishes
+        
+        All sources are scraped at once. A source fetched less than refresh_hours
+        ago is skipped, and a refetched one only yields the companies its previous
+        listing didn't have, so unchanged listings never reach enrichment again.
+        """
+        due = [name for name in self.SOURCES if self._is_due(name)]
+        for name in self.SOURCES:
+            if name not in due:
+                age = (time.time() - self.cache[name]['fetched_at']) / 3600
+                print(f"⏭️ {name}: fetched {age:.1f}h ago, next refresh in {self.refresh_hours - age:.1f}h")
+        if not due:
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(due), thread_name_prefix='startups') as pool:
+            futures = {pool.submit(tracing.bind(lambda method: list(method())), getattr(self, self.SOURCES[name])): name
+                       for name in due}
+            try:
+                for future in as_completed(futures):
+                    name = futures[future]
+                    startups = future.result()
+                    known = set(self.cache.get(name, {}).get('keys', []))
+                    keys = [company_key(startup) or startup.get('name') for startup in startups]
+                    new_startups = [startup for startup, key in zip(startups, keys) if key not in known]
+                    print(f"🆕 {name}: {len(new_startups)} new of {len(startups)} listed")
+                    yield from new_startups
+                    # Recorded only once everything new has been handed on
+                    if startups:
+                        self._remember(name, keys)
+            finally:
+                for future in futures:
+                    future.cancel()
+    
+    def _is_due(self, name):
+        if not self.cache_path:
+            return True
+        entry = self.cache.get(name)
+        return entry is None or time.time() - entry['fetched_at'] >= self.refresh_hours * 3600
+    
+    def _remember(self, name, keys):
+        if not self.cache_path:
+            return
+        previous = self.cache.get(name, {}).get('keys', [])
+        current = list(dict.fromkeys(key for key in keys if key))
+        listed = set(current)
+        # Companies that dropped off the listing are remembered for a while in case they come back
+        merged = current + [key for key in previous if key not in listed]
+        self.cache[name] = {'fetched_at': time.time(), 'keys': merged[:self.MAX_CACHED_KEYS]}
+        self._save_cache()
+    
+    def _load_cache(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠ Ignoring unreadable {self.cache_path}: {e}")
+            return {}
+    
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"Error saving {self.cache_path}: {e}")
     
     def _get_ycombinator_companies(self):
         """Scrape Y Combinator companies - completely free and public"""
-        companies = []
         try:
             url = "https://www.ycombinator.com/companies"
-            response = self.session.get(url, timeout=15)
+            response = http_client.fetch(self.session, url, timeout=15)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # YC company cards
-                company_cards = soup.find_all('div', class_='_company_86jzd_338') or soup.find_all('a', href=re.compile('/companies/'))
-                
-                for card in company_cards[:30]:  # Limit to 30 companies
-                    try:
-                        # Extract company name
-                        name_elem = card.find('span', class_='_coName_86jzd_453') or card.find('h3') or card.text.strip()
-                        name = name_elem.text.strip() if hasattr(name_elem, 'text') else str(name_elem).strip()
+                # YC company cards, limited to 30 companies
+                for card in parse_pool.parse(html_parsing.parse_ycombinator, response.content, limit=30):
+                    name = card['name']
+                    if name:
+                        yield Company(
+                            name=name,
+                            batch=card['batch'],
+                            description=card['description'],
+                            source='Y Combinator',
+                            funding='YC Funded',
+                            website=f"https://www.ycombinator.com/companies/{name.lower().replace(' ', '-')}"
+                        )
                         
-                        # Extract batch info
-                        batch_elem = card.find('span', class_='_batch_86jzd_461')
-                        batch = batch_elem.text.strip() if batch_elem else 'Unknown'
-                        
-                        # Extract description
-                        desc_elem = card.find('span', class_='_coDescription_86jzd_478')
-                        description = desc_elem.text.strip() if desc_elem else ''
-                        
-                        if name:
-                            companies.append({
-                                'name': name,
-                                'batch': batch,
-                                'description': description,
-                                'source': 'Y Combinator',
-                                'funding': 'YC Funded',
-                                'website': f"https://www.ycombinator.com/companies/{name.lower().replace(' ', '-')}"
-                            })
-                    except Exception as e:
-                        continue
-                        
-            time.sleep(2)
         except Exception as e:
             print(f"YC scraping error: {e}")
-        
-        return companies
     
     def _get_github_trending_organizations(self):
         """Get trending GitHub organizations (many are startups/companies)"""
-        companies = []
         try:
             # GitHub trending organizations
             url = "https://github.com/search?q=type:org+followers:%3E1000&type=users&s=followers&o=desc"
-            response = self.session.get(url, timeout=10)
+            response = http_client.fetch(self.session, url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                org_cards = soup.find_all('div', class_='Box-row')
-                
-                for card in org_cards[:20]:
-                    try:
-                        # Extract org name
-                        name_elem = card.find('a', class_='f3')
-                        if name_elem:
-                            name = name_elem.text.strip()
-                            github_url = 'https://github.com' + name_elem.get('href', '')
-                            
-                            # Get follower count
-                            followers_elem = card.find('span', string=re.compile('followers'))
-                            followers = followers_elem.text.strip() if followers_elem else '0'
-                            
-                            companies.append({
-                                'name': name,
-                                'github_url': github_url,
-                                'followers': followers,
-                                'source': 'GitHub',
-                                'type': 'Tech Organization',
-                                'website': github_url
-                            })
-                    except Exception as e:
-                        continue
+                for name, href, followers in parse_pool.parse(html_parsing.parse_github_orgs, response.content, limit=20):
+                    github_url = 'https://github.com' + href
+                    
+                    yield Company(
+                        name=name,
+                        github_url=github_url,
+                        followers=followers,
+                        source='GitHub',
+                        type='Tech Organization',
+                        website=github_url
+                    )
                         
-            time.sleep(2)
         except Exception as e:
             print(f"GitHub scraping error: {e}")
-        
-        return companies
     
     def _get_producthunt_companies(self):
         """Get trending companies from ProductHunt"""
-        companies = []
         try:
             url = "https://www.producthunt.com/topics/startup-tools"
-            response = self.session.get(url, timeout=10)
+            response = http_client.fetch(self.session, url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
                 # Product cards
-                product_cards = soup.find_all('div', {'data-test': 'post-item'}) or soup.find_all('a', href=re.compile('/posts/'))
-                
-                for card in product_cards[:15]:
-                    try:
-                        # Extract product/company name
-                        name_elem = card.find('h3') or card.find('strong')
-                        if name_elem:
-                            name = name_elem.text.strip()
-                            
-                            # Extract description
-                            desc_elem = card.find('p') or card.find('span')
-                            description = desc_elem.text.strip() if desc_elem else ''
-                            
-                            companies.append({
-                                'name': name,
-                                'description': description,
-                                'source': 'ProductHunt',
-                                'type': 'Startup Product',
-                                'trending': True
-                            })
-                    except Exception as e:
-                        continue
+                for name, description in parse_pool.parse(html_parsing.parse_producthunt, response.content, limit=15):
+                    yield Company(
+                        name=name,
+                        description=description,
+                        source='ProductHunt',
+                        type='Startup Product',
+                        trending=True
+                    )
                         
-            time.sleep(2)
         except Exception as e:
             print(f"ProductHunt scraping error: {e}")
-        
-        return companies
     
     def _get_builtwith_companies(self):
         """Get companies using specific technologies from BuiltWith"""
-        companies = []
         try:
             # Search for companies using modern tech stacks
             tech_searches = ['react', 'nodejs', 'python', 'typescript']
             
-            for tech in tech_searches:
+            for i, tech in enumerate(tech_searches):
+                if i:
+                    tracing.sleep(3)  # Be respectful to BuiltWith
                 url = f"https://builtwith.com/technology/{tech}"
-                response = self.session.get(url, timeout=10)
+                response = http_client.fetch(self.session, url, timeout=10)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Extract company links
-                    company_links = soup.find_all('a', href=re.compile(r'^https?://[^/]+/?$'))
-                    
-                    for link in company_links[:10]:  # Limit per tech
-                        try:
-                            website = link.get('href')
-                            name = link.text.strip()
-                            
-                            if website and name and len(name) > 2:
-                                companies.append({
-                                    'name': name,
-                                    'website': website,
-                                    'technology': tech,
-                                    'source': 'BuiltWith',
-                                    'type': 'Tech Company'
-                                })
-                        except Exception as e:
-                            continue
-                
-                time.sleep(3)  # Be respectful to BuiltWith
+                    # Extract company links, limited per tech
+                    for name, website in parse_pool.parse(html_parsing.parse_builtwith, response.content, limit=10):
+                        if website and name and len(name) > 2:
+                            yield Company(
+                                name=name,
+                                website=website,
+                                technology=tech,
+                                source='BuiltWith',
+                                type='Tech Company'
+                            )
                 
         except Exception as e:
             print(f"BuiltWith scraping error: {e}")
-        
-        return companies
 
 class AngelListCompanyFinder:
+    SEARCH_INPUT = (By.CSS_SELECTOR, "input[placeholder*='Search']")
+    STARTUP_CARD = (By.CSS_SELECTOR, ".startup-card")
+    
     def __init__(self):
         self.setup_driver()
     
     def setup_driver(self):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        
-        self.driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
+        self.driver = driver_helpers.chrome_driver()
     
     def search_startups(self, location="San Francisco"):
-        startups = []
-        
+        return list(self.iter_startups(location))
+    
+    def iter_startups(self, location="San Francisco"):
         try:
             self.driver.get("https://angel.co/companies")
-            time.sleep(3)
             
             # Search for companies
-            search_input = self.driver.find_element(By.CSS_SELECTOR, "input[placeholder*='Search']")
+            search_input = driver_helpers.wait_for(self.driver, self.SEARCH_INPUT, timeout=15, clickable=True)
+            if search_input is None:
+                print("AngelList search error: search box never appeared")
+                return
             search_input.send_keys("software startup")
             search_input.submit()
             
-            time.sleep(3)
-            
             # Extract company information
-            company_cards = self.driver.find_elements(By.CSS_SELECTOR, ".startup-card")
+            company_cards = driver_helpers.wait_for_all(self.driver, self.STARTUP_CARD, timeout=15)
             
             for card in company_cards[:20]:
                 try:
@@ -778,19 +835,17 @@ class AngelListCompanyFinder:
                     # Get company page URL
                     company_url = name_elem.get_attribute("href")
                     
-                    startups.append({
-                        'name': name,
-                        'angellist_url': company_url,
-                        'source': 'AngelList'
-                    })
+                    yield Company(
+                        name=name,
+                        angellist_url=company_url,
+                        source='AngelList'
+                    )
                     
                 except Exception as e:
                     continue
                     
         except Exception as e:
             print(f"AngelList search error: {e}")
-        
-        return startups
     
     def close(self):
         self.driver.quit()
@@ -798,49 +853,63 @@ class AngelListCompanyFinder:
 class CompanyOutreachManager:
     def __init__(self, config):
         self.config = config
-        self.maps_finder = GoogleMapsCompanyFinder()
+        # Google Maps is read over HTTP; Chrome is only its fallback, and only when browser sources are enabled
+        self.maps_finder = GoogleMapsCompanyFinder(browser_fallback=config.enable_browser_sources)
         self.email_extractor = EnhancedEmailExtractor(
-            hunter_api_key=config.get('hunter_api_key')  # Optional: set in config for free 100 searches/month
+            hunter_api_key=config.hunter_api_key,  # Optional: set in config for free 100 searches/month
+            site_maps=SiteMapCache(config.site_map_file, ttl_days=config.site_map_ttl_days) if config.site_map_file else None,
+            enough_emails=config.enough_emails
         )
-        self.business_finder = BusinessDirectoryFinder()
-        self.startup_finder = StartupFinder()
-        self.angellist_finder = AngelListCompanyFinder()
+        self.business_finder = BusinessDirectoryFinder(max_workers=config.directory_workers,
+                                                       max_pages=config.directory_pages)
+        self.startup_finder = StartupFinder(cache_path=config.startup_cache_file,
+                                            refresh_hours=config.startup_refresh_hours)
+        # AngelList needs Chrome; it is skipped entirely when browser sources are disabled
+        self.angellist_finder = AngelListCompanyFinder() if config.enable_browser_sources else None
     
-    def find_all_companies(self, keywords="software development", location="United States") -> List[Dict]:
+    def find_all_companies(self, keywords="software development", location="United States") -> List[Company]:
         """Find companies from all sources - NO MORE STATIC DATA!"""
         all_companies = []
         
-        print("🗺️ Searching Google Maps for software companies...")
-        try:
-            maps_companies = self.maps_finder.search_software_companies(location=location)
-            all_companies.extend(maps_companies)
-            print(f"✅ Found {len(maps_companies)} companies from Google Maps")
-        except Exception as e:
-            print(f"❌ Google Maps error: {e}")
+        if self.maps_finder:
+            print("🗺️ Searching Google Maps for software companies...")
+            with tracing.span('source Google Maps'):
+                try:
+                    maps_companies = self.maps_finder.search_software_companies(location=location)
+                    all_companies.extend(maps_companies)
+                    print(f"✅ Found {len(maps_companies)} companies from Google Maps")
+                except Exception as e:
+                    print(f"❌ Google Maps error: {e}")
         
         print("🏢 Searching business directories (Yelp, YellowPages, BBB, Clutch)...")
-        try:
-            directory_companies = self.business_finder.search_companies(keywords=keywords, location=location)
-            all_companies.extend(directory_companies)
-            print(f"✅ Found {len(directory_companies)} companies from business directories")
-        except Exception as e:
-            print(f"❌ Business directory error: {e}")
+        with tracing.span('source Business Directories'):
+            try:
+                directory_companies = self.business_finder.search_companies(
+                    keywords=self.config.directory_keywords or keywords,
+                    location=self.config.directory_locations or location)
+                all_companies.extend(directory_companies)
+                print(f"✅ Found {len(directory_companies)} companies from business directories")
+            except Exception as e:
+                print(f"❌ Business directory error: {e}")
         
         print("🚀 Getting real startups from Y Combinator, GitHub, ProductHunt...")
-        try:
-            startup_companies = self.startup_finder.get_funded_startups()
-            all_companies.extend(startup_companies)
-            print(f"✅ Found {len(startup_companies)} startups from multiple sources")
-        except Exception as e:
-            print(f"❌ Startup finder error: {e}")
+        with tracing.span('source Startups'):
+            try:
+                startup_companies = self.startup_finder.get_funded_startups()
+                all_companies.extend(startup_companies)
+                print(f"✅ Found {len(startup_companies)} startups from multiple sources")
+            except Exception as e:
+                print(f"❌ Startup finder error: {e}")
         
-        print("👼 Searching AngelList for startups...")
-        try:
-            angellist_companies = self.angellist_finder.search_startups(location=location)
-            all_companies.extend(angellist_companies)
-            print(f"✅ Found {len(angellist_companies)} companies from AngelList")
-        except Exception as e:
-            print(f"❌ AngelList error: {e}")
+        if self.angellist_finder:
+            print("👼 Searching AngelList for startups...")
+            with tracing.span('source AngelList'):
+                try:
+                    angellist_companies = self.angellist_finder.search_startups(location=location)
+                    all_companies.extend(angellist_companies)
+                    print(f"✅ Found {len(angellist_companies)} companies from AngelList")
+                except Exception as e:
+                    print(f"❌ AngelList error: {e}")
         
         # Remove duplicates
         unique_companies = self._remove_duplicates(all_companies)
@@ -848,65 +917,83 @@ class CompanyOutreachManager:
         
         return unique_companies
     
+    def sources(self, keywords="software development", location="United States"):
+        """Map each discovery source to a generator factory for the streaming pipeline"""
+        sources = {}
+        if self.maps_finder:
+            sources['Google Maps'] = lambda: self.maps_finder.iter_software_companies(location=location)
+        sources['Business Directories'] = lambda: self.business_finder.iter_companies(
+            keywords=self.config.directory_keywords or keywords,
+            location=self.config.directory_locations or location)
+        sources['Startups'] = self.startup_finder.iter_funded_startups
+        if self.angellist_finder:
+            sources['AngelList'] = lambda: self.angellist_finder.iter_startups(location=location)
+        return sources
+    
+    company_key = staticmethod(company_key)
+    
     def _remove_duplicates(self, companies):
-        """Remove duplicate companies based on name and website"""
+        """Remove duplicate companies based on website domain, or name when there is none"""
         seen = set()
         unique_companies = []
         
         for company in companies:
-            # Create identifier based on name and website
-            name = company.get('name', '').lower().strip()
-            website = company.get('website', '').lower().strip()
-            
-            identifier = f"{name}|{website}"
+            identifier = self.company_key(company)
             
-            if identifier not in seen and name:
+            if identifier and identifier not in seen:
                 seen.add(identifier)
                 unique_companies.append(company)
         
         return unique_companies
     
-    def extract_real_emails(self, companies: List[Dict]) -> List[Dict]:
+    def extract_real_emails(self, companies: List[Company]) -> List[Company]:
         """Extract real emails using enhanced methods + API"""
         enriched_companies = []
         
         for i, company in enumerate(companies):
-            try:
-                print(f"📧 Extracting emails for {company['name']} ({i+1}/{len(companies)})")
-                
-                website = company.get('website')
-                company_name = company.get('name')
+            enriched_companies.append(self.enrich_company(company, f"{i+1}/{len(companies)}"))
+        
+        return enriched_companies
+    
+    @tracing.traced('enrich')
+    def enrich_company(self, company: Company, progress: str = None) -> Company:
+        """Attach real_emails/email_count to a single company, then pause before the next crawl"""
+        tracing.current().set('company', company.get('name'))
+        try:
+            print(f"📧 Extracting emails for {company['name']}" + (f" ({progress})" if progress else ""))
+            
+            website = company.get('website')
+            company_name = company.get('name')
+            
+            if website:
+                # Use enhanced email extraction with API + scraping + guessing
+                emails = self.email_extractor.extract_emails_from_website(
+                    website, 
+                    company_name=company_name
+                )
                 
-                if website:
-                    # Use enhanced email extraction with API + scraping + guessing
-                    emails = self.email_extractor.extract_emails_from_website(
-                        website, 
-                        company_name=company_name
-                    )
-                    
-                    if emails:
-                        company['real_emails'] = emails
-                        company['email_count'] = len(emails)
-                        print(f"   ✅ Found {len(emails)} emails: {', '.join(emails[:3])}{'...' if len(emails) > 3 else ''}")
-                    else:
-                        print(f"   ⚠️ No emails found")
-                        company['real_emails'] = []
-                        company['email_count'] = 0
+                if emails:
+                    company['real_emails'] = emails
+                    company['email_count'] = len(emails)
+                    print(f"   ✅ Found {len(emails)} emails: {', '.join(emails[:3])}{'...' if len(emails) > 3 else ''}")
                 else:
-                    print(f"   ⚠️ No website available")
+                    print(f"   ⚠️ No emails found")
                     company['real_emails'] = []
                     company['email_count'] = 0
-                
-                enriched_companies.append(company)
-                time.sleep(2)  # Be respectful to websites
-                
-            except Exception as e:
-                print(f"   ❌ Error processing {company['name']}: {e}")
+            else:
+                print(f"   ⚠️ No website available")
                 company['real_emails'] = []
                 company['email_count'] = 0
-                enriched_companies.append(company)
-        
-        return enriched_companies
+            
+        except Exception as e:
+            print(f"   ❌ Error processing {company['name']}: {e}")
+            company['real_emails'] = []
+            company['email_count'] = 0
+        
+        # Here rather than in the callers, so the pipeline, the batch loop and the queue workers crawl at the same rate
+        if company.get('website'):
+            tracing.sleep(2)  # Be respectful to websites
+        return company
     
     def close_drivers(self):
         """Clean up browser drivers"""
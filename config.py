@@ -29,6 +29,38 @@ class BotConfig:
     daily_email_limit: int = 25
     keywords: List[str] = None
     hunter_api_key: Optional[str] = None  # Free: 100 searches/month at hunter.io
+    pipeline_buffer_size: int = 50  # Max items buffered between streaming pipeline stages
+    enable_browser_sources: bool = True  # AngelList discovery and the Google Maps fallback via Selenium + Chrome
+    near_duplicate_distance: int = 3  # Max differing SimHash bits for two posts to count as the same job
+    near_duplicate_history: int = 200000  # Most recent leads kept in the near-duplicate index
+    company_recheck_days: int = 30  # Re-crawl companies that had no emails after this many days
+    wal_fsync: bool = True  # fsync every logged change (durable per mutation)
+    wal_compact_bytes: int = 16 * 1024 * 1024  # Write a snapshot and truncate the log past this size
+    directory_keywords: List[str] = None  # Business directory searches; None searches the caller's keywords
+    directory_locations: List[str] = None  # Locations searched for each directory keyword; None uses the caller's
+    directory_pages: int = 3  # Result pages followed per directory search
+    directory_workers: int = 8  # Concurrent directory requests (at most 2 per directory)
+    startup_cache_file: Optional[str] = 'startup_cache.json'  # Per-source startup listings already seen; None disables
+    startup_refresh_hours: float = 12  # Re-scrape a startup source once its last fetch is older than this
+    enrichment_queue: bool = False  # Hand discovered companies to enrichment worker processes via a durable queue
+    enrichment_queue_file: str = 'enrichment_queue.db'  # Shared by the bot and every worker (same volume)
+    enrichment_lease_seconds: float = 600  # A claimed company goes back to the queue if not finished by then
+    enrichment_workers: int = 2  # Worker processes the bot starts itself in queue mode; 0 = external workers only
+    parse_workers: Optional[int] = None  # HTML parsing processes; None = one per core beyond the first, 0 = inline
+    parse_chunksize: int = 4  # Pages sent to a parse process at a time by parse_many
+    site_map_file: Optional[str] = 'site_maps.db'  # robots.txt/sitemap pages and 404s per company site; None = probe every path
+    site_map_ttl_days: float = 30  # Re-read a site's robots.txt and sitemap after this long
+    enough_emails: int = 3  # Stop crawling a company site once this many emails are found; 0 = crawl every page
+    check_email_domains: bool = True  # Drop recipients whose domain has no MX/A record before sending
+    dns_nameservers: List[str] = None  # "host" or "host:port"; None uses /etc/resolv.conf
+    dns_timeout: float = 2.0  # Seconds to wait for one DNS answer before retrying the next nameserver
+    lead_half_life_days: float = 7  # A lead's outreach score halves every this many days since it was posted
+    email_templates_dir: Optional[str] = None  # templates/<kind>/<source>.txt files; None = templates/ beside the code
+    host_failure_threshold: int = 3  # Failed requests in a row before a host's circuit opens and it is skipped
+    host_open_seconds: float = 300  # How long an open circuit skips a host; doubles each time it reopens (max 1h)
+    host_max_backoff_seconds: float = 900  # Cap on the exponential backoff between failed requests to one host
+    trace_file: Optional[str] = None  # Append OTLP/JSON spans (jobs, sources, enrichment steps, requests) here; None = off
+    github_state_file: Optional[str] = 'github_search_state.json'  # Newest issue seen per GitHub query (for created:>) and REST ETags; None = kept in memory only
     
     def __post_init__(self):
         if self.keywords is None:
@@ -45,7 +77,12 @@ CONFIG = BotConfig(
     github_token=os.getenv('GITHUB_TOKEN'),
     google_sheets_creds=os.getenv('GOOGLE_SHEETS_CREDS_PATH', './google-sheets-credentials.json'),
     sheet_name='HireBot Leads',
-    hunter_api_key=os.getenv('HUNTER_API_KEY')  # Optional free API key
+    hunter_api_key=os.getenv('HUNTER_API_KEY'),  # Optional free API key
+    enable_browser_sources=os.getenv('ENABLE_BROWSER_SOURCES', 'true').lower() != 'false',
+    enrichment_queue=os.getenv('ENRICHMENT_QUEUE', 'false').lower() == 'true',
+    enrichment_workers=int(os.getenv('ENRICHMENT_WORKERS', '2')),
+    dns_nameservers=os.getenv('DNS_NAMESERVERS').split(',') if os.getenv('DNS_NAMESERVERS') else None,
+    trace_file=os.getenv('TRACE_FILE')
 )
 
 EMAIL_CONFIG = EmailConfig(
@@ -1,16 +1,51 @@
 import json
 import csv
-from datetime import datetime
-from typing import List, Dict, Set
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 
+from records import Lead, Company, as_lead, as_company
+from dedup import CompanyIndex, SimHashIndex, UrlIndex
+from wal import WriteAheadLog
+from snapshot import LazyRecords, RecordStore, load_stores, write_snapshot
+from lead_scoring import LeadQueue, LeadScorer
+
+SNAPSHOT_FILE = 'job_data.snap'
+LEGACY_SNAPSHOT_FILE = 'job_data.json'
+WAL_FILE = 'job_data.wal'
+FINGERPRINTS_FILE = 'lead_fingerprints.bin'
+
+def _lead_hook(obj: Dict):
+    # Build leads while parsing, so the intermediate dicts are freed one at a time
+    if 'platform' in obj and 'url' in obj:
+        return Lead.from_dict(obj)
+    return obj
+
 class LeadManager:
     def __init__(self, config):
         self.config = config
-        self.leads: List[Dict] = []
-        self.seen_urls: Set[str] = set()
-        self.companies: List[Dict] = []
+        # Leads and companies are read lazily from the mapped snapshot; see snapshot.py
+        self.snapshot = None
+        self.leads = RecordStore('leads')
+        # Every lead URL ever seen, normalized; Bloom filter in memory, exact index on disk
+        self.seen_urls = UrlIndex('seen_urls.db', 'seen_urls.bloom')
+        self.companies = RecordStore('companies')
+        # Companies from every previous run, so rediscovered ones are not enriched or saved again
+        self.company_index = CompanyIndex('companies.db')
+        # Every change since the last snapshot, replayed by load_data after a crash or restart
+        self.wal = WriteAheadLog(WAL_FILE, fsync=config.wal_fsync)
+        self.near_duplicates = SimHashIndex(
+            max_distance=config.near_duplicate_distance,
+            max_entries=config.near_duplicate_history
+        )
+        # New leads by outreach score; built on first use, then kept current as leads are added
+        self.scorer = LeadScorer(config.keywords, half_life_days=config.lead_half_life_days)
+        self.outreach_queue: Optional[LeadQueue] = None
+        # The pipeline's persist thread, the Discord handler and the scheduler all write here, and a
+        # snapshot swaps self.leads/self.companies out; reentrant so saves can run inside an add
+        self._lock = threading.RLock()
         self.sheet = None
         self.setup_sheets()
 
@@ -33,61 +68,110 @@ class LeadManager:
     def is_duplicate(self, url: str) -> bool:
         return url in self.seen_urls
 
-    def add_lead(self, lead_data: Dict) -> bool:
-        if self.is_duplicate(lead_data['url']):
+    def add_lead(self, lead_data: Lead) -> bool:
+        lead = as_lead(lead_data)
+        if self.is_duplicate(lead.url):
             return False
+        fingerprint = self.near_duplicates.fingerprint(lead.get('title', ''), lead.get('content', ''))
+        with self._lock:
+            # Checked again: another thread may have added it while the fingerprint was computed
+            if self.is_duplicate(lead.url):
+                return False
+            
+            # Same post seen under another URL (cross-posted to another sub/issue/server)
+            if fingerprint is not None:
+                original_id = self.near_duplicates.find(fingerprint)
+                if original_id is not None:
+                    print(f"♻️ Skipping near-duplicate of lead #{original_id}: {lead.url}")
+                    self.seen_urls.add(lead.url)
+                    return False
+            
+            lead.timestamp = datetime.now().isoformat()
+            lead.status = 'new'
+            lead.id = len(self.leads) + 1
+            
+            self.wal.append('add_lead', lead.to_dict())
+            self._apply_lead(lead, fingerprint)
+            
+            self.save_to_csv(lead)
+            self._maybe_compact()
         
-        lead_data['timestamp'] = datetime.now().isoformat()
-        lead_data['status'] = 'new'
-        lead_data['id'] = len(self.leads) + 1
-        
-        self.leads.append(lead_data)
-        self.seen_urls.add(lead_data['url'])
-        
-        self.save_to_csv(lead_data)
-        self.save_to_sheets(lead_data)
-        
+        # A network round trip; other writers need not wait for it
+        self.save_to_sheets(lead)
         return True
 
-    def add_company(self, company_data: Dict) -> bool:
-        company_data['discovered_at'] = datetime.now().isoformat()
-        company_data['status'] = 'new'
-        company_data['id'] = len(self.companies) + 1
-        
-        self.companies.append(company_data)
-        self.save_company_to_csv(company_data)
+    def _apply_lead(self, lead: Lead, fingerprint=None):
+        self.leads.append(lead)
+        self.seen_urls.add(lead.url)
+        if fingerprint is not None:
+            self.near_duplicates.add(lead.id, fingerprint)
+        if self.outreach_queue is not None and lead.get('status') == 'new':
+            priority = self.scorer.priority(lead)
+            if priority is not None:
+                self.outreach_queue.push(lead.id, priority)
+
+    def is_known_company(self, company: Company) -> bool:
+        """True if the company was saved before, or checked recently and had no emails"""
+        entry = self.company_index.find(company)
+        if entry is None:
+            return False
+        if entry['company_id'] is not None:
+            return True
+        recheck_after = datetime.now() - timedelta(days=self.config.company_recheck_days)
+        return bool(entry['checked_at']) and entry['checked_at'] > recheck_after.isoformat()
+
+    def record_checked_company(self, company: Company):
+        """Remember a company that was enriched but not saved (no emails found)"""
+        self.company_index.add(company, checked_at=datetime.now().isoformat())
+
+    def add_company(self, company_data: Company) -> bool:
+        company = as_company(company_data)
+        with self._lock:
+            entry = self.company_index.find(company)
+            if entry is not None and entry['company_id'] is not None:
+                return False
+            
+            company.discovered_at = datetime.now().isoformat()
+            company.status = 'new'
+            company.id = len(self.companies) + 1
+            
+            self.wal.append('add_company', company.to_dict())
+            self._apply_company(company)
+            self.save_company_to_csv(company)
+            self._maybe_compact()
         
         return True
 
-    def save_to_csv(self, lead: Dict):
+    def _apply_company(self, company: Company):
+        self.companies.append(company)
+        self.company_index.add(company, company_id=company.id, checked_at=company.discovered_at)
+
+    def save_to_csv(self, lead: Lead):
         filename = f"leads_{datetime.now().strftime('%Y-%m')}.csv"
         
         try:
             with open(filename, 'a', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
                 if file.tell() == 0:
-                    writer = csv.DictWriter(file, fieldnames=lead.keys())
-                    writer.writeheader()
-                else:
-                    writer = csv.DictWriter(file, fieldnames=lead.keys())
-                writer.writerow(lead)
+                    writer.writerow(Lead.CSV_FIELDS)
+                writer.writerow(lead.csv_row())
         except Exception as e:
             print(f"CSV save error: {e}")
 
-    def save_company_to_csv(self, company: Dict):
+    def save_company_to_csv(self, company: Company):
         filename = f"companies_{datetime.now().strftime('%Y-%m')}.csv"
+        row = company.to_dict()
         
         try:
             with open(filename, 'a', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=row.keys())
                 if file.tell() == 0:
-                    writer = csv.DictWriter(file, fieldnames=company.keys())
                     writer.writeheader()
-                else:
-                    writer = csv.DictWriter(file, fieldnames=company.keys())
-                writer.writerow(company)
+                writer.writerow(row)
         except Exception as e:
             print(f"Company CSV save error: {e}")
 
-    def save_to_sheets(self, lead: Dict):
+    def save_to_sheets(self, lead: Lead):
         if not self.sheet:
             return
             
@@ -106,42 +190,84 @@ class LeadManager:
         except Exception as e:
             print(f"Sheets save error: {e}")
 
-    def get_new_leads(self) -> List[Dict]:
-        return [lead for lead in self.leads if lead['status'] == 'new']
+    def get_new_leads(self) -> Sequence[Lead]:
+        # Selected on the status column; a lead is only decoded when it is used
+        return self.leads.select('status', 'new')
 
-    def get_companies_for_outreach(self) -> List[Dict]:
-        return [company for company in self.companies 
-                if company['status'] == 'new' and 'real_emails' in company and company['real_emails']]
+    def get_top_leads(self, count: int) -> List[Lead]:
+        """The count best-scoring new leads that can be contacted, best first"""
+        with self._lock:
+            if self.outreach_queue is None:
+                self.build_outreach_queue()
+            return [self.leads.find(lead_id) for lead_id in self.outreach_queue.top(count, self._is_pending_lead)]
+
+    def _is_pending_lead(self, lead_id: int) -> bool:
+        lead = self.leads.find(lead_id)
+        return lead is not None and lead.get('status') == 'new'
+
+    def build_outreach_queue(self):
+        """Score every new lead once; contacted leads are dropped from the heap as they surface"""
+        with self._lock:
+            entries = []
+            for position in self.leads.positions('status', 'new'):
+                lead = self.leads.peek(position)
+                priority = self.scorer.priority(lead)
+                if priority is not None:
+                    entries.append((priority, lead.id))
+            self.outreach_queue = LeadQueue()
+            self.outreach_queue.build(entries)
+
+    def get_companies_for_outreach(self) -> Sequence[Company]:
+        email_counts = self.companies.int_column('email_count')
+        return LazyRecords(self.companies, [position for position in self.companies.positions('status', 'new')
+                                            if email_counts[position] > 0])
 
     def mark_lead_contacted(self, lead_id: int, email: str):
-        for lead in self.leads:
-            if lead['id'] == lead_id:
-                lead['status'] = 'contacted'
-                lead['contacted_email'] = email
-                lead['contacted_at'] = datetime.now().isoformat()
-                break
+        self.update_lead(lead_id, status='contacted', contacted_email=email, contacted_at=datetime.now().isoformat())
 
     def mark_company_contacted(self, company_id: int, email: str):
-        for company in self.companies:
-            if company['id'] == company_id:
-                company['status'] = 'contacted'
-                company['contacted_email'] = email
-                company['contacted_at'] = datetime.now().isoformat()
-                break
+        self.update_company(company_id, status='contacted', contacted_email=email, contacted_at=datetime.now().isoformat())
+
+    def update_lead(self, lead_id: int, **changes) -> bool:
+        """Change fields of a stored lead (status etc.), logging the change first"""
+        with self._lock:
+            lead = self.leads.find(lead_id)
+            if lead is None:
+                return False
+            self.wal.append('update_lead', {'id': lead_id, **changes})
+            for field, value in changes.items():
+                lead[field] = value
+            self._maybe_compact()
+        return True
+
+    def update_company(self, company_id: int, **changes) -> bool:
+        """Change fields of a stored company (status etc.), logging the change first"""
+        with self._lock:
+            company = self.companies.find(company_id)
+            if company is None:
+                return False
+            self.wal.append('update_company', {'id': company_id, **changes})
+            for field, value in changes.items():
+                company[field] = value
+            self._maybe_compact()
+        return True
 
     def get_statistics(self) -> Dict:
+        # Counted on the snapshot columns, without decoding any record
         total_leads = len(self.leads)
-        new_leads = len([l for l in self.leads if l['status'] == 'new'])
-        contacted_leads = len([l for l in self.leads if l['status'] == 'contacted'])
+        lead_statuses = self.leads.counts('status')
+        new_leads = lead_statuses.get('new', 0)
+        contacted_leads = lead_statuses.get('contacted', 0)
         
         total_companies = len(self.companies)
-        new_companies = len([c for c in self.companies if c['status'] == 'new'])
-        contacted_companies = len([c for c in self.companies if c['status'] == 'contacted'])
+        company_statuses = self.companies.counts('status')
+        new_companies = company_statuses.get('new', 0)
+        contacted_companies = company_statuses.get('contacted', 0)
         
         platform_breakdown = {}
-        for lead in self.leads:
-            platform = lead.get('platform', 'Unknown')
-            platform_breakdown[platform] = platform_breakdown.get(platform, 0) + 1
+        for platform, count in self.leads.counts('platform').items():
+            platform = platform or 'Unknown'
+            platform_breakdown[platform] = platform_breakdown.get(platform, 0) + count
         
         return {
             'leads': {
@@ -159,23 +285,107 @@ class LeadManager:
         }
 
     def save_data(self):
-        data = {
-            'leads': self.leads,
-            'companies': self.companies,
-            'seen_urls': list(self.seen_urls),
-            'saved_at': datetime.now().isoformat()
-        }
-        
-        with open('job_data.json', 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        """Write a full snapshot and drop the log entries it now contains"""
+        with self._lock:
+            wal_seq = self.wal.seq
+            # Written aside and swapped in, so a crash mid-write never leaves a truncated snapshot
+            write_snapshot(SNAPSHOT_FILE, {'leads': self.leads, 'companies': self.companies},
+                           meta={'wal_seq': wal_seq, 'saved_at': datetime.now().isoformat()})
+            # Continue from the new file, so records decoded or added so far can be freed
+            previous = self.snapshot
+            self.snapshot, stores = load_stores(SNAPSHOT_FILE)
+            self.leads, self.companies = stores['leads'], stores['companies']
+            # Nothing reads the old stores any more; release their map and file handle
+            if previous is not None:
+                previous.close()
+            self.near_duplicates.save(FINGERPRINTS_FILE)
+            self.seen_urls.save()
+            self.wal.compact(wal_seq)
+
+    def _maybe_compact(self):
+        with self._lock:
+            if self.wal.size > self.config.wal_compact_bytes:
+                print(f"🗜️ Change log over {self.config.wal_compact_bytes // (1024 * 1024)} MB, writing snapshot")
+                self.save_data()
 
     def load_data(self):
+        snapshot_seq = 0
+        previous = self.snapshot
+        self.snapshot, stores = load_stores(SNAPSHOT_FILE)
+        if previous is not None:
+            previous.close()
+        self.leads, self.companies = stores['leads'], stores['companies']
+        if self.snapshot:
+            snapshot_seq = self.snapshot.meta.get('wal_seq', 0)
+            print(f"Loaded {len(self.leads)} leads and {len(self.companies)} companies")
+        else:
+            snapshot_seq = self.load_legacy_data()
+        
+        if not self.near_duplicates.load(FINGERPRINTS_FILE):
+            self.rebuild_fingerprints()
+        
+        replayed = self.replay_log(snapshot_seq)
+        if replayed:
+            print(f"Replayed {replayed} changes from {WAL_FILE}")
+        
+        if len(self.companies) and not len(self.company_index):
+            self.company_index.add_many((company, company.get('id'), company.get('discovered_at'))
+                                        for company in self.companies.scan())
+            print(f"Indexed {len(self.company_index)} known companies")
+
+    def replay_log(self, after_seq: int = 0) -> int:
+        """Apply logged changes made after the snapshot was written"""
+        with self._lock:
+            return self._replay_log(after_seq)
+
+    def _replay_log(self, after_seq: int) -> int:
+        replayed = 0
+        for entry in self.wal.replay(after_seq):
+            op, data = entry['op'], entry['data']
+            # Ids are sequential, so an add is already applied when its id is taken
+            if op == 'add_lead':
+                lead = Lead.from_dict(data)
+                if lead.id > len(self.leads):
+                    fingerprint = self.near_duplicates.fingerprint(lead.get('title', ''), lead.get('content', ''))
+                    self._apply_lead(lead, fingerprint)
+            elif op == 'add_company':
+                company = Company.from_dict(data)
+                if company.id > len(self.companies):
+                    self._apply_company(company)
+            elif op in ('update_lead', 'update_company'):
+                records = self.leads if op == 'update_lead' else self.companies
+                record = records.find(data.pop('id'))
+                if record is not None:
+                    for field, value in data.items():
+                        record[field] = value
+            else:
+                print(f"⚠ Unknown change log entry: {op}")
+                continue
+            replayed += 1
+        return replayed
+
+    def load_legacy_data(self) -> int:
+        """Load a job_data.json snapshot from before the binary format; returns its log position"""
         try:
-            with open('job_data.json', 'r') as f:
-                data = json.load(f)
-                self.leads = data.get('leads', [])
-                self.companies = data.get('companies', [])
-                self.seen_urls = set(data.get('seen_urls', []))
-                print(f"Loaded {len(self.leads)} leads and {len(self.companies)} companies")
+            with open(LEGACY_SNAPSHOT_FILE, 'r') as f:
+                data = json.load(f, object_hook=_lead_hook)
         except FileNotFoundError:
             print("No previous data found, starting fresh")
+            return 0
+        
+        self.leads.extend(data.get('leads', []))
+        self.companies.extend(Company.from_dict(company) for company in data.get('companies', []))
+        # Older snapshots carried the full URL list; fold it into the index once
+        self.seen_urls.update(data.get('seen_urls') or [lead.url for lead in self.leads])
+        print(f"Loaded {len(self.leads)} leads and {len(self.companies)} companies from {LEGACY_SNAPSHOT_FILE}, "
+              f"next save writes {SNAPSHOT_FILE}")
+        return data.get('wal_seq', 0)
+
+    def rebuild_fingerprints(self):
+        """Fingerprint the most recent leads, for data saved before the index existed"""
+        for lead in self.leads.scan(len(self.leads) - self.near_duplicates.max_entries):
+            fingerprint = self.near_duplicates.fingerprint(lead.get('title', ''), lead.get('content', ''))
+            if fingerprint is not None:
+                self.near_duplicates.add(lead.id, fingerprint)
+        if len(self.near_duplicates):
+            print(f"Indexed {len(self.near_duplicates)} lead fingerprints")
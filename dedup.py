@@ -0,0 +1,488 @@
+"""
+Deduplication indexes for leads
+
+UrlIndex remembers every lead URL ever seen. URLs are canonicalized first
+(normalize_url), checked against an in-memory scalable Bloom filter, and only
+confirmed against the exact on-disk SQLite index when the filter says "maybe",
+so membership tests for new URLs never touch the disk and memory stays at a
+few bits per URL.
+
+SimHashIndex finds near-duplicate posts (the same job cross-posted to several
+subreddits, a GitHub issue and a Discord server) by content fingerprint
+instead of URL. Each post is reduced to a 64-bit SimHash over word shingles
+of its normalized title and content; two posts are near-duplicates when their
+fingerprints differ in at most `max_distance` bits.
+
+Lookups are sub-linear: the fingerprint is split into max_distance + 1 bands,
+and by the pigeonhole principle any fingerprint within max_distance bits
+shares at least one band exactly, so only the entries in those band buckets
+are compared. The index keeps the most recent `max_entries` fingerprints and
+evicts the oldest, so memory stays bounded however long the history grows.
+
+CompanyIndex remembers every company discovered or checked across runs,
+keyed by registrable domain with a fuzzy name fallback, so companies found
+again on the next discovery run skip enrichment.
+"""
+
+import difflib
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+FINGERPRINT_BITS = 64
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_WORD_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase word tokens with links removed"""
+    return _WORD_RE.findall(_URL_RE.sub(' ', (text or '').lower()))
+
+
+def shingles(tokens: List[str], size: int = 3) -> Set[str]:
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _feature_hash(feature: str) -> int:
+    # Stable across processes, unlike hash(), so fingerprints can be persisted
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(features: Set[str]) -> int:
+    bits = [format(_feature_hash(feature), '064b') for feature in features]
+    half = len(bits) / 2
+    fingerprint = 0
+    # zip(*bits) walks the bit columns in C; each column votes on one output bit
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count('1') > half)
+    return fingerprint
+
+
+class SimHashIndex:
+    def __init__(self, max_distance: int = 3, max_entries: int = 200000, min_features: int = 8):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.min_features = min_features
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self.band_mask = (1 << self.band_bits) - 1
+        # lead id -> fingerprint, oldest first
+        self.entries: "OrderedDict[int, int]" = OrderedDict()
+        # (band number, band value) -> lead ids
+        self.buckets: Dict[tuple, Set[int]] = {}
+
+    def fingerprint(self, title: str, content: str) -> Optional[int]:
+        """SimHash of a post, or None when it is too short to compare reliably"""
+        features = shingles(normalize_text(f"{title} {content}"))
+        if len(features) < self.min_features:
+            return None
+        return simhash(features)
+
+    def _band_keys(self, fingerprint: int):
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & self.band_mask
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Id of an indexed post within max_distance bits, if there is one"""
+        for key in self._band_keys(fingerprint):
+            for lead_id in self.buckets.get(key, ()):
+                if (self.entries[lead_id] ^ fingerprint).bit_count() <= self.max_distance:
+                    return lead_id
+        return None
+
+    def add(self, lead_id: int, fingerprint: int):
+        if lead_id in self.entries:
+            self.remove(lead_id)
+        self.entries[lead_id] = fingerprint
+        for key in self._band_keys(fingerprint):
+            self.buckets.setdefault(key, set()).add(lead_id)
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, lead_id: int):
+        fingerprint = self.entries.pop(lead_id, None)
+        if fingerprint is None:
+            return
+        for key in self._band_keys(fingerprint):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(lead_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self, path: str):
+        """Write ids and fingerprints as two packed 64-bit arrays"""
+        ids = array('q', self.entries.keys())
+        fingerprints = array('Q', self.entries.values())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            array('q', [len(ids)]).tofile(f)
+            ids.tofile(f)
+            fingerprints.tofile(f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                count = array('q')
+                count.fromfile(f, 1)
+                ids = array('q')
+                ids.fromfile(f, count[0])
+                fingerprints = array('Q')
+                fingerprints.fromfile(f, count[0])
+        except (FileNotFoundError, EOFError):
+            return False
+        self.entries.clear()
+        self.buckets.clear()
+        for lead_id, fingerprint in zip(ids, fingerprints):
+            self.add(lead_id, fingerprint)
+        return True
+
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'ref_url',
+                   'referrer', 'share_id', 'si', 'igshid', 'context', 'utm_id'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for deduplication
+
+    Lowercases scheme and host, treats http as https, drops "www.", default
+    ports, fragments, tracking parameters and trailing slashes, and sorts the
+    remaining query parameters. Strings that are not http(s) URLs are only
+    stripped.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ))
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def _bloom_hashes(item: str):
+    digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, hashes):
+        h1, h2 = hashes
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, hashes):
+        for position in self._positions(hashes):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, hashes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(hashes))
+
+
+class ScalableBloomFilter:
+    """Bloom filter that adds a larger, stricter layer whenever the last one fills up
+
+    Layer i is growth ** i times larger than the first and gets a share of the
+    error budget that shrinks by `tightening` per layer, so the combined false
+    positive rate stays below error_rate however many items are added, without
+    knowing the final size up front.
+    """
+
+    _HEADER = struct.Struct('<QdQQ')
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.001,
+                 growth: int = 2, tightening: float = 0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = []
+
+    def _new_layer(self) -> BloomFilter:
+        index = len(self.filters)
+        layer = BloomFilter(self.initial_capacity * self.growth ** index,
+                            self.error_rate * (1 - self.tightening) * self.tightening ** index)
+        self.filters.append(layer)
+        return layer
+
+    def add(self, item: str):
+        layer = self.filters[-1] if self.filters else self._new_layer()
+        if layer.count >= layer.capacity:
+            layer = self._new_layer()
+        layer.add(_bloom_hashes(item))
+
+    def __contains__(self, item: str) -> bool:
+        hashes = _bloom_hashes(item)
+        return any(hashes in layer for layer in self.filters)
+
+    def __len__(self):
+        return sum(layer.count for layer in self.filters)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(layer.bits) for layer in self.filters)
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<I', len(self.filters)))
+            for layer in self.filters:
+                f.write(self._HEADER.pack(layer.capacity, layer.error_rate, layer.count, len(layer.bits)))
+                f.write(layer.bits)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                (layers,) = struct.unpack('<I', f.read(4))
+                filters = []
+                for _ in range(layers):
+                    capacity, error_rate, count, size = self._HEADER.unpack(f.read(self._HEADER.size))
+                    layer = BloomFilter(capacity, error_rate)
+                    layer.bits = bytearray(f.read(size))
+                    if len(layer.bits) != size:
+                        return False
+                    layer.count = count
+                    filters.append(layer)
+        except (FileNotFoundError, struct.error):
+            return False
+        self.filters = filters
+        return True
+
+
+class UrlIndex:
+    """Set of seen URLs: Bloom filter in memory, exact index in SQLite
+
+    Supports `url in index`, add() and update(); URLs are normalized on the
+    way in, so variants of one URL count as the same.
+    """
+
+    def __init__(self, db_path: str = 'seen_urls.db', bloom_path: str = 'seen_urls.bloom',
+                 initial_capacity: int = 100000, error_rate: float = 0.001):
+        self.db_path = db_path
+        self.bloom_path = bloom_path
+        self.bloom = ScalableBloomFilter(initial_capacity, error_rate)
+        self._bloom_settings = (initial_capacity, error_rate)
+        self._lock = threading.Lock()
+        # Written from the pipeline's persist thread as well as the main thread
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.db.commit()
+        self.count = self.db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        self.confirmations = 0
+        self._load_bloom()
+
+    def _load_bloom(self):
+        # A filter saved before a crash may miss the last URLs; rebuild rather than under-report
+        if self.bloom.load(self.bloom_path) and len(self.bloom) == self.count:
+            return
+        self.bloom = ScalableBloomFilter(*self._bloom_settings)
+        for (url,) in self.db.execute('SELECT url FROM urls'):
+            self.bloom.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        key = normalize_url(url)
+        if key not in self.bloom:
+            return False
+        with self._lock:
+            self.confirmations += 1
+            return self.db.execute('SELECT 1 FROM urls WHERE url = ?', (key,)).fetchone() is not None
+
+    def add(self, url: str) -> bool:
+        """Record a URL; False if it (or a variant of it) was already known"""
+        key = normalize_url(url)
+        with self._lock:
+            inserted = self.db.execute('INSERT OR IGNORE INTO urls (url) VALUES (?)', (key,)).rowcount
+            self.db.commit()
+            if inserted:
+                self.bloom.add(key)
+                self.count += 1
+        return bool(inserted)
+
+    def update(self, urls: Iterable[str]):
+        """Add many URLs in one transaction"""
+        with self._lock:
+            for key in {normalize_url(url) for url in urls}:
+                if self.db.execute('INSERT OR IGNORE INTO urls (url) VALUES (?)', (key,)).rowcount:
+                    self.bloom.add(key)
+                    self.count += 1
+            self.db.commit()
+
+    def __len__(self):
+        return self.count
+
+    def save(self):
+        with self._lock:
+            self.bloom.save(self.bloom_path)
+
+    def close(self):
+        self.save()
+        self.db.close()
+
+
+# Second-level labels under which registrations happen (example.co.uk, example.com.au)
+MULTI_PART_SUFFIXES = {
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'ltd.uk', 'plc.uk', 'me.uk',
+    'com.au', 'net.au', 'org.au', 'co.nz', 'org.nz', 'co.za', 'com.br', 'com.mx', 'com.ar',
+    'co.in', 'net.in', 'org.in', 'co.jp', 'ne.jp', 'or.jp', 'co.kr', 'com.cn', 'com.hk',
+    'com.sg', 'com.tr', 'com.tw', 'co.il', 'com.my', 'com.ph', 'com.pk', 'com.ng', 'co.id',
+}
+
+# Hosts whose URLs are profiles on someone else's site, not a company's own domain
+SHARED_HOSTS = {
+    'github.com', 'ycombinator.com', 'linkedin.com', 'facebook.com', 'twitter.com', 'x.com',
+    'instagram.com', 'angel.co', 'wellfound.com', 'producthunt.com', 'yelp.com', 'yellowpages.com',
+    'bbb.org', 'clutch.co', 'crunchbase.com', 'medium.com', 'google.com', 'builtwith.com',
+}
+
+LEGAL_SUFFIXES = {'inc', 'incorporated', 'llc', 'llp', 'ltd', 'limited', 'corp', 'corporation', 'co',
+                  'company', 'gmbh', 'plc', 'sa', 'srl', 'bv', 'pty', 'ag', 'oy', 'ab', 'the'}
+
+
+def registrable_domain(url: Optional[str]) -> Optional[str]:
+    """example.com for https://www.shop.example.com/about, or None for profile pages and non-URLs"""
+    if not url:
+        return None
+    try:
+        host = urlsplit(url if '//' in url else f"//{url}").hostname
+    except ValueError:
+        return None
+    if not host or '.' not in host or host.replace('.', '').isdigit():
+        return None
+    labels = host.lower().rstrip('.').split('.')
+    size = 3 if '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES else 2
+    domain = '.'.join(labels[-size:])
+    return None if domain in SHARED_HOSTS else domain
+
+
+def normalize_company_name(name: Optional[str]) -> str:
+    tokens = [token for token in re.findall(r'[a-z0-9]+', (name or '').lower()) if token not in LEGAL_SUFFIXES]
+    return ' '.join(tokens)
+
+
+class CompanyIndex:
+    """Every company discovered or checked so far, persisted in SQLite
+
+    Companies are identified by registrable domain. Ones without a domain of
+    their own (no website, or only a GitHub/YC/Yelp profile) are matched by
+    normalized name instead: exactly first, then fuzzily (difflib ratio >=
+    name_threshold) among names that share the first word.
+    """
+
+    def __init__(self, db_path: str = 'companies.db', name_threshold: float = 0.9):
+        self.db_path = db_path
+        self.name_threshold = name_threshold
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS companies (
+            key TEXT PRIMARY KEY,
+            domain TEXT,
+            name TEXT,
+            block TEXT,
+            company_id INTEGER,
+            checked_at TEXT
+        )''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS companies_name ON companies (name)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS companies_block ON companies (block)')
+        self.db.commit()
+
+    def find(self, company) -> Optional[Dict]:
+        """Stored entry for this company ({'company_id', 'checked_at', ...}), or None"""
+        domain = registrable_domain(company.get('website'))
+        name = normalize_company_name(company.get('name'))
+        with self._lock:
+            if domain:
+                row = self.db.execute('SELECT key, company_id, checked_at FROM companies WHERE key = ?',
+                                      (domain,)).fetchone()
+                return self._entry(row)
+            if not name:
+                return None
+            row = self.db.execute('SELECT key, company_id, checked_at FROM companies WHERE name = ? LIMIT 1',
+                                  (name,)).fetchone()
+            if row:
+                return self._entry(row)
+            best, best_ratio = None, self.name_threshold
+            for key, candidate, company_id, checked_at in self.db.execute(
+                    'SELECT key, name, company_id, checked_at FROM companies WHERE block = ?', (name.split()[0],)):
+                ratio = difflib.SequenceMatcher(None, name, candidate).ratio()
+                if ratio >= best_ratio:
+                    best, best_ratio = (key, company_id, checked_at), ratio
+            return self._entry(best)
+
+    @staticmethod
+    def _entry(row) -> Optional[Dict]:
+        if row is None:
+            return None
+        key, company_id, checked_at = row
+        return {'key': key, 'company_id': company_id, 'checked_at': checked_at}
+
+    def add(self, company, company_id: Optional[int] = None, checked_at: Optional[str] = None):
+        """Record a company; company_id is set once it has been saved as a lead-worthy company"""
+        self.add_many([(company, company_id, checked_at)])
+
+    def add_many(self, entries: Iterable[tuple]):
+        rows = []
+        for company, company_id, checked_at in entries:
+            domain = registrable_domain(company.get('website'))
+            name = normalize_company_name(company.get('name'))
+            if not domain and not name:
+                continue
+            rows.append((domain or f"name:{name}", domain, name, name.split()[0] if name else '', company_id, checked_at))
+        with self._lock:
+            # A later save keeps the id; a later check only refreshes checked_at
+            self.db.executemany('''INSERT INTO companies (key, domain, name, block, company_id, checked_at)
+                                   VALUES (?, ?, ?, ?, ?, ?)
+                                   ON CONFLICT (key) DO UPDATE SET
+                                       company_id = COALESCE(excluded.company_id, company_id),
+                                       checked_at = COALESCE(excluded.checked_at, checked_at)''', rows)
+            self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+
+    def close(self):
+        self.db.close()
@@ -3,6 +3,8 @@ import asyncio
 from datetime import datetime
 from typing import Callable, Dict
 
+from records import Lead
+
 class DiscordJobMonitor:
     def __init__(self, config, on_job_found: Callable):
         self.config = config
@@ -40,15 +42,15 @@ class DiscordJobMonitor:
         has_tech_keyword = any(keyword in content for keyword in tech_keywords)
         
         if has_job_indicator and has_tech_keyword:
-            job_data = {
-                'platform': 'Discord',
-                'source': message.guild.name if message.guild else 'DM',
-                'title': f"Discord job post from {message.author}",
-                'author': str(message.author),
-                'content': content,
-                'url': f"https://discord.com/channels/{message.guild.id}/{message.channel.id}/{message.id}" if message.guild else "DM",
-                'created_at': datetime.now().isoformat()
-            }
+            job_data = Lead(
+                platform='Discord',
+                source=message.guild.name if message.guild else 'DM',
+                title=f"Discord job post from {message.author}",
+                author=str(message.author),
+                content=content,
+                url=f"https://discord.com/channels/{message.guild.id}/{message.channel.id}/{message.id}" if message.guild else "DM",
+                created_at=datetime.now().isoformat()
+            )
             
             await self.on_job_found(job_data)
 
@@ -0,0 +1,122 @@
+"""
+Selenium interaction helpers for the browser-driven finders
+
+Every wait here is condition-based: a helper returns as soon as the page is in
+the state it waits for, and only a page that never gets there costs the full
+timeout. Chrome is started with images, fonts and media blocked and with eager
+page loads, so navigation finishes once the DOM is ready rather than after
+every asset has loaded.
+"""
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+Locator = Tuple[str, str]
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Requests Chrome drops before they leave the browser
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+]
+
+
+def chrome_driver(user_agent: str = DEFAULT_USER_AGENT, block_resources: bool = True) -> webdriver.Chrome:
+    """Headless Chrome for scraping"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument(f"--user-agent={user_agent}")
+    # get() returns at DOMContentLoaded; the waits below cover anything rendered later
+    chrome_options.page_load_strategy = 'eager'
+    if block_resources:
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.fonts': 2,
+        })
+
+    # Selenium 4 takes the driver binary through a Service, not as a positional argument
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    if block_resources:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+        except WebDriverException as e:
+            print(f"⚠ Could not block page resources: {e}")
+    return driver
+
+
+def wait_until(driver, condition: Callable, timeout: float = 10):
+    """Result of condition(driver) once it is truthy, or None after timeout"""
+    try:
+        return WebDriverWait(driver, timeout, ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+    except TimeoutException:
+        return None
+
+
+def wait_for(driver, locator: Locator, timeout: float = 10, clickable: bool = False):
+    """First element matching locator once it is present (or clickable), or None"""
+    condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+    return wait_until(driver, condition, timeout)
+
+
+def wait_for_all(driver, locator: Locator, timeout: float = 10) -> List:
+    """All elements matching locator once at least one is present, or an empty list"""
+    return wait_until(driver, EC.presence_of_all_elements_located(locator), timeout) or []
+
+
+def scroll_until_stable(driver, container: Optional[Locator], item: Locator, max_items: int,
+                        step_timeout: float = 3, max_scrolls: int = 20) -> List:
+    """Scroll until max_items are loaded or another scroll loads nothing new.
+
+    container is the scrollable element holding the results (the window when
+    None). Each scroll waits only until the item count grows, so the loop ends
+    one step_timeout after the list stops growing.
+    """
+    items = driver.find_elements(*item)
+    for _ in range(max_scrolls):
+        if len(items) >= max_items:
+            break
+        seen = len(items)
+        scroll_target = driver.find_elements(*container) if container else []
+        if scroll_target:
+            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_target[0])
+        else:
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        grown = wait_until(driver, lambda d: len(d.find_elements(*item)) > seen and d.find_elements(*item),
+                           step_timeout)
+        if not grown:
+            break
+        items = grown
+    return items[:max_items]
+
+
+def text_of(driver, locator: Locator) -> str:
+    elements = driver.find_elements(*locator)
+    try:
+        return elements[0].text if elements else ''
+    except StaleElementReferenceException:
+        return ''
+
+
+def click_and_wait(driver, element, changed: Callable, timeout: float = 5) -> bool:
+    """Click element, then wait for changed(driver) - e.g. a side panel showing the clicked item"""
+    started = time.perf_counter()
+    try:
+        element.click()
+    except WebDriverException:
+        # Covered by an overlay or scrolled away; a script click still fires the handler
+        driver.execute_script("arguments[0].click();", element)
+    return bool(wait_until(driver, changed, max(0.1, timeout - (time.perf_counter() - started))))
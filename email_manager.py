@@ -1,79 +1,88 @@
 import smtplib
-import time
+import os
+from collections import deque
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Dict, List, Optional
 import json
 
-class EmailTemplate:
-    @staticmethod
-    def job_application(personal_info, job_details):
-        subject = f"Backend Engineer Application - {personal_info.name}"
-        
-        body = f"""Hi,
-
-I came across your job posting for a backend developer position and I'm very interested in joining your team.
-
-I'm a backend engineer with expertise in:
-• Node.js, TypeScript, and Python
-• REST APIs and microservices architecture  
-• Database design (PostgreSQL, MongoDB)
-• Cloud platforms (AWS, Docker, Kubernetes)
-• Agile development and CI/CD
-
-I've successfully delivered scalable backend solutions for startups and established companies. I'm passionate about writing clean, efficient code and solving complex technical challenges.
-
-I'd love to discuss how I can contribute to your team's success. I'm available for a call at your convenience.
-
-Best regards,
-{personal_info.name}
-{personal_info.linkedin}
-{personal_info.github}
-
----
-Found via: {job_details.get('url', 'Direct outreach')}
-"""
-        return subject, body
-
-    @staticmethod
-    def company_outreach(personal_info, company_info):
-        subject = f"Experienced Backend Engineer - {personal_info.name}"
-        
-        body = f"""Hello,
-
-I hope this message finds you well. I'm reaching out because I'm impressed with {company_info.get('name', 'your company')}'s work in {company_info.get('type', 'technology')}.
+from records import Lead, Company, as_lead, as_company
+from email_templates import RenderedEmail, TemplateLibrary
+import tracing
 
-As a backend engineer with 5+ years of experience, I specialize in:
-• Scalable API development (Node.js, Python)
-• Cloud architecture and deployment
-• Database optimization and design
-• Team collaboration and code review
+class AttemptJournal:
+    """Append-only JSONL log of send attempts, rotated by size
 
-I'm particularly interested in {company_info.get('description', 'innovative technology solutions')} and would love to explore opportunities to contribute to your engineering team.
+    Only the most recent attempts are kept in memory; the full history lives
+    in the journal files (path, path.1, ... path.N, oldest last).
+    """
 
-Would you be open to a brief conversation about potential openings or future opportunities?
+    def __init__(self, path='email_attempts.jsonl', max_bytes=5 * 1024 * 1024, backups=3, recent_size=50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.recent = deque(maxlen=recent_size)
+        self._load_recent()
 
-Thank you for your time.
+    def append(self, attempt: Dict):
+        self.recent.append(attempt)
+        try:
+            line = json.dumps(attempt, default=str) + '\n'
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except Exception as e:
+            print(f"Attempt journal write error: {e}")
+
+    def extend(self, attempts: List[Dict]):
+        for attempt in attempts:
+            self.append(attempt)
+
+    def last(self, count=10) -> List[Dict]:
+        return list(self.recent)[-count:]
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _load_recent(self):
+        """Fill the ring buffer from the tail of the current journal file"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                # Attempts are small; 64KB comfortably covers the ring buffer
+                f.seek(max(0, f.tell() - 64 * 1024))
+                lines = f.read().splitlines()[-self.recent.maxlen:]
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                self.recent.append(json.loads(line))
+            except ValueError:
+                continue  # first line may be cut off by the seek
 
-Best regards,
-{personal_info.name}
-{personal_info.linkedin}
-{personal_info.github}
-"""
-        return subject, body
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
 
 class EmailSender:
-    def __init__(self, email_config, personal_info):
+    def __init__(self, email_config, personal_info, journal: AttemptJournal = None,
+                 templates: TemplateLibrary = None):
         self.config = email_config
         self.personal_info = personal_info
+        self.templates = templates or TemplateLibrary()
         self.stats = {
             'sent': 0,
             'failed': 0,
             'daily_count': 0,
-            'last_reset': datetime.now().date(),
-            'attempts': []
+            'last_reset': datetime.now().date()
         }
+        self.journal = journal or AttemptJournal()
 
     def reset_daily_count(self):
         today = datetime.now().date()
@@ -86,24 +95,25 @@ class EmailSender:
         return self.stats['daily_count'] < daily_limit
 
     def send_email(self, to_email: str, subject: str, body: str, context: Dict = None):
+        return self.send_rendered(to_email, RenderedEmail(subject, body), context)
+
+    def send_rendered(self, to_email: str, message: RenderedEmail, context: Dict = None):
         if not self.can_send_email():
             print(f"Daily email limit reached ({self.stats['daily_count']})")
             return False
 
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.config.address
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'plain'))
-
-            server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
-            server.starttls()
-            server.login(self.config.address, self.config.password)
-            
-            text = msg.as_string()
-            server.sendmail(self.config.address, to_email, text)
-            server.quit()
+            # Serialized once per message; only the recipient headers are added here
+            payload = message.for_recipient(self.config.address, to_email)
+
+            with tracing.span('smtp.send', kind=tracing.SPAN_KIND_CLIENT,
+                              **{'server.address': self.config.smtp_server, 'bytes.sent': len(payload)}):
+                server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
+                server.starttls()
+                server.login(self.config.address, self.config.password)
+                
+                server.sendmail(self.config.address, to_email, payload)
+                server.quit()
 
             self.stats['sent'] += 1
             self.stats['daily_count'] += 1
@@ -114,7 +124,7 @@ class EmailSender:
                 'timestamp': datetime.now().isoformat(),
                 'context': context or {}
             }
-            self.stats['attempts'].append(attempt_record)
+            self.journal.append(attempt_record)
             
             print(f"✓ Email sent to {to_email}")
             return True
@@ -129,26 +139,29 @@ class EmailSender:
                 'timestamp': datetime.now().isoformat(),
                 'context': context or {}
             }
-            self.stats['attempts'].append(attempt_record)
+            self.journal.append(attempt_record)
             
             print(f"✗ Failed to send to {to_email}: {e}")
             return False
 
-    def send_job_application(self, job_details: Dict, email_list: List[str]):
-        subject, body = EmailTemplate.job_application(self.personal_info, job_details)
+    def send_job_application(self, job_details: Lead, email_list: List[str]):
+        message = self.templates.job_application(self.personal_info, job_details)
+        # Attempts keep a reference to the lead, not a copy of its content
+        context = {'type': 'job_application', **as_lead(job_details).context_ref()}
         
         for email in email_list:
-            if self.send_email(email, subject, body, {'type': 'job_application', 'job': job_details}):
-                time.sleep(5)  # Delay between emails
+            if self.send_rendered(email, message, context):
+                tracing.sleep(5)  # Delay between emails
                 return True
         return False
 
-    def send_company_outreach(self, company_info: Dict, email_list: List[str]):
-        subject, body = EmailTemplate.company_outreach(self.personal_info, company_info)
+    def send_company_outreach(self, company_info: Company, email_list: List[str]):
+        message = self.templates.company_outreach(self.personal_info, company_info)
+        context = {'type': 'company_outreach', **as_company(company_info).context_ref()}
         
         for email in email_list:
-            if self.send_email(email, subject, body, {'type': 'company_outreach', 'company': company_info}):
-                time.sleep(5)
+            if self.send_rendered(email, message, context):
+                tracing.sleep(5)
                 return True
         return False
 
@@ -162,16 +175,24 @@ class EmailSender:
             'emails_failed': self.stats['failed'],
             'daily_count': self.stats['daily_count'],
             'success_rate': success_rate,
-            'recent_attempts': self.stats['attempts'][-10:]  # Last 10 attempts
+            'recent_attempts': self.journal.last(10)  # Last 10 attempts
         }
 
     def save_stats(self, filename='email_stats.json'):
+        # Counters only - attempts are already on disk in the journal
         with open(filename, 'w') as f:
             json.dump(self.stats, f, indent=2, default=str)
 
     def load_stats(self, filename='email_stats.json'):
         try:
             with open(filename, 'r') as f:
-                self.stats.update(json.load(f))
+                stats = json.load(f)
         except FileNotFoundError:
-            pass
+            return
+
+        # Older stats files carry the whole attempt history; move it into the journal once
+        attempts = stats.pop('attempts', None)
+        if attempts and not self.journal.exists():
+            self.journal.extend(attempts)
+            print(f"Moved {len(attempts)} email attempts to {self.journal.path}")
+        self.stats.update(stats)
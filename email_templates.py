@@ -0,0 +1,154 @@
+"""
+Email templates, loaded once and rendered once per lead
+
+Templates live in templates/<kind>/<variant>.txt: a "Subject: ..." line, a
+blank line, then the body, with string.Template placeholders ($name,
+$company_name, ...). The variant is picked by where the lead or company came
+from - templates/job_application/hackernews.txt is used for HackerNews leads
+- and default.txt is used when a source has no file of its own.
+
+Each template file is read and compiled the first time it is needed. A
+rendered message is cached per lead/company, and its MIME payload is
+serialized once: sending it to the next address on the list only prepends
+that recipient's To, Date and Message-ID headers.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from email import policy
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from string import Template
+from typing import Dict, Optional, Tuple
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+# CRLF line endings as SMTP wants them; compat32 headers, which serialize several times faster
+SMTP_COMPAT = policy.compat32.clone(linesep='\r\n')
+
+
+def variant_name(source: Optional[str]) -> str:
+    """'Y Combinator' -> 'y-combinator', the file name a source's template variant uses"""
+    return re.sub(r'[^a-z0-9]+', '-', (source or '').lower()).strip('-') or 'default'
+
+
+class RenderedEmail:
+    """Subject and body for one lead; the MIME payload is built on first send and reused"""
+
+    __slots__ = ('subject', 'body', '_sender', '_payload')
+
+    def __init__(self, subject: str, body: str):
+        self.subject = subject
+        self.body = body
+        self._sender = None
+        self._payload = None
+
+    def for_recipient(self, sender: str, to_email: str) -> bytes:
+        """The complete message for to_email, ready for smtplib.sendmail"""
+        if self._payload is None or self._sender != sender:
+            msg = MIMEMultipart()
+            msg['From'] = sender
+            # Encoded only when it needs to be; plain ASCII subjects stay readable
+            msg['Subject'] = self.subject if self.subject.isascii() else Header(self.subject, 'utf-8')
+            msg.attach(MIMEText(self.body, 'plain', 'utf-8'))
+            self._payload = msg.as_bytes(policy=SMTP_COMPAT)
+            self._sender = sender
+        # Header order does not matter, so the per-recipient ones go in front of the cached payload
+        message_id = make_msgid(domain=sender.rpartition('@')[2] or None)
+        return f"To: {to_email}\r\nDate: {formatdate(localtime=True)}\r\nMessage-ID: {message_id}\r\n".encode() + \
+            self._payload
+
+
+class TemplateLibrary:
+    def __init__(self, directory: str = TEMPLATES_DIR, cache_size: int = 256):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._templates: Dict[Tuple[str, str], Optional[Tuple[Template, Template]]] = {}
+        self._rendered: 'OrderedDict[tuple, RenderedEmail]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def job_application(self, personal_info, lead) -> RenderedEmail:
+        values = self._personal(personal_info)
+        values.update(url=lead.get('url') or 'Direct outreach', title=lead.get('title') or '',
+                      platform=lead.get('platform') or '', source=lead.get('source') or '')
+        return self.render('job_application', lead.get('platform'), values,
+                           cache_key=lead.get('id') or lead.get('url'))
+
+    def company_outreach(self, personal_info, company) -> RenderedEmail:
+        values = self._personal(personal_info)
+        values.update(company_name=company.get('name') or 'your company',
+                      company_type=company.get('type') or 'technology',
+                      company_description=company.get('description') or 'innovative technology solutions',
+                      website=company.get('website') or '', source=company.get('source') or '')
+        return self.render('company_outreach', company.get('source'), values,
+                           cache_key=company.get('id') or company.get('name'))
+
+    def render(self, kind: str, source: Optional[str], values: Dict[str, str], cache_key=None) -> RenderedEmail:
+        """kind's template for source (or its default), filled with values; cached per cache_key"""
+        variant = variant_name(source)
+        key = (kind, variant, cache_key, values.get('name')) if cache_key is not None else None
+        if key is not None:
+            with self._lock:
+                rendered = self._rendered.get(key)
+                if rendered is not None:
+                    self._rendered.move_to_end(key)
+                    return rendered
+
+        subject, body = self._template(kind, variant) or self._template(kind, 'default') or (None, None)
+        if subject is None:
+            raise FileNotFoundError(f"No {kind} template in {self.directory}")
+        # Unknown placeholders are left as written rather than failing the send
+        rendered = RenderedEmail(subject.safe_substitute(values), body.safe_substitute(values))
+
+        if key is not None:
+            with self._lock:
+                self._rendered[key] = rendered
+                while len(self._rendered) > self.cache_size:
+                    self._rendered.popitem(last=False)
+        return rendered
+
+    def reload(self):
+        """Pick up edited template files"""
+        with self._lock:
+            self._templates.clear()
+            self._rendered.clear()
+
+    def _template(self, kind: str, variant: str) -> Optional[Tuple[Template, Template]]:
+        with self._lock:
+            if (kind, variant) in self._templates:
+                return self._templates[(kind, variant)]
+        path = os.path.join(self.directory, kind, f"{variant}.txt")
+        compiled = None
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            first_line, _, body = text.partition('\n')
+            if first_line.lower().startswith('subject:'):
+                subject = first_line.split(':', 1)[1].strip()
+                # One blank line separates the subject from the body
+                body = body[1:] if body.startswith('\n') else body
+            else:
+                subject, body = '', text
+            compiled = (Template(subject), Template(body))
+            invalid = [template for template in compiled if not template.is_valid()]
+            if invalid:
+                print(f"⚠ Template {path} has malformed placeholders; they are sent as written")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠ Could not read template {path}: {e}")
+        with self._lock:
+            self._templates[(kind, variant)] = compiled
+        return compiled
+
+    @staticmethod
+    def _personal(personal_info) -> Dict[str, str]:
+        return {
+            'name': personal_info.name,
+            'linkedin': personal_info.linkedin,
+            'github': personal_info.github,
+            'portfolio': personal_info.portfolio or '',
+        }
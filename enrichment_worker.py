@@ -0,0 +1,95 @@
+"""
+Company enrichment workers
+
+Each worker process claims companies from the enrichment queue, crawls their
+websites for real emails and stores the result back in the queue, where the
+bot collects it into LeadManager. Run as many as the machine has cores for,
+in this container or in others sharing the queue file's volume:
+
+    python enrichment_worker.py --workers 4
+    python enrichment_worker.py --once      # drain the queue, then exit
+"""
+
+import argparse
+import dataclasses
+import multiprocessing
+import time
+
+from config import CONFIG, BotConfig
+from work_queue import EnrichmentQueue, worker_id
+
+
+def run_worker(config: BotConfig, index: int = 0, once: bool = False, poll_seconds: float = 5):
+    """Claim, enrich and complete companies until stopped (or, with once, until the queue is drained)"""
+    # Imported here so spawned processes load the scrapers themselves
+    import http_client
+    import tracing
+    from company_finder import CompanyOutreachManager
+
+    http_client.configure(failure_threshold=config.host_failure_threshold,
+                          max_backoff=config.host_max_backoff_seconds, open_seconds=config.host_open_seconds)
+    # Appended to the bot's trace file; each line names the process it came from
+    tracing.configure(config.trace_file)
+
+    # Only the email extractor is used: no browser, no startup cache
+    manager = CompanyOutreachManager(dataclasses.replace(config, enable_browser_sources=False, startup_cache_file=None))
+    queue = EnrichmentQueue(config.enrichment_queue_file, lease_seconds=config.enrichment_lease_seconds)
+    owner = worker_id(index)
+    print(f"👷 Enrichment worker {owner} started")
+
+    try:
+        while True:
+            claimed = queue.claim(owner)
+            if not claimed:
+                if once and not queue.outstanding():
+                    break
+                time.sleep(poll_seconds)
+                continue
+            for key, company in claimed:
+                try:
+                    company = manager.enrich_company(company, progress=owner)
+                except BaseException:
+                    queue.release(key, owner)
+                    raise
+                if not queue.complete(key, owner, company):
+                    print(f"⚠ Lease on {key} expired before {owner} finished; result dropped")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+        print(f"👷 Enrichment worker {owner} stopped")
+
+
+def start_workers(config: BotConfig, count: int, once: bool = False) -> list:
+    """Start count worker processes and return them"""
+    # spawn, not fork: the bot process has scheduler, health-check and Discord threads running
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for index in range(count):
+        process = context.Process(target=run_worker, args=(config, index, once),
+                                  name=f"enrichment-{index}", daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=CONFIG.enrichment_workers or 1)
+    parser.add_argument('--once', action='store_true', help="Exit once the queue has no pending or leased tasks")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker(CONFIG, once=args.once)
+        return
+    processes = start_workers(CONFIG, args.workers, once=args.once)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+"""
+Fast HTML parsing for the directory, startup and email scrapers
+
+Every source gets its XPath selectors compiled once at import time and runs on
+lxml instead of BeautifulSoup's pure-Python html.parser backend. Each parser
+first runs a cheap regex prefilter over the raw bytes and returns nothing
+without building a DOM when the page cannot contain what the source looks for
+(blocked pages, empty result lists, pages without any email address).
+
+Parsers take raw response bytes (or text) and return small tuples/dicts, never
+DOM nodes, so results are cheap to keep and to pass between threads.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from urllib.parse import parse_qs, urlparse
+
+from lxml import etree, html as lxml_html
+
+Markup = Union[bytes, str]
+
+_NS = {'re': 'http://exslt.org/regular-expressions'}
+
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching one whole class token, like BeautifulSoup's class_='name'"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath(expression: str) -> etree.XPath:
+    # Plain strings: lxml's default "smart" strings keep the whole tree alive
+    return etree.XPath(expression, namespaces=_NS, smart_strings=False)
+
+
+def _prefilter(pattern: bytes) -> re.Pattern:
+    return re.compile(pattern, re.I)
+
+
+def _as_bytes(markup: Markup) -> bytes:
+    return markup.encode('utf-8', 'replace') if isinstance(markup, str) else markup
+
+
+def _as_text(markup: Markup) -> str:
+    return markup.decode('utf-8', 'replace') if isinstance(markup, bytes) else markup
+
+
+def _document(markup: Markup, prefilter: Optional[re.Pattern] = None):
+    """Parse markup into an lxml tree, or return None when the prefilter rules it out"""
+    raw = _as_bytes(markup)
+    if not raw or (prefilter is not None and not prefilter.search(raw)):
+        return None
+    try:
+        return lxml_html.fromstring(raw)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _first(node, *selectors):
+    """First match of the first selector that matches anything.
+
+    lxml elements without children are falsy, so `a or b` cannot be used to
+    chain fallbacks the way it is with BeautifulSoup tags.
+    """
+    for selector in selectors:
+        nodes = selector(node)
+        if nodes:
+            return nodes[0]
+    return None
+
+
+def _stripped_text(node) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in node.itertext())
+
+
+def _text(node) -> str:
+    """Equivalent of BeautifulSoup's .text.strip()"""
+    return node.text_content().strip()
+
+
+# Yelp
+YELP_PREFILTER = _prefilter(rb'serp-ia-card|businessName')
+YELP_CARDS = _xpath("//div[@data-testid='serp-ia-card']")
+YELP_CARDS_FALLBACK = _xpath("//div[contains(@class, 'businessName')]")
+YELP_PAGE_PREFILTER = _prefilter(rb'website')
+YELP_WEBSITE = _xpath("(//a[@data-testid='website-url'])[1]")
+YELP_WEBSITE_FALLBACK = _xpath("(//a[count(*) = 0][re:test(text(), 'website', 'i')])[1]")
+
+# YellowPages
+YELLOWPAGES_PREFILTER = _prefilter(rb'business-name')
+YELLOWPAGES_CARDS = _xpath(f"//div[{_has_class('result')}]")
+YELLOWPAGES_NAME = _xpath(f"(.//a[{_has_class('business-name')}])[1]")
+YELLOWPAGES_WEBSITE = _xpath(f"(.//a[{_has_class('track-visit-website')}])[1]/@href")
+
+# BBB
+BBB_PREFILTER = _prefilter(rb'result-item')
+BBB_CARDS = _xpath(f"//div[{_has_class('result-item')}]")
+
+# Clutch
+CLUTCH_PREFILTER = _prefilter(rb'provider-row')
+CLUTCH_CARDS = _xpath(f"//div[{_has_class('provider-row')}]")
+CLUTCH_NAME_FALLBACK = _xpath(f"(.//a[{_has_class('company_title')}])[1]")
+CLUTCH_WEBSITE = _xpath(f"(.//a[{_has_class('website_link')}])[1]/@href")
+
+# Y Combinator
+YC_PREFILTER = _prefilter(rb'_company_86jzd_338|/companies/')
+YC_CARDS = _xpath(f"//div[{_has_class('_company_86jzd_338')}]")
+YC_CARDS_FALLBACK = _xpath("//a[contains(@href, '/companies/')]")
+YC_NAME = _xpath(f"(.//span[{_has_class('_coName_86jzd_453')}])[1]")
+YC_BATCH = _xpath(f"(.//span[{_has_class('_batch_86jzd_461')}])[1]")
+YC_DESCRIPTION = _xpath(f"(.//span[{_has_class('_coDescription_86jzd_478')}])[1]")
+
+# GitHub organization search
+GITHUB_ORGS_PREFILTER = _prefilter(rb'Box-row')
+GITHUB_ORG_CARDS = _xpath(f"//div[{_has_class('Box-row')}]")
+GITHUB_ORG_LINK = _xpath(f"(.//a[{_has_class('f3')}])[1]")
+GITHUB_ORG_FOLLOWERS = _xpath("(.//span[count(*) = 0][contains(text(), 'followers')])[1]")
+
+# ProductHunt
+PRODUCTHUNT_PREFILTER = _prefilter(rb'post-item|/posts/')
+PRODUCTHUNT_CARDS = _xpath("//div[@data-test='post-item']")
+PRODUCTHUNT_CARDS_FALLBACK = _xpath("//a[contains(@href, '/posts/')]")
+
+# BuiltWith
+BUILTWITH_PREFILTER = _prefilter(rb'href=["\']?https?://')
+BUILTWITH_LINKS = _xpath(r"//a[re:test(@href, '^https?://[^/]+/?$')]")
+
+# AngelList jobs
+ANGELLIST_PREFILTER = _prefilter(rb'job-card')
+ANGELLIST_CARDS = _xpath(f"//div[{_has_class('job-card')}]")
+
+# Company websites
+EMAIL_PREFILTER = _prefilter(rb'@|&#0*64;|&#x0*40;|mailto:')
+MAILTO_HREFS = _xpath("//a[starts-with(@href, 'mailto:')]/@href")
+CONTACT_SECTIONS = _xpath(
+    "//*[self::div or self::section]"
+    "[re:test(@class, 'contact|email', 'i')]"
+)
+
+FIRST_ANCHOR = _xpath("(.//a)[1]")
+FIRST_H3 = _xpath("(.//h3)[1]")
+FIRST_H4 = _xpath("(.//h4)[1]")
+FIRST_STRONG = _xpath("(.//strong)[1]")
+FIRST_P = _xpath("(.//p)[1]")
+FIRST_SPAN = _xpath("(.//span)[1]")
+
+
+def parse_yelp_search(markup: Markup, limit: Optional[int] = 15) -> List[Tuple[str, str]]:
+    """(name, business page href) for each Yelp search card"""
+    doc = _document(markup, YELP_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in (YELP_CARDS(doc) or YELP_CARDS_FALLBACK(doc))[:limit]:
+        name_elem = _first(card, FIRST_ANCHOR, FIRST_H3)
+        if name_elem is not None:
+            results.append((_stripped_text(name_elem), name_elem.get('href', '')))
+    return results
+
+
+def parse_yelp_website(markup: Markup) -> Optional[str]:
+    doc = _document(markup, YELP_PAGE_PREFILTER)
+    if doc is None:
+        return None
+
+    website_elem = _first(doc, YELP_WEBSITE, YELP_WEBSITE_FALLBACK)
+    return website_elem.get('href') if website_elem is not None else None
+
+
+def parse_yellowpages(markup: Markup, limit: Optional[int] = 10) -> List[Tuple[str, Optional[str]]]:
+    """(name, website) for each YellowPages result"""
+    doc = _document(markup, YELLOWPAGES_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in YELLOWPAGES_CARDS(doc)[:limit]:
+        name_elem = _first(card, YELLOWPAGES_NAME)
+        if name_elem is not None:
+            results.append((_stripped_text(name_elem), _first(card, YELLOWPAGES_WEBSITE)))
+    return results
+
+
+def parse_bbb(markup: Markup, limit: Optional[int] = 10) -> List[str]:
+    """Business names from a BBB search page"""
+    doc = _document(markup, BBB_PREFILTER)
+    if doc is None:
+        return []
+
+    names = []
+    for card in BBB_CARDS(doc)[:limit]:
+        name_elem = _first(card, FIRST_H4, FIRST_ANCHOR)
+        if name_elem is not None:
+            names.append(_stripped_text(name_elem))
+    return names
+
+
+def parse_clutch(markup: Markup, limit: Optional[int] = 15) -> List[Tuple[str, Optional[str]]]:
+    """(name, website) for each Clutch provider row"""
+    doc = _document(markup, CLUTCH_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in CLUTCH_CARDS(doc)[:limit]:
+        name_elem = _first(card, FIRST_H3, CLUTCH_NAME_FALLBACK)
+        if name_elem is not None:
+            results.append((_stripped_text(name_elem), _first(card, CLUTCH_WEBSITE)))
+    return results
+
+
+def parse_ycombinator(markup: Markup, limit: int = 30) -> List[Dict[str, str]]:
+    """name/batch/description for each company card on the YC directory"""
+    doc = _document(markup, YC_PREFILTER)
+    if doc is None:
+        return []
+
+    companies = []
+    for card in (YC_CARDS(doc) or YC_CARDS_FALLBACK(doc))[:limit]:
+        name_elem = _first(card, YC_NAME, FIRST_H3)
+        name = _text(name_elem) if name_elem is not None else _text(card)
+        batch_elem = _first(card, YC_BATCH)
+        desc_elem = _first(card, YC_DESCRIPTION)
+        companies.append({
+            'name': name,
+            'batch': _text(batch_elem) if batch_elem is not None else 'Unknown',
+            'description': _text(desc_elem) if desc_elem is not None else ''
+        })
+    return companies
+
+
+def parse_github_orgs(markup: Markup, limit: int = 20) -> List[Tuple[str, str, str]]:
+    """(name, profile href, followers) for each organization row"""
+    doc = _document(markup, GITHUB_ORGS_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in GITHUB_ORG_CARDS(doc)[:limit]:
+        name_elem = _first(card, GITHUB_ORG_LINK)
+        if name_elem is not None:
+            followers_elem = _first(card, GITHUB_ORG_FOLLOWERS)
+            followers = _text(followers_elem) if followers_elem is not None else '0'
+            results.append((_text(name_elem), name_elem.get('href', ''), followers))
+    return results
+
+
+def parse_producthunt(markup: Markup, limit: int = 15) -> List[Tuple[str, str]]:
+    """(name, description) for each ProductHunt post card"""
+    doc = _document(markup, PRODUCTHUNT_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in (PRODUCTHUNT_CARDS(doc) or PRODUCTHUNT_CARDS_FALLBACK(doc))[:limit]:
+        name_elem = _first(card, FIRST_H3, FIRST_STRONG)
+        if name_elem is not None:
+            desc_elem = _first(card, FIRST_P, FIRST_SPAN)
+            results.append((_text(name_elem), _text(desc_elem) if desc_elem is not None else ''))
+    return results
+
+
+def parse_builtwith(markup: Markup, limit: int = 10) -> List[Tuple[str, str]]:
+    """(name, website) for company links on a BuiltWith technology page"""
+    doc = _document(markup, BUILTWITH_PREFILTER)
+    if doc is None:
+        return []
+
+    return [(_text(link), link.get('href')) for link in BUILTWITH_LINKS(doc)[:limit]]
+
+
+def parse_angellist_jobs(markup: Markup, limit: int = 10) -> List[Tuple[str, str]]:
+    """(title, company) for each AngelList job card"""
+    doc = _document(markup, ANGELLIST_PREFILTER)
+    if doc is None:
+        return []
+
+    results = []
+    for card in ANGELLIST_CARDS(doc)[:limit]:
+        title_elem = _first(card, FIRST_H3)
+        company_elem = _first(card, FIRST_H4)
+        if title_elem is not None and company_elem is not None:
+            results.append((_text(title_elem), _text(company_elem)))
+    return results
+
+
+# Google Maps keeps its search results in a JSON payload rather than in the markup:
+# embedded in the page's APP_INITIALIZATION_STATE, or as the whole body of a
+# tbm=map response. Both are arrays of arrays behind an XSSI guard prefix.
+MAPS_XSSI_PREFIX = ")]}'"
+MAPS_STATE_RE = re.compile(rb"APP_INITIALIZATION_STATE\s*=\s*(\[.*?\]);\s*window\.", re.S)
+
+
+def _dig(value, *path):
+    """value[a][b]... or None when any step is missing"""
+    for index in path:
+        if not isinstance(value, list) or not -len(value) <= index < len(value):
+            return None
+        value = value[index]
+    return value
+
+
+def _maps_json(text: str):
+    try:
+        return json.loads(text[len(MAPS_XSSI_PREFIX):] if text.startswith(MAPS_XSSI_PREFIX) else text)
+    except ValueError:
+        return None
+
+
+def _maps_payloads(markup: Markup):
+    """Every XSSI-guarded JSON payload in a Maps page or response"""
+    text = _as_text(markup).lstrip()
+    if text.startswith(MAPS_XSSI_PREFIX):
+        payload = _maps_json(text)
+        if payload is not None:
+            yield payload
+        return
+
+    match = MAPS_STATE_RE.search(_as_bytes(markup))
+    if not match:
+        return
+    state = _maps_json(match.group(1).decode('utf-8', 'replace'))
+    stack = [state]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(reversed(value))
+        elif isinstance(value, str) and value.startswith(MAPS_XSSI_PREFIX):
+            payload = _maps_json(value)
+            if payload is not None:
+                yield payload
+
+
+def _maps_website(url: Optional[str]) -> Optional[str]:
+    # Some listings link through Google's redirector
+    if url and url.startswith('/url?'):
+        url = parse_qs(urlparse(url).query).get('q', [None])[0]
+    return url
+
+
+def parse_google_maps(markup: Markup, limit: Optional[int] = None) -> Optional[List[Dict[str, Optional[str]]]]:
+    """{name, website, phone, address} for each place in a Maps search.
+
+    Returns None, rather than an empty list, when the markup holds no search
+    payload at all (a consent page, a block, a changed format), so callers can
+    tell "no results" apart from "could not read the results".
+    """
+    places = None
+    for payload in _maps_payloads(markup):
+        entries = _dig(payload, 0, 1)
+        if not isinstance(entries, list):
+            continue
+        places = []
+        for entry in entries:
+            place = _dig(entry, 14)
+            name = _dig(place, 11)
+            if not isinstance(name, str) or not name:
+                continue
+            address = _dig(place, 39)
+            if not isinstance(address, str):
+                lines = _dig(place, 2)
+                address = ', '.join(line for line in lines if isinstance(line, str)) if isinstance(lines, list) else None
+            places.append({
+                'name': name,
+                'website': _maps_website(_dig(place, 7, 0)),
+                'phone': _dig(place, 178, 0, 0),
+                'address': address or None,
+            })
+            if limit is not None and len(places) >= limit:
+                break
+        break
+    return places
+
+
+# Sitemaps are flat XML; a regex over the bytes is enough and needs no tree
+SITEMAP_LOC_RE = re.compile(rb"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+SITEMAP_INDEX_RE = re.compile(rb"<sitemapindex[\s>]", re.I)
+
+
+def parse_sitemap(markup: Markup) -> Tuple[List[str], List[str]]:
+    """(page URLs, child sitemap URLs) listed in a sitemap or sitemap index"""
+    raw = _as_bytes(markup)
+    if not raw:
+        return [], []
+    locations = [loc.decode('utf-8', 'replace').replace('&amp;', '&') for loc in SITEMAP_LOC_RE.findall(raw)]
+    if SITEMAP_INDEX_RE.search(raw):
+        return [], locations
+    return locations, []
+
+
+EMAIL_BYTES_RE = re.compile(EMAIL_PATTERN.encode())
+
+
+class EmailScanner:
+    """Plain-text email addresses in a page, found chunk by chunk as it downloads.
+
+    Each chunk is scanned together with the tail of the previous one, so an
+    address split across chunks is still found; an address that touches the
+    end of what has arrived is held back until the next chunk (or finish())
+    shows whether it continues - "info@example.co" may be "info@example.com".
+    """
+
+    OVERLAP = 256  # longer than any valid address
+
+    def __init__(self):
+        self._tail = b''
+
+    def feed(self, chunk: bytes) -> List[str]:
+        data = self._tail + chunk
+        # Matches ending before len(tail) were reported with the previous chunk
+        seen = len(self._tail)
+        self._tail = data[-self.OVERLAP:]
+        return [match.group().decode('ascii', 'replace') for match in EMAIL_BYTES_RE.finditer(data)
+                if seen <= match.end() < len(data)]
+
+    def finish(self) -> List[str]:
+        """Addresses held back at the end of the last chunk"""
+        tail, self._tail = self._tail, b''
+        return [match.group().decode('ascii', 'replace') for match in EMAIL_BYTES_RE.finditer(tail)
+                if match.end() == len(tail)]
+
+
+def extract_page_emails(markup: Markup) -> List[str]:
+    """Candidate emails from raw page text, mailto links and contact sections.
+
+    Pages without an '@', an encoded '@' or a mailto link are skipped before
+    any parsing happens.
+    """
+    raw = _as_bytes(markup)
+    if not raw or not EMAIL_PREFILTER.search(raw):
+        return []
+
+    # Method 1: Direct text email extraction
+    found_emails = EMAIL_RE.findall(_as_text(markup))
+
+    doc = _document(raw)
+    if doc is None:
+        return found_emails
+
+    # Method 2: Look for mailto links
+    for href in MAILTO_HREFS(doc):
+        email = href.replace('mailto:', '').split('?')[0]
+        if email:
+            found_emails.append(email)
+
+    # Method 3: Look for contact forms with hidden emails
+    for section in CONTACT_SECTIONS(doc):
+        found_emails.extend(EMAIL_RE.findall(section.text_content()))
+
+    return found_emails
@@ -0,0 +1,261 @@
+"""
+Bounded HTTP fetches for the scrapers
+
+fetch() streams the response body instead of letting requests read it whole:
+it refuses bodies whose Content-Type is not text-like or whose Content-Length
+is over the cap before downloading anything, stops reading at max_bytes, and
+hands each chunk to an optional on_chunk callback that can end the download
+early (the email crawler stops as soon as it has what it needs). Memory per
+request is bounded by max_bytes no matter what a site serves.
+
+The result has the parts of requests.Response the scrapers use (status_code,
+headers, content, text, json()), plus why the body was cut short, if it was.
+
+Every fetch also goes through a per-host health tracker. A 429 or 503 with
+Retry-After, or an exhausted rate limit (X-RateLimit-Remaining: 0 on GitHub),
+blocks the host until the time the server gave. Other failures - blocks
+(403, 999), 5xx, timeouts, connection errors - back the host off
+exponentially, and after failure_threshold in a row its circuit opens: every
+request to it fails at once with HostUnavailable (a RequestException, so the
+scrapers' existing error handling skips it) until the cooldown passes and a
+single probe request is let through. Healthy hosts are never slowed down.
+
+Each fetch is a client span in tracing (method, host, status, body size).
+"""
+
+import email.utils
+import json
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+import tracing
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+# Bodies worth reading; anything else (images, video, PDFs, archives) is skipped unread
+TEXT_TYPES: Tuple[str, ...] = (
+    'text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml',
+    'application/json', 'application/rss+xml', 'application/atom+xml',
+)
+
+
+# Statuses that mean "stop asking for a while", as opposed to a page that does not exist
+FAILURE_STATUSES = frozenset((403, 408, 429, 500, 502, 503, 504, 520, 521, 522, 524, 999))
+
+
+class HostUnavailable(requests.RequestException):
+    """The host is backing off or its circuit is open; no request was made"""
+
+
+class _HostState:
+    __slots__ = ('failures', 'blocked_until', 'opened', 'probing')
+
+    def __init__(self):
+        self.failures = 0
+        self.blocked_until = 0.0
+        # How many times in a row the circuit opened; each reopening doubles the cooldown
+        self.opened = 0
+        self.probing = False
+
+
+class HostHealth:
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 2.0, max_backoff: float = 900.0,
+                 open_seconds: float = 300.0, max_open_seconds: float = 3600.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        # Only hosts with recent trouble have an entry; a success removes it
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str):
+        """Raise HostUnavailable instead of letting a request go to a host that is backing off"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return
+            wait = state.blocked_until - time.time()
+            if wait > 0:
+                raise HostUnavailable(f"{host} is backing off for another {wait:.0f}s")
+            if state.opened:
+                # Half-open: one probe at a time decides whether the circuit closes
+                if state.probing:
+                    raise HostUnavailable(f"{host} is being probed after repeated failures")
+                state.probing = True
+
+    def record(self, host: str, status_code: Optional[int], headers=None):
+        """Update the host after a response (status_code None for a timeout or connection error)"""
+        now = time.time()
+        limited_until = _rate_limited_until(status_code, headers or {}, now)
+        failed = status_code is None or status_code in FAILURE_STATUSES
+        with self._lock:
+            if not failed and limited_until is None:
+                self._hosts.pop(host, None)
+                return
+            state = self._hosts.setdefault(host, _HostState())
+            state.probing = False
+            blocked_until = now
+            if failed:
+                state.failures += 1
+                backoff = min(self.base_backoff * 2 ** (state.failures - 1), self.max_backoff)
+                # Jitter, so hosts that failed together do not all retry at the same moment
+                blocked_until = now + backoff * random.uniform(0.8, 1.2)
+                if state.failures >= self.failure_threshold:
+                    cooldown = min(self.open_seconds * 2 ** state.opened, self.max_open_seconds)
+                    state.opened += 1
+                    blocked_until = max(blocked_until, now + cooldown)
+                    print(f"🔌 {host} failed {state.failures} times in a row; skipping it for {cooldown:.0f}s")
+            else:
+                # Answered fine, but that was the last request the rate limit allows
+                state.failures = state.opened = 0
+            if limited_until is not None:
+                blocked_until = max(blocked_until, limited_until)
+            state.blocked_until = max(state.blocked_until, blocked_until)
+
+    def release(self, host: str):
+        """Free a half-open host's probe after a request that failed for reasons of our own"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.probing = False
+
+    def status(self) -> Dict[str, Dict]:
+        """Hosts currently in trouble, for logs and the health endpoint"""
+        now = time.time()
+        with self._lock:
+            return {host: {'failures': state.failures, 'open': bool(state.opened),
+                           'retry_in': max(0, round(state.blocked_until - now))}
+                    for host, state in self._hosts.items()}
+
+
+def _rate_limited_until(status_code: Optional[int], headers, now: float) -> Optional[float]:
+    """When the server said to come back, from Retry-After or an exhausted rate limit"""
+    retry_after = headers.get('Retry-After')
+    if retry_after and status_code in (429, 503, 403):
+        if retry_after.strip().isdigit():
+            return now + int(retry_after)
+        try:
+            return email.utils.parsedate_to_datetime(retry_after).timestamp()
+        except (TypeError, ValueError):
+            pass
+    # GitHub: X-RateLimit-Reset is an epoch; the IETF RateLimit-Reset header is seconds from now
+    if headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset', '').isdigit():
+        return float(headers['X-RateLimit-Reset'])
+    if headers.get('RateLimit-Remaining') == '0' and headers.get('RateLimit-Reset', '').isdigit():
+        return now + int(headers['RateLimit-Reset'])
+    return None
+
+
+health = HostHealth()
+
+
+def configure(failure_threshold: int = 3, max_backoff: float = 900.0, open_seconds: float = 300.0) -> HostHealth:
+    """Replace the shared host health tracker"""
+    global health
+    health = HostHealth(failure_threshold=failure_threshold, max_backoff=max_backoff, open_seconds=open_seconds)
+    return health
+
+
+class FetchResult:
+    __slots__ = ('url', 'status_code', 'headers', 'content', 'encoding', 'skipped', 'truncated', 'stopped')
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes = b'', encoding: Optional[str] = None,
+                 skipped: Optional[str] = None, truncated: bool = False, stopped: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        # Why the body was not read at all ('content-type' or 'too large'), else None
+        self.skipped = skipped
+        # Read up to max_bytes only / ended early by on_chunk
+        self.truncated = truncated
+        self.stopped = stopped
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and not self.skipped
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def fetch(session: requests.Session, url: str, timeout: float = 10, max_bytes: int = DEFAULT_MAX_BYTES,
+          content_types: Optional[Tuple[str, ...]] = TEXT_TYPES,
+          on_chunk: Optional[Callable[[bytes], bool]] = None, method: str = 'GET', **kwargs) -> FetchResult:
+    """GET (or method) url reading at most max_bytes of a text-like body; on_chunk returning True stops the download"""
+    host = urlparse(url).netloc.lower()
+    # The query string is left out of the trace: it can carry API keys
+    with tracing.span(f"{method} {host}", kind=tracing.SPAN_KIND_CLIENT, **{
+            'http.request.method': method, 'server.address': host, 'url.full': url.split('?', 1)[0]}) as span:
+        result = _fetch(session, url, host, timeout, max_bytes, content_types, on_chunk, method, **kwargs)
+        span.set('http.response.status_code', result.status_code)
+        span.set('http.response.body.size', len(result.content))
+        span.add('http.requests', 1)
+        span.add('bytes.fetched', len(result.content))
+        if result.skipped or result.truncated or result.stopped:
+            span.set('http.body.cut', result.skipped or ('truncated' if result.truncated else 'stopped'))
+        if result.status_code >= 400:
+            span.error(f"HTTP {result.status_code}")
+        return result
+
+
+def _fetch(session, url, host, timeout, max_bytes, content_types, on_chunk, method, **kwargs) -> FetchResult:
+    health.before_request(host)
+    try:
+        result = _read(session, url, timeout, max_bytes, content_types, on_chunk, method, **kwargs)
+    except (requests.RequestException, OSError):
+        # Timeouts, refused connections and bodies cut off mid-read count against the host like a 5xx
+        health.record(host, None)
+        raise
+    except BaseException:
+        # Not the host's fault, but a half-open host would otherwise stay marked as probing for good
+        health.release(host)
+        raise
+    health.record(host, result.status_code, result.headers)
+    return result
+
+
+def _read(session, url, timeout, max_bytes, content_types, on_chunk, method, **kwargs) -> FetchResult:
+    response = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+    with response:
+        result = FetchResult(url, response.status_code, response.headers, encoding=response.encoding)
+
+        content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_types and content_type and content_type not in content_types:
+            result.skipped = 'content-type'
+            return result
+        try:
+            declared = int(response.headers.get('Content-Length', 0))
+        except ValueError:
+            declared = 0
+        if declared > max_bytes:
+            result.skipped = 'too large'
+            return result
+
+        body = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if len(body) + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - len(body)]
+                result.truncated = True
+            body += chunk
+            if on_chunk is not None and on_chunk(chunk):
+                result.stopped = True
+                break
+            if result.truncated:
+                break
+        # Leaving the with-block early drops the connection instead of draining the rest
+        result.content = bytes(body)
+    return result
@@ -1,12 +1,25 @@
+import os
 import requests
 import time
 import asyncio
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 import json
 import re
 
+import html_parsing
+import http_client
+import parse_pool
+import tracing
+from records import Lead
+
+def _epoch_seconds(timestamp) -> float:
+    """'2024-05-01T12:00:00Z' -> epoch seconds; 0 when missing or malformed"""
+    try:
+        return datetime.fromisoformat(str(timestamp).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return 0.0
+
 class JobScraper:
     def __init__(self, config):
         self.config = config
@@ -45,15 +58,21 @@ class JobScraper:
         
         return has_hiring and has_keywords
 
-class RedditScraper(JobScraper):
+    def iter_jobs(self):
+        """Yield jobs one at a time as each page is fetched and parsed"""
+        raise NotImplementedError
+
     def get_jobs(self):
-        jobs = []
+        return list(self.iter_jobs())
+
+class RedditScraper(JobScraper):
+    def iter_jobs(self):
         subreddits = ['forhire', 'freelance', 'remotework', 'jobsearch', 'hiring', 'startups']
         
         for subreddit in subreddits:
             try:
                 url = f"https://www.reddit.com/r/{subreddit}/new.json?limit=50"
-                response = self.session.get(url)
+                response = http_client.fetch(self.session, url)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -63,71 +82,227 @@ class RedditScraper(JobScraper):
                         if (self.is_recent_post(post_data['created_utc']) and 
                             self.filter_hiring_post(post_data['title'], post_data.get('selftext', ''))):
                             
-                            jobs.append({
-                                'platform': 'Reddit',
-                                'source': f"r/{subreddit}",
-                                'title': post_data['title'],
-                                'author': post_data['author'],
-                                'content': post_data.get('selftext', '')[:500],
-                                'url': f"https://reddit.com{post_data['permalink']}",
-                                'created_at': datetime.fromtimestamp(post_data['created_utc']).isoformat()
-                            })
+                            yield Lead(
+                                platform='Reddit',
+                                source=f"r/{subreddit}",
+                                title=post_data['title'],
+                                author=post_data['author'],
+                                content=post_data.get('selftext', '')[:500],
+                                url=f"https://reddit.com{post_data['permalink']}",
+                                created_at=datetime.fromtimestamp(post_data['created_utc']).isoformat()
+                            )
                 
-                time.sleep(2)
+                tracing.sleep(2)
             except Exception as e:
                 print(f"Reddit error for r/{subreddit}: {e}")
-        
-        return jobs
 
 class GitHubScraper(JobScraper):
-    def get_jobs(self):
-        jobs = []
-        queries = [
-            'hiring backend developer',
-            'looking for node.js developer', 
-            'remote software engineer',
-            'full stack developer position',
-            'python developer job'
-        ]
-        
+    """Hiring issues from GitHub search, fetching only what was created since the last scan
+
+    With a token, every query goes out in one GraphQL request that asks for
+    just the fields a lead needs, and the request's rate-limit cost is
+    tracked. Without one (GraphQL needs auth), each query is a REST search
+    sent with If-None-Match, so an unchanged result costs a 304. Either way
+    each query carries a created:> qualifier from the newest issue it has
+    returned before, kept in config.github_state_file. Results come oldest
+    first and are paged through, so a busy query never skips the issues that
+    did not fit on its first page: whatever is left over after MAX_PAGES
+    starts the next scan.
+    """
+    GRAPHQL_URL = 'https://api.github.com/graphql'
+    SEARCH_URL = 'https://api.github.com/search/issues'
+    QUERIES = [
+        'hiring backend developer',
+        'looking for node.js developer',
+        'remote software engineer',
+        'full stack developer position',
+        'python developer job'
+    ]
+    PER_QUERY = 30
+    MAX_PAGES = 10  # Per query and scan; a longer backlog is picked up by the next scans
+    MAX_AGE_DAYS = 30
+    ISSUE_FIELDS = 'title url createdAt body author { login } repository { name }'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.state_path = config.github_state_file
+        self.state = self._load_state()
+
+    def iter_jobs(self):
+        searches = {query: self._search_terms(query) for query in self.QUERIES}
+        items = None
+        if self.config.github_token:
+            items = self._search_graphql(searches)
+        if items is None:
+            items = self._search_rest(searches)
+
+        newest = {}
+        for query, item in items:
+            created_at = item['created_at']
+            newest[query] = max(newest.get(query, created_at), created_at)
+            if (self.is_recent_post(created_at) and
+                    self.filter_hiring_post(item['title'], item.get('body') or '')):
+                yield Lead(
+                    platform='GitHub',
+                    source=item['repository'],
+                    title=item['title'],
+                    author=item['author'],
+                    content=(item.get('body') or '')[:500],
+                    url=item['html_url'],
+                    created_at=created_at
+                )
+        # Recorded only once everything new has been handed on
+        self.state.setdefault('since', {}).update(newest)
+        self._save_state()
+
+    def _search_terms(self, query):
+        since = self.state.get('since', {}).get(query)
+        if not since:
+            since = (datetime.now(timezone.utc) - timedelta(days=self.MAX_AGE_DAYS)).strftime('%Y-%m-%d')
+        return f"{query} is:issue created:>{since}"
+
+    def _search_graphql(self, searches):
+        """[(query, item)] from batched GraphQL requests; None when the first fails and REST should be tried"""
+        items = []
+        # alias -> (query, cursor of the next page); the queries with more results go again, up to MAX_PAGES
+        pending = {f"q{i}": (query, None) for i, query in enumerate(searches)}
+        data = None
+        for _ in range(self.MAX_PAGES):
+            rate = self.state.get('rate_limit') or {}
+            if rate.get('remaining', 1) < rate.get('cost', 1) and time.time() < rate.get('reset_at', 0):
+                print(f"⏳ GitHub GraphQL budget spent until {datetime.fromtimestamp(rate['reset_at']):%H:%M}")
+                break
+            data = self._graphql_page(searches, pending)
+            if data is None:
+                break
+            next_pending = {}
+            for alias, (query, _) in pending.items():
+                results = data.get(alias) or {}
+                for node in results.get('nodes') or []:
+                    if not node:  # Pull requests and other non-issue results come back empty
+                        continue
+                    items.append((query, {
+                        'title': node['title'],
+                        'body': node.get('body'),
+                        'author': (node.get('author') or {}).get('login', 'ghost'),
+                        'repository': (node.get('repository') or {}).get('name', 'Unknown'),
+                        'html_url': node['url'],
+                        'created_at': node['createdAt'],
+                    }))
+                page_info = results.get('pageInfo') or {}
+                if page_info.get('hasNextPage') and page_info.get('endCursor'):
+                    next_pending[alias] = (query, page_info['endCursor'])
+            pending = next_pending
+            if not pending:
+                break
+        else:
+            print(f"GitHub GraphQL: {len(pending)} queries have more than {self.MAX_PAGES} pages; "
+                  f"the rest is fetched next scan")
+        # Nothing fetched at all (first request failed or no budget): let REST search try
+        return items if items or data is not None else None
+
+    def _graphql_page(self, searches, pending):
+        """One request for the next page of every pending query; the response's data, or None on failure"""
+        declarations = ', '.join(f"${alias}: String!, ${alias}_after: String" for alias in pending)
+        fields = ' '.join(f"{alias}: search(query: ${alias}, type: ISSUE, first: {self.PER_QUERY}, "
+                          f"after: ${alias}_after) {{ ...hits }}" for alias in pending)
+        document = (f"query({declarations}) {{ rateLimit {{ cost remaining resetAt }} {fields} }} "
+                    f"fragment hits on SearchResultItemConnection {{ pageInfo {{ hasNextPage endCursor }} "
+                    f"nodes {{ ... on Issue {{ {self.ISSUE_FIELDS} }} }} }}")
+        variables = {}
+        for alias, (query, cursor) in pending.items():
+            # Oldest first, so everything up to the newest issue returned has been seen
+            variables[alias] = f"{searches[query]} sort:created-asc"
+            variables[f"{alias}_after"] = cursor
+        try:
+            response = http_client.fetch(self.session, self.GRAPHQL_URL, method='POST',
+                                         json={'query': document, 'variables': variables},
+                                         headers={'Authorization': f"bearer {self.config.github_token}"})
+            data = response.json() if response.status_code == 200 else {}
+        except Exception as e:
+            print(f"GitHub GraphQL error: {e}")
+            return None
+        if not data.get('data'):
+            errors = '; '.join(error.get('message', '') for error in data.get('errors', [])) or response.status_code
+            print(f"GitHub GraphQL error: {errors}")
+            return None
+
+        rate = data['data'].get('rateLimit') or {}
+        if rate:
+            self.state['rate_limit'] = {'cost': rate.get('cost', 1), 'remaining': rate.get('remaining', 0),
+                                        'reset_at': _epoch_seconds(rate.get('resetAt'))}
+            print(f"GitHub GraphQL: {len(pending)} searches for {rate.get('cost')} point(s), "
+                  f"{rate.get('remaining')} left")
+        return data['data']
+
+    def _search_rest(self, searches):
         headers = {'Accept': 'application/vnd.github.v3+json'}
         if self.config.github_token:
             headers['Authorization'] = f"token {self.config.github_token}"
-        
-        for query in queries:
+        etags = self.state.setdefault('etags', {})
+
+        for query, terms in searches.items():
             try:
-                url = f"https://api.github.com/search/issues?q={query}&sort=created&order=desc&per_page=30"
-                response = self.session.get(url, headers=headers)
-                
-                if response.status_code == 200:
+                for page in range(1, self.MAX_PAGES + 1):
+                    # Oldest first, so everything up to the newest issue returned has been seen
+                    params = {'q': terms, 'sort': 'created', 'order': 'asc', 'per_page': self.PER_QUERY, 'page': page}
+                    conditional = dict(headers)
+                    cached = etags.get(query)
+                    if page == 1 and cached and cached.get('q') == terms:
+                        conditional['If-None-Match'] = cached['etag']
+                    response = http_client.fetch(self.session, self.SEARCH_URL, params=params, headers=conditional)
+                    if response.status_code != 200:
+                        break
+
+                    if page == 1 and response.headers.get('ETag'):
+                        etags[query] = {'q': terms, 'etag': response.headers['ETag']}
                     data = response.json()
                     for item in data['items']:
-                        if (self.is_recent_post(item['created_at']) and 
-                            self.filter_hiring_post(item['title'], item.get('body', ''))):
-                            
-                            jobs.append({
-                                'platform': 'GitHub',
-                                'source': item.get('repository_url', 'Unknown').split('/')[-1],
-                                'title': item['title'],
-                                'author': item['user']['login'],
-                                'content': (item.get('body') or '')[:500],
-                                'url': item['html_url'],
-                                'created_at': item['created_at']
-                            })
-                
-                time.sleep(1)
+                        yield query, {
+                            'title': item['title'],
+                            'body': item.get('body'),
+                            'author': item['user']['login'],
+                            'repository': item.get('repository_url', 'Unknown').split('/')[-1],
+                            'html_url': item['html_url'],
+                            'created_at': item['created_at'],
+                        }
+                    if len(data['items']) < self.PER_QUERY or page * self.PER_QUERY >= data.get('total_count', 0):
+                        break
+                    tracing.sleep(1)
+
+                tracing.sleep(1)
             except Exception as e:
                 print(f"GitHub error for query '{query}': {e}")
-        
-        return jobs
+
+    def _load_state(self):
+        if not self.state_path:
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠ Ignoring unreadable {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        try:
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"Error saving {self.state_path}: {e}")
 
 class HackerNewsScraper(JobScraper):
-    def get_jobs(self):
-        jobs = []
+    def iter_jobs(self):
         try:
             # Get "Who is hiring" posts
             url = "https://hacker-news.firebaseio.com/v0/item/39217901.json"  # Latest who is hiring
-            response = self.session.get(url)
+            response = http_client.fetch(self.session, url)
             
             if response.status_code == 200:
                 data = response.json()
@@ -135,71 +310,55 @@ class HackerNewsScraper(JobScraper):
                     for kid_id in data['kids'][:50]:  # Limit to first 50 comments
                         try:
                             comment_url = f"https://hacker-news.firebaseio.com/v0/item/{kid_id}.json"
-                            comment_response = self.session.get(comment_url)
+                            comment_response = http_client.fetch(self.session, comment_url)
                             
                             if comment_response.status_code == 200:
                                 comment_data = comment_response.json()
                                 comment_text = comment_data.get('text', '')
                                 
                                 if self.filter_hiring_post(comment_text):
-                                    jobs.append({
-                                        'platform': 'HackerNews',
-                                        'source': 'Who is Hiring',
-                                        'title': 'HN Job Post',
-                                        'author': comment_data.get('by', 'Unknown'),
-                                        'content': comment_text[:500],
-                                        'url': f"https://news.ycombinator.com/item?id={kid_id}",
-                                        'created_at': datetime.fromtimestamp(comment_data.get('time', 0)).isoformat()
-                                    })
+                                    yield Lead(
+                                        platform='HackerNews',
+                                        source='Who is Hiring',
+                                        title='HN Job Post',
+                                        author=comment_data.get('by', 'Unknown'),
+                                        content=comment_text[:500],
+                                        url=f"https://news.ycombinator.com/item?id={kid_id}",
+                                        created_at=datetime.fromtimestamp(comment_data.get('time', 0)).isoformat()
+                                    )
                             
-                            time.sleep(0.5)
-                        except:
+                            tracing.sleep(0.5)
+                        except Exception:
                             continue
         except Exception as e:
             print(f"HackerNews error: {e}")
-        
-        return jobs
 
 class AngelListScraper(JobScraper):
-    def get_jobs(self):
-        jobs = []
+    def iter_jobs(self):
         try:
             # AngelList job search (simplified)
             search_terms = ['backend', 'frontend', 'fullstack', 'python', 'javascript']
             
             for term in search_terms:
                 url = f"https://angel.co/jobs?keywords={term}&remote=true"
-                response = self.session.get(url)
+                response = http_client.fetch(self.session, url)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
                     # Parse job listings (this would need to be updated based on current AngelList structure)
-                    job_cards = soup.find_all('div', class_='job-card')  # Example selector
-                    
-                    for card in job_cards[:10]:
-                        try:
-                            title_elem = card.find('h3')
-                            company_elem = card.find('h4')
-                            
-                            if title_elem and company_elem:
-                                jobs.append({
-                                    'platform': 'AngelList',
-                                    'source': company_elem.text.strip(),
-                                    'title': title_elem.text.strip(),
-                                    'author': company_elem.text.strip(),
-                                    'content': 'Remote job opportunity',
-                                    'url': f"https://angel.co/jobs/{term}",
-                                    'created_at': datetime.now().isoformat()
-                                })
-                        except:
-                            continue
+                    for title, company in parse_pool.parse(html_parsing.parse_angellist_jobs, response.content, limit=10):
+                        yield Lead(
+                            platform='AngelList',
+                            source=company,
+                            title=title,
+                            author=company,
+                            content='Remote job opportunity',
+                            url=f"https://angel.co/jobs/{term}",
+                            created_at=datetime.now().isoformat()
+                        )
                 
-                time.sleep(2)
+                tracing.sleep(2)
         except Exception as e:
             print(f"AngelList error: {e}")
-        
-        return jobs
 
 class JobAggregator:
     def __init__(self, config):
@@ -211,15 +370,20 @@ class JobAggregator:
             AngelListScraper(config)
         ]
     
+    def sources(self):
+        """Map each scraper name to its job generator for the streaming pipeline"""
+        return {scraper.__class__.__name__: scraper.iter_jobs for scraper in self.scrapers}
+    
     def get_all_jobs(self):
         all_jobs = []
         
         for scraper in self.scrapers:
-            try:
-                jobs = scraper.get_jobs()
-                all_jobs.extend(jobs)
-                print(f"Found {len(jobs)} jobs from {scraper.__class__.__name__}")
-            except Exception as e:
-                print(f"Error in {scraper.__class__.__name__}: {e}")
+            with tracing.span(f"source {scraper.__class__.__name__}"):
+                try:
+                    jobs = scraper.get_jobs()
+                    all_jobs.extend(jobs)
+                    print(f"Found {len(jobs)} jobs from {scraper.__class__.__name__}")
+                except Exception as e:
+                    print(f"Error in {scraper.__class__.__name__}: {e}")
         
         return all_jobs
@@ -0,0 +1,144 @@
+"""
+Lead scoring and the outreach priority queue
+
+With a hard daily email budget, which leads get contacted matters more than
+how many are found. LeadScorer rates a lead on
+
+    keyword hits      configured keywords in the title (x2) and the post
+    source            how often a platform's posts turn into real replies
+    email quality     a named person at the company beats a role or free-mail
+                      address; a post with no address at all cannot be contacted
+    recency           halves every half_life_days since the post was made
+
+and LeadQueue keeps the new leads in a heap ordered by that score, so an
+outreach batch takes the best k leads in O(k log n) instead of sorting or
+scanning every new lead.
+
+Recency decays exponentially, so score = static * 2^(-age / half_life) and
+log2(score) = log2(static) + created / half_life - now / half_life. The last
+term is the same for every lead, so ordering by log2(static) + created /
+half_life stays correct as time passes: priorities are computed once, when a
+lead is added, and never need updating.
+"""
+
+import heapq
+import math
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from html_parsing import EMAIL_RE
+
+# Relative chance that a platform's hiring post leads to a reply
+SOURCE_RELIABILITY: Dict[str, float] = {
+    'HackerNews': 1.0,
+    'AngelList': 0.9,
+    'GitHub': 0.8,
+    'Discord': 0.7,
+    'Reddit': 0.5,
+}
+DEFAULT_RELIABILITY = 0.6
+
+FREE_MAIL_DOMAINS = frozenset((
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com',
+    'icloud.com', 'aol.com', 'proton.me', 'protonmail.com', 'gmx.com', 'yandex.com',
+))
+HIRING_MAILBOXES = frozenset(('jobs', 'careers', 'career', 'hiring', 'recruiting', 'recruitment', 'talent', 'hr'))
+GENERIC_MAILBOXES = frozenset(('info', 'contact', 'hello', 'team', 'office', 'admin', 'support', 'sales'))
+NO_REPLY_MARKERS = ('noreply', 'no-reply', 'donotreply', 'do-not-reply', 'mailer-daemon', 'postmaster')
+
+
+def email_quality(email: str) -> float:
+    """0 (never answered) to 1 (a person at the company)"""
+    local, _, domain = email.lower().rpartition('@')
+    if not local or any(marker in local for marker in NO_REPLY_MARKERS):
+        return 0.0
+    if local in HIRING_MAILBOXES:
+        return 0.9
+    if domain in FREE_MAIL_DOMAINS:
+        return 0.7
+    if local in GENERIC_MAILBOXES:
+        return 0.5
+    return 1.0
+
+
+def _epoch(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        # Naive timestamps are the bot's own local time (datetime.now().isoformat())
+        return moment.timestamp()
+    return moment.astimezone(timezone.utc).timestamp()
+
+
+class LeadScorer:
+    def __init__(self, keywords: List[str], half_life_days: float = 7, max_keyword_hits: int = 5):
+        self.keywords = [keyword.lower() for keyword in keywords or []]
+        self.half_life = half_life_days * 86400
+        self.max_keyword_hits = max_keyword_hits
+
+    def static_score(self, lead) -> float:
+        """Everything but recency; 0 when the lead cannot be contacted"""
+        content = lead.get('content', '') or ''
+        # Most posts carry no address; skip the regex for them
+        emails = EMAIL_RE.findall(content) if '@' in content else ()
+        best_email = max((email_quality(email) for email in emails), default=0.0)
+        if not best_email:
+            return 0.0
+
+        title = (lead.get('title', '') or '').lower()
+        content = content.lower()
+        hits = sum(2 if keyword in title else 1 for keyword in self.keywords if keyword in title or keyword in content)
+        relevance = 1 + min(hits, 2 * self.max_keyword_hits) / 2
+
+        return relevance * SOURCE_RELIABILITY.get(lead.get('platform'), DEFAULT_RELIABILITY) * best_email
+
+    def priority(self, lead) -> Optional[float]:
+        """Heap key, comparable between leads at any later time; None when the lead cannot be contacted"""
+        static = self.static_score(lead)
+        if static <= 0:
+            return None
+        created = _epoch(lead.get('created_at')) or _epoch(lead.get('timestamp')) or 0.0
+        return math.log2(static) + created / self.half_life
+
+    def score(self, lead, now: Optional[float] = None) -> float:
+        """The lead's score right now (for display; ordering uses priority)"""
+        priority = self.priority(lead)
+        if priority is None:
+            return 0.0
+        now = datetime.now().timestamp() if now is None else now
+        return 2 ** (priority - now / self.half_life)
+
+
+class LeadQueue:
+    """Max-heap of lead ids by priority, with entries of contacted leads dropped as they surface"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def build(self, entries):
+        """Replace the contents with (priority, lead_id) pairs in O(n)"""
+        self._heap = [(-priority, lead_id) for priority, lead_id in entries]
+        heapq.heapify(self._heap)
+
+    def push(self, lead_id: int, priority: float):
+        heapq.heappush(self._heap, (-priority, lead_id))
+
+    def top(self, k: int, is_pending: Callable[[int], bool]) -> List[int]:
+        """The k best lead ids still pending, best first; they stay queued until is_pending says otherwise"""
+        taken = []
+        while self._heap and len(taken) < k:
+            entry = heapq.heappop(self._heap)
+            if is_pending(entry[1]):
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [lead_id for _, lead_id in taken]
@@ -9,9 +9,18 @@ from config import CONFIG, EMAIL_CONFIG, PERSONAL_INFO
 from job_sources import JobAggregator
 from company_finder import CompanyOutreachManager
 from email_manager import EmailSender
+from email_templates import TEMPLATES_DIR, TemplateLibrary
 from data_manager import LeadManager
 from discord_monitor import DiscordJobMonitor
 from health_check import start_health_server
+from pipeline import StreamingPipeline
+import http_client
+import parse_pool
+import tracing
+from work_queue import EnrichmentQueue
+from enrichment_worker import start_workers
+from mx_check import MXResolver
+from lead_scoring import email_quality
 
 class JobHuntingBot:
     def __init__(self):
@@ -19,11 +28,29 @@ class JobHuntingBot:
         self.email_config = EMAIL_CONFIG
         self.personal_info = PERSONAL_INFO
         
+        # Spans for every job, source, enrichment step and request, when a trace file is set
+        tracing.configure(self.config.trace_file)
+        # Page parsing runs in its own processes so it doesn't compete with fetching for the GIL
+        parse_pool.configure(self.config.parse_workers, chunksize=self.config.parse_chunksize)
+        # Hosts that rate-limit, block or fail are backed off and skipped instead of retried every scan
+        http_client.configure(failure_threshold=self.config.host_failure_threshold,
+                              max_backoff=self.config.host_max_backoff_seconds,
+                              open_seconds=self.config.host_open_seconds)
+        
         self.data_manager = LeadManager(self.config)
         self.job_aggregator = JobAggregator(self.config)
         self.company_manager = CompanyOutreachManager(self.config)
-        self.email_sender = EmailSender(self.email_config, self.personal_info)
+        self.email_sender = EmailSender(self.email_config, self.personal_info,
+                                        templates=TemplateLibrary(self.config.email_templates_dir or TEMPLATES_DIR))
         self.discord_monitor = DiscordJobMonitor(self.config, self.handle_discord_job)
+        # In queue mode, enrichment runs in worker processes and results are collected back here
+        self.enrichment_queue = EnrichmentQueue(self.config.enrichment_queue_file,
+                                                lease_seconds=self.config.enrichment_lease_seconds) \
+            if self.config.enrichment_queue else None
+        self.enrichment_workers = []
+        # Recipient domains are checked for mail servers before anything is sent
+        self.mx_resolver = MXResolver(self.config.dns_nameservers, timeout=self.config.dns_timeout) \
+            if self.config.check_email_domains else None
         
         self.data_manager.load_data()
         self.email_sender.load_stats()
@@ -32,79 +59,198 @@ class JobHuntingBot:
         if self.data_manager.add_lead(job_data):
             print(f"✓ New Discord job: {job_data['title'][:50]}")
 
+    @tracing.traced('bot.scan_job_sources', report=True)
     def scan_job_sources(self):
         print(f"\n🔍 Starting job scan at {datetime.now().strftime('%H:%M:%S')}")
         
-        jobs = self.job_aggregator.get_all_jobs()
-        new_jobs = 0
-        
-        for job in jobs:
-            if self.data_manager.add_lead(job):
-                new_jobs += 1
+        # Leads are deduplicated and persisted while the slower sources are still scanning
+        pipeline = StreamingPipeline(
+            sources=self.job_aggregator.sources(),
+            sink=self.data_manager.add_lead,
+            key=lambda job: job['url'],
+            buffer_size=self.config.pipeline_buffer_size
+        )
+        stats = pipeline.run_sync()
         
-        print(f"✓ Job scan complete: {new_jobs} new jobs found")
+        print(f"✓ Job scan complete: {stats['persisted']} new jobs found")
         self.print_quick_stats()
 
+    @tracing.traced('bot.discover_companies', report=True)
     def discover_companies(self):
         print(f"\n🏢 Starting company discovery at {datetime.now().strftime('%H:%M:%S')}")
         
-        # Find companies from all sources
-        companies = self.company_manager.find_all_companies()
-        
-        # Extract real emails from their websites
-        print(f"📧 Extracting real emails from {len(companies)} companies...")
-        enriched_companies = self.company_manager.extract_real_emails(companies)
+        if self.enrichment_queue:
+            self.queue_companies()
+            return
         
-        # Filter companies that have real emails
-        companies_with_emails = [c for c in enriched_companies if c.get('email_count', 0) > 0]
+        totals = {'emails': 0}
+        saved = []
         
-        new_companies = 0
-        for company in companies_with_emails:
+        def save_company(company):
             if self.data_manager.add_company(company):
-                new_companies += 1
+                totals['emails'] += company.get('email_count', 0)
+                saved.append(company)
+                return True
+            return False
         
-        total_emails = sum(c.get('email_count', 0) for c in companies_with_emails)
-        print(f"✓ Company discovery complete: {new_companies} new companies, {total_emails} real emails found")
+        def enrich_company(company):
+            company = self.company_manager.enrich_company(company)
+            if not company.get('email_count', 0):
+                # Remembered so the next runs skip the crawl until the recheck interval passes
+                self.data_manager.record_checked_company(company)
+            return company
+        
+        # Find companies from all sources and extract real emails from their websites as they arrive
+        pipeline = StreamingPipeline(
+            sources=self.company_manager.sources(),
+            sink=save_company,
+            # Companies known from earlier runs are dropped before the expensive enrichment crawl
+            skip=self.data_manager.is_known_company,
+            parse=enrich_company,
+            # Keep only companies that have real emails
+            filters=[lambda company: company.get('email_count', 0) > 0],
+            key=self.company_manager.company_key,
+            buffer_size=self.config.pipeline_buffer_size
+        )
+        stats = pipeline.run_sync()
+        dropped = self.check_company_domains(saved)
+        
+        print(f"✓ Company discovery complete: {stats['persisted']} new companies, {totals['emails']} real emails found, "
+              f"{dropped} to domains without mail servers, {stats['known']} already known")
 
+    def queue_companies(self):
+        """Discovery in queue mode: new companies go to the enrichment workers instead of being crawled here"""
+        self.collect_enrichment_results()
+        
+        key = self.company_manager.company_key
+        pipeline = StreamingPipeline(
+            sources=self.company_manager.sources(),
+            # False when the domain is already queued or being crawled
+            sink=lambda company: self.enrichment_queue.put(key(company), company),
+            skip=self.data_manager.is_known_company,
+            key=key,
+            buffer_size=self.config.pipeline_buffer_size
+        )
+        stats = pipeline.run_sync()
+        
+        print(f"✓ Company discovery complete: {stats['persisted']} companies queued for enrichment, "
+              f"{stats['duplicates']} duplicates, {stats['known']} already known")
+
+    @tracing.traced('bot.collect_enrichment_results')
+    def collect_enrichment_results(self):
+        """Move companies the workers have finished into LeadManager"""
+        saved = emails = checked = 0
+        companies = []
+        while True:
+            done, failed = self.enrichment_queue.collect()
+            if not done and not failed:
+                break
+            for company in done:
+                if company.get('email_count', 0) > 0:
+                    if self.data_manager.add_company(company):
+                        saved += 1
+                        emails += company['email_count']
+                        companies.append(company)
+                else:
+                    # Remembered so the next runs skip the crawl until the recheck interval passes
+                    self.data_manager.record_checked_company(company)
+                    checked += 1
+            for company in failed:
+                print(f"⚠ Gave up enriching {company.get('name')}: its workers kept failing")
+        
+        if saved or checked:
+            dropped = self.check_company_domains(companies)
+            print(f"✓ Enrichment results: {saved} new companies, {emails} real emails "
+                  f"({dropped} to domains without mail servers), {checked} without emails, "
+                  f"{self.enrichment_queue.outstanding()} still queued")
+    
+    @tracing.traced('dns.check_company_domains')
+    def check_company_domains(self, companies) -> int:
+        """Resolve the email domains of newly saved companies in one batch and drop emails no server takes"""
+        if not self.mx_resolver or not companies:
+            return 0
+        self.mx_resolver.check(email.rpartition('@')[2] for company in companies
+                               for email in company.get('real_emails') or [])
+        dropped = 0
+        for company in companies:
+            emails = company.get('real_emails') or []
+            # Answered from the cache the batch above just filled
+            kept = self.mx_resolver.deliverable(emails)
+            if len(kept) < len(emails):
+                dropped += len(emails) - len(kept)
+                changes = {'real_emails': kept, 'email_count': len(kept)}
+                if not kept:
+                    changes['status'] = 'undeliverable'
+                self.data_manager.update_company(company['id'], **changes)
+        return dropped
+    
+    @tracing.traced('dns.deliverable_emails')
+    def deliverable_emails(self, emails) -> set:
+        """The candidate recipients whose domain can receive mail, checked in one batch"""
+        emails = list(emails)
+        if not self.mx_resolver:
+            return set(emails)
+        kept = self.mx_resolver.deliverable(emails)
+        if len(kept) < len(emails):
+            print(f"🚫 Skipping {len(emails) - len(kept)} emails to domains without mail servers")
+        return set(kept)
+
+    @tracing.traced('bot.process_outreach', report=True)
     def process_outreach(self):
         print(f"\n📧 Processing outreach at {datetime.now().strftime('%H:%M:%S')}")
         
+        # Best-scoring leads first (keywords, source, email quality, recency)
+        new_leads = self.data_manager.get_top_leads(5)  # Limit to 5 per batch
+        companies = self.data_manager.get_companies_for_outreach()[:3]  # Limit to 3 per batch
+        
+        # Try to extract emails from content
+        import re
+        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        lead_emails = [re.findall(email_pattern, lead.get('content', '')) for lead in new_leads]
+        
+        # Every recipient domain of this batch is checked for mail servers before anything is sent
+        deliverable = self.deliverable_emails(
+            [email for emails in lead_emails for email in emails] +
+            [email for company in companies for email in company.get('real_emails') or []]
+        )
+        
         # Job applications
-        new_leads = self.data_manager.get_new_leads()
         job_emails_sent = 0
         
-        for lead in new_leads[:5]:  # Limit to 5 per batch
+        for lead, found_emails in zip(new_leads, lead_emails):
             if not self.email_sender.can_send_email():
                 break
                 
-            # Extract email from job post or use company domain
-            potential_emails = []
-            
-            # Try to extract emails from content
-            import re
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            found_emails = re.findall(email_pattern, lead.get('content', ''))
-            potential_emails.extend(found_emails)
+            # Emails from the job post, most likely to be answered first
+            potential_emails = sorted((email for email in found_emails if email in deliverable),
+                                      key=email_quality, reverse=True)
+            if not potential_emails:
+                # Its only addresses are at domains that take no mail; let the next lead have its place
+                self.data_manager.update_lead(lead['id'], status='undeliverable')
+                continue
             
-            if potential_emails:
-                if self.email_sender.send_job_application(lead, potential_emails[:3]):
-                    self.data_manager.mark_lead_contacted(lead['id'], potential_emails[0])
-                    job_emails_sent += 1
-                    time.sleep(10)
+            if self.email_sender.send_job_application(lead, potential_emails[:3]):
+                self.data_manager.mark_lead_contacted(lead['id'], potential_emails[0])
+                job_emails_sent += 1
+                tracing.sleep(10)
         
         # Company outreach
-        companies = self.data_manager.get_companies_for_outreach()
         company_emails_sent = 0
         
-        for company in companies[:3]:  # Limit to 3 per batch
+        for company in companies:
             if not self.email_sender.can_send_email():
                 break
                 
             if 'real_emails' in company and company['real_emails']:
-                if self.email_sender.send_company_outreach(company, company['real_emails'][:3]):
-                    self.data_manager.mark_company_contacted(company['id'], company['real_emails'][0])
+                emails = [email for email in company['real_emails'] if email in deliverable]
+                if not emails:
+                    # Every domain it lists takes no mail; keep it out of later batches
+                    self.data_manager.update_company(company['id'], status='undeliverable')
+                    continue
+                if self.email_sender.send_company_outreach(company, emails[:3]):
+                    self.data_manager.mark_company_contacted(company['id'], emails[0])
                     company_emails_sent += 1
-                    time.sleep(10)
+                    tracing.sleep(10)
         
         print(f"✓ Outreach complete: {job_emails_sent} job applications, {company_emails_sent} company outreach")
         
@@ -128,6 +274,13 @@ class JobHuntingBot:
             for platform, count in data_stats['leads']['by_platform'].items():
                 print(f"      {platform}: {count}")
 
+        unhealthy = http_client.health.status()
+        if unhealthy:
+            print("   🔌 Hosts backing off:")
+            for host, state in sorted(unhealthy.items(), key=lambda item: -item[1]['retry_in'])[:10]:
+                print(f"      {host}: {state['failures']} failures, retry in {state['retry_in']}s"
+                      f"{' (circuit open)' if state['open'] else ''}")
+
     def print_quick_stats(self):
         data_stats = self.data_manager.get_statistics()
         print(f"   Total leads: {data_stats['leads']['total']} | New: {data_stats['leads']['new']}")
@@ -149,6 +302,10 @@ class JobHuntingBot:
         
         # Data backup daily
         schedule.every().day.at("23:59").do(self.data_manager.save_data)
+        
+        # Enrichment results from the worker processes
+        if self.enrichment_queue:
+            schedule.every(5).minutes.do(self.collect_enrichment_results)
 
     def run_scheduler(self):
         while True:
@@ -170,6 +327,10 @@ class JobHuntingBot:
         # Setup automation
         self.setup_scheduler()
         
+        if self.enrichment_queue and self.config.enrichment_workers > 0:
+            self.enrichment_workers = start_workers(self.config, self.config.enrichment_workers)
+            print(f"👷 Started {len(self.enrichment_workers)} enrichment workers")
+        
         # Start background scheduler
         scheduler_thread = threading.Thread(target=self.run_scheduler, daemon=True)
         scheduler_thread.start()
@@ -197,6 +358,9 @@ class JobHuntingBot:
     def cleanup(self):
         """Clean up resources before exit"""
         print("🧹 Cleaning up...")
+        if self.enrichment_queue:
+            # Workers are daemon processes; anything they hold is re-leased after restart
+            self.collect_enrichment_results()
         self.data_manager.save_data()
         self.email_sender.save_stats()
         self.company_manager.close_drivers()
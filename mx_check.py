@@ -0,0 +1,331 @@
+"""
+Recipient domain checks before outreach
+
+An email to a domain with no mail server bounces, and the bounce still
+costs one of the day's sends. MXResolver asks DNS whether each recipient
+domain can receive mail: an MX record, or failing that an A/AAAA record
+(the implicit MX of RFC 5321). A "null MX" (RFC 7505) or NXDOMAIN means
+the domain takes no mail.
+
+Lookups go straight over UDP with asyncio, so every domain found in a
+discovery run is resolved in one concurrent batch:
+
+    resolver = MXResolver()
+    resolver.check(['example.com', 'no-such-domain.example'])
+    # {'example.com': True, 'no-such-domain.example': False}
+    resolver.deliverable(['a@example.com', 'b@no-such-domain.example'])
+    # ['a@example.com']
+
+Answers are cached for their DNS TTL, and "no such domain" answers for the
+zone's negative TTL (RFC 2308). Timeouts and server failures give None:
+the domain is treated as deliverable, and the failure is cached only
+briefly, so a flaky resolver never blocks outreach.
+"""
+
+import asyncio
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+TYPE_A = 1
+TYPE_SOA = 6
+TYPE_MX = 15
+TYPE_AAAA = 28
+CLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+_HEADER = struct.Struct('!HHHHHH')
+_RR = struct.Struct('!HHIH')
+
+
+def encode_name(name: str) -> bytes:
+    """A domain name in DNS wire format (IDNA-encoded labels)"""
+    wire = bytearray()
+    for label in name.strip('.').split('.'):
+        if label:
+            label = label.encode('idna')
+            wire.append(len(label))
+            wire += label
+    return bytes(wire) + b'\0'
+
+
+def decode_name(message: bytes, offset: int) -> Tuple[str, int]:
+    """(name, offset just after it), following compression pointers"""
+    labels = []
+    end = None
+    for _ in range(128):  # a pointer loop would otherwise never end
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+            continue
+        offset += 1
+        if not length:
+            return '.'.join(labels), end if end is not None else offset
+        labels.append(message[offset:offset + length].decode('ascii', 'replace'))
+        offset += length
+    raise ValueError("DNS name compression loop")
+
+
+def build_query(query_id: int, name: str, rtype: int) -> bytes:
+    # Recursion desired, one question
+    return _HEADER.pack(query_id, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack('!HH', rtype, CLASS_IN)
+
+
+class Answer:
+    __slots__ = ('rcode', 'truncated', 'records', 'ttl', 'negative_ttl')
+
+    def __init__(self, rcode: int, truncated: bool, records: List, ttl: Optional[int], negative_ttl: Optional[int]):
+        self.rcode = rcode
+        self.truncated = truncated
+        # Record data of the type asked for: exchange names for MX, raw addresses otherwise
+        self.records = records
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+
+def parse_answer(message: bytes, rtype: int) -> Answer:
+    _, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(message)
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = decode_name(message, offset)[1] + 4
+
+    records, ttls = [], []
+    for _ in range(ancount):
+        offset = decode_name(message, offset)[1]
+        kind, _, ttl, length = _RR.unpack_from(message, offset)
+        offset += _RR.size
+        if kind == rtype:
+            # MX rdata is a preference then the exchange name; a lone "." is a null MX
+            records.append(decode_name(message, offset + 2)[0] if kind == TYPE_MX else message[offset:offset + length])
+            ttls.append(ttl)
+        offset += length
+
+    negative_ttl = None
+    for _ in range(nscount):
+        offset = decode_name(message, offset)[1]
+        kind, _, ttl, length = _RR.unpack_from(message, offset)
+        offset += _RR.size
+        if kind == TYPE_SOA:
+            # Negative answers live for min(SOA TTL, SOA MINIMUM), the last field of the rdata
+            minimum = struct.unpack_from('!I', message, offset + length - 4)[0]
+            negative_ttl = min(ttl, minimum)
+        offset += length
+
+    return Answer(flags & 0x000F, bool(flags & 0x0200), records, min(ttls) if ttls else None, negative_ttl)
+
+
+def system_nameservers(path: str = '/etc/resolv.conf') -> List[str]:
+    try:
+        with open(path) as f:
+            servers = [line.split()[1] for line in f if line.startswith('nameserver') and len(line.split()) > 1]
+    except OSError:
+        servers = []
+    return servers or ['127.0.0.1']
+
+
+def _address(nameserver: str) -> Tuple[str, int]:
+    """'1.1.1.1', '127.0.0.1:5353', '::1' or '[::1]:5353' -> (host, port)"""
+    if nameserver.startswith('['):
+        host, _, port = nameserver[1:].partition(']:')
+        return host.rstrip(']'), int(port or 53)
+    if nameserver.count(':') == 1:
+        host, port = nameserver.split(':')
+        return host, int(port)
+    return nameserver, 53
+
+
+class _Endpoint(asyncio.DatagramProtocol):
+    """One UDP socket to one nameserver, matching replies to queries by ID"""
+
+    def __init__(self):
+        self.transport = None
+        self.pending: Dict[int, Tuple[bytes, asyncio.Future]] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < _HEADER.size:
+            return
+        query_id = struct.unpack_from('!H', data)[0]
+        entry = self.pending.get(query_id)
+        # The question must echo ours, or it is a stale or spoofed reply
+        if entry and data[_HEADER.size:_HEADER.size + len(entry[0])] == entry[0] and not entry[1].done():
+            entry[1].set_result(data)
+
+    def error_received(self, exc):
+        for _, future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def query(self, name: str, rtype: int, timeout: float) -> bytes:
+        query_id = random.randrange(0x10000)
+        while query_id in self.pending:
+            query_id = random.randrange(0x10000)
+        question = encode_name(name) + struct.pack('!HH', rtype, CLASS_IN)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[query_id] = (question, future)
+        try:
+            self.transport.sendto(build_query(query_id, name, rtype))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            del self.pending[query_id]
+
+
+class MXResolver:
+    def __init__(self, nameservers: Optional[Sequence[str]] = None, timeout: float = 2.0, attempts: int = 2,
+                 concurrency: int = 50, min_ttl: int = 60, max_ttl: int = 86400, negative_ttl: int = 3600,
+                 error_ttl: int = 300, max_entries: int = 10000):
+        self.nameservers = [_address(server) for server in (nameservers or system_nameservers())]
+        self.timeout = timeout
+        self.attempts = attempts
+        self.concurrency = concurrency
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        # Used when an NXDOMAIN/no-data answer carries no SOA to take the TTL from
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self._cache: 'OrderedDict[str, Tuple[Optional[bool], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'queries': 0, 'cache_hits': 0, 'timeouts': 0}
+
+    # Public, blocking API for the bot's scheduler thread
+
+    def check(self, domains: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """domain -> True (takes mail), False (no mail servers) or None (lookup failed), resolved in one batch"""
+        domains = list(dict.fromkeys(domain.strip().lower().rstrip('.') for domain in domains if domain))
+        results, missing = {}, []
+        for domain in domains:
+            hit = self._cached(domain)
+            if hit is not None:
+                results[domain] = hit[0]
+            else:
+                missing.append(domain)
+        if missing:
+            results.update(self._run(self.resolve_many(missing)))
+        return results
+
+    def deliverable(self, emails: Iterable[str]) -> List[str]:
+        """The emails whose domain can receive mail (or could not be checked), in order"""
+        emails = list(emails)
+        results = self.check(email.rpartition('@')[2] for email in emails if '@' in email)
+        return [email for email in emails
+                if '@' in email and results.get(email.rpartition('@')[2].strip().lower().rstrip('.')) is not False]
+
+    # Async API
+
+    async def resolve_many(self, domains: Iterable[str]) -> Dict[str, Optional[bool]]:
+        loop = asyncio.get_running_loop()
+        domains = list(dict.fromkeys(domains))
+        endpoints = []
+        try:
+            for server in self.nameservers:
+                try:
+                    _, endpoint = await loop.create_datagram_endpoint(_Endpoint, remote_addr=server)
+                except OSError as e:
+                    # No route, bad address, no network: that server is skipped
+                    print(f"⚠ DNS server {server[0]}:{server[1]} unreachable: {e}")
+                    continue
+                endpoints.append(endpoint)
+            if not endpoints:
+                # Nothing to ask: every domain is unknown, and its emails are kept
+                return dict.fromkeys(domains)
+            limit = asyncio.Semaphore(self.concurrency)
+
+            async def bounded(domain):
+                async with limit:
+                    return domain, await self.resolve(domain, endpoints)
+
+            return dict(await asyncio.gather(*(bounded(domain) for domain in domains)))
+        finally:
+            for endpoint in endpoints:
+                endpoint.transport.close()
+
+    async def resolve(self, domain: str, endpoints: List[_Endpoint]) -> Optional[bool]:
+        hit = self._cached(domain)
+        if hit is not None:
+            return hit[0]
+
+        answer = await self._query(domain, TYPE_MX, endpoints)
+        if answer is not None and answer.rcode == RCODE_NOERROR and not answer.records and not answer.truncated:
+            # No MX: mail goes to the domain's own address, if it has one
+            for rtype in (TYPE_A, TYPE_AAAA):
+                fallback = await self._query(domain, rtype, endpoints)
+                if fallback is None or fallback.rcode != RCODE_NOERROR or fallback.records:
+                    answer = fallback
+                    break
+
+        if answer is None or answer.rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            # Timed out or SERVFAIL/REFUSED: unknown, retried after error_ttl
+            self._store(domain, None, self.error_ttl)
+            return None
+        if answer.records:
+            # A null MX ("." as the only exchange) says the domain accepts no mail
+            result = any(record != '' for record in answer.records) if isinstance(answer.records[0], str) else True
+            self._store(domain, result, answer.ttl)
+            return result
+        if answer.truncated:
+            self._store(domain, None, self.error_ttl)
+            return None
+        self._store(domain, False, answer.negative_ttl if answer.negative_ttl is not None else self.negative_ttl)
+        return False
+
+    async def _query(self, domain: str, rtype: int, endpoints: List[_Endpoint]) -> Optional[Answer]:
+        for attempt in range(self.attempts * len(endpoints)):
+            # Each retry goes to the next nameserver
+            endpoint = endpoints[attempt % len(endpoints)]
+            self.stats['queries'] += 1
+            try:
+                return parse_answer(await endpoint.query(domain, rtype, self.timeout), rtype)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+            except (OSError, ValueError, struct.error, IndexError, UnicodeError):
+                continue
+        return None
+
+    # Cache
+
+    def _cached(self, domain: str) -> Optional[Tuple[Optional[bool], float]]:
+        with self._lock:
+            entry = self._cache.get(domain)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._cache[domain]
+                return None
+            self._cache.move_to_end(domain)
+            self.stats['cache_hits'] += 1
+            return entry
+
+    def _store(self, domain: str, result: Optional[bool], ttl: Optional[int]):
+        ttl = self.error_ttl if result is None else min(max(ttl or 0, self.min_ttl), self.max_ttl)
+        with self._lock:
+            self._cache[domain] = (result, time.time() + ttl)
+            self._cache.move_to_end(domain)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _run(coroutine):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # Called from inside an event loop (the Discord thread): resolve on a thread of our own
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(asyncio.run(coroutine)))
+        thread.start()
+        thread.join()
+        return result
@@ -0,0 +1,98 @@
+"""
+Process pool for the CPU-bound parse step
+
+Fetching runs on threads, but lxml tree building, XPath evaluation and the
+email regexes all need the GIL, so with enough fetches in flight the threads
+end up queueing on parsing. parse() hands raw page bytes to a pool of worker
+processes instead and gets back the parser's compact result (tuples, dicts,
+email strings), so parsing scales with cores while the calling thread only
+waits on the result.
+
+Parsers must be module-level functions (they are sent to the workers by
+reference), which every parser in html_parsing is:
+
+    places = parse_pool.parse(html_parsing.parse_google_maps, response.content, limit=8)
+
+Until configure() is called with workers > 0 everything is parsed inline in
+the calling thread, and pages smaller than inline_below bytes always are -
+shipping them to another process costs more than parsing them.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, List, Optional
+
+
+def _call(parser: Callable, kwargs: dict, markup):
+    return parser(markup, **kwargs)
+
+
+def _warm_up():
+    # Import (and compile the selectors of) html_parsing once per worker, not on the first page
+    import html_parsing  # noqa: F401
+
+
+class ParsePool:
+    def __init__(self, workers: int = 0, chunksize: int = 4, inline_below: int = 16 * 1024):
+        self.workers = workers
+        self.chunksize = chunksize
+        self.inline_below = inline_below
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the bot has scheduler, Discord and fetch threads running
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_warm_up)
+            return self._executor
+
+    def _inline(self, markup) -> bool:
+        return self.workers <= 0 or markup is None or len(markup) < self.inline_below
+
+    def parse(self, parser: Callable, markup, **kwargs):
+        """parser(markup, **kwargs), run in a worker process when the page is big enough"""
+        if self._inline(markup):
+            return parser(markup, **kwargs)
+        return self._get_executor().submit(_call, parser, kwargs, markup).result()
+
+    def parse_many(self, parser: Callable, markups: Iterable, **kwargs) -> List:
+        """parser applied to every page, in order; pages go to the workers chunksize at a time"""
+        markups = list(markups)
+        if self.workers <= 0 or not markups:
+            return [parser(markup, **kwargs) for markup in markups]
+        return list(self._get_executor().map(partial(_call, parser, kwargs), markups, chunksize=self.chunksize))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool = ParsePool()
+atexit.register(lambda: _pool.shutdown())
+
+
+def configure(workers: Optional[int] = None, chunksize: int = 4, inline_below: int = 16 * 1024) -> ParsePool:
+    """Replace the shared pool; workers=None uses one process per core beyond the first, 0 parses inline"""
+    global _pool
+    if workers is None:
+        workers = max(0, (os.cpu_count() or 1) - 1)
+    _pool.shutdown()
+    _pool = ParsePool(workers, chunksize, inline_below)
+    return _pool
+
+
+def parse(parser: Callable, markup, **kwargs):
+    return _pool.parse(parser, markup, **kwargs)
+
+
+def parse_many(parser: Callable, markups: Iterable, **kwargs) -> List:
+    return _pool.parse_many(parser, markups, **kwargs)
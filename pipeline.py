@@ -0,0 +1,237 @@
+"""
+Streaming discovery pipeline
+
+Scrapers are plain generators that yield one result at a time. The pipeline
+drives every source concurrently and pushes each item through
+
+    fetch -> dedupe -> parse -> filter -> persist
+
+with a bounded queue between stages. Dedupe runs on the fetched item, ahead of
+parsing, so a company seen twice in one run is only enriched once; the
+optional `skip` check runs there too, so items already known from earlier
+runs never reach the parse stage. A slow stage applies back-pressure to the
+sources instead of letting results pile up, so the first leads are persisted
+while the other sources are still running and memory stays flat no matter how
+many results come back.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+import tracing
+
+_DONE = object()
+
+
+async def aiter_source(factory: Callable[[], Iterator]) -> AsyncIterator:
+    """Adapt a blocking generator into an async generator.
+
+    Every step of the generator runs on a worker thread so the blocking
+    requests calls inside the scrapers never stall the event loop.
+    """
+    iterator = await asyncio.to_thread(factory)
+    step = None
+    try:
+        while True:
+            # Shielded: cancelling us must not abandon a step still running in its thread
+            step = asyncio.ensure_future(asyncio.to_thread(next, iterator, _DONE))
+            item = await asyncio.shield(step)
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        if step is not None and not step.done():
+            # A generator cannot be closed while next() is executing it, so let that step finish first
+            await asyncio.wait((step,))
+        close = getattr(iterator, 'close', None)
+        if close:
+            await asyncio.to_thread(close)
+
+
+class StreamingPipeline:
+    def __init__(self,
+                 sources: Dict[str, Callable[[], Iterator[Dict]]],
+                 sink: Callable[[Dict], bool],
+                 parse: Optional[Callable[[Dict], Optional[Dict]]] = None,
+                 filters: Iterable[Callable[[Dict], bool]] = (),
+                 key: Optional[Callable[[Dict], Any]] = None,
+                 skip: Optional[Callable[[Dict], bool]] = None,
+                 buffer_size: int = 50,
+                 parse_workers: int = 1):
+        self.sources = sources
+        self.sink = sink
+        self.parse = parse
+        self.filters = list(filters)
+        self.key = key
+        self.skip = skip
+        self.buffer_size = buffer_size
+        self.parse_workers = max(1, parse_workers)
+        self.stats = {}
+
+    def _reset_stats(self):
+        self.stats = {
+            'fetched': 0,
+            'parsed': 0,
+            'filtered': 0,
+            'duplicates': 0,
+            'known': 0,
+            'persisted': 0,
+            'errors': 0,
+            'by_source': {name: 0 for name in self.sources}
+        }
+
+    async def _fetch(self, name: str, factory: Callable[[], Iterator], out_q: asyncio.Queue):
+        count = 0
+        # Set in this task's context, so the source's worker threads see it as their parent span
+        with tracing.span(f"source {name}") as span:
+            items = aiter_source(factory)
+            try:
+                async for item in items:
+                    count += 1
+                    self.stats['fetched'] += 1
+                    await out_q.put(item)
+            except Exception as e:
+                self.stats['errors'] += 1
+                span.error(str(e))
+                print(f"Error in {name}: {e}")
+            finally:
+                # Closes the source's generator now, even when we were cancelled between items
+                try:
+                    await items.aclose()
+                except Exception as e:
+                    print(f"Error closing {name}: {e}")
+                self.stats['by_source'][name] = count
+                span.set('items', count)
+                print(f"Found {count} results from {name}")
+
+    async def _fetch_all(self, out_q: asyncio.Queue):
+        await asyncio.gather(*(self._fetch(name, factory, out_q) for name, factory in self.sources.items()))
+        await out_q.put(_DONE)
+
+    async def _dedupe(self, in_q: asyncio.Queue, out_q: asyncio.Queue):
+        # Only the keys are kept, never the items themselves
+        seen = set()
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                await out_q.put(_DONE)
+                return
+            if self.key:
+                try:
+                    item_key = self.key(item)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"Key error: {e}")
+                    continue
+                if item_key is None or item_key in seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                seen.add(item_key)
+            if self.skip:
+                try:
+                    known = await asyncio.to_thread(self.skip, item)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"Skip check error: {e}")
+                    known = False
+                if known:
+                    self.stats['known'] += 1
+                    continue
+            await out_q.put(item)
+
+    async def _parse_worker(self, in_q: asyncio.Queue, out_q: asyncio.Queue):
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                # Let sibling workers see the end of the stream too
+                await in_q.put(_DONE)
+                return
+            if self.parse:
+                try:
+                    item = await asyncio.to_thread(self.parse, item)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"Parse error: {e}")
+                    continue
+            if item is None:
+                continue
+            self.stats['parsed'] += 1
+            try:
+                accepted = all(accept(item) for accept in self.filters)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Filter error: {e}")
+                continue
+            if not accepted:
+                self.stats['filtered'] += 1
+                continue
+            await out_q.put(item)
+
+    async def _parse(self, in_q: asyncio.Queue, out_q: asyncio.Queue):
+        await asyncio.gather(*(self._parse_worker(in_q, out_q) for _ in range(self.parse_workers)))
+        await out_q.put(_DONE)
+
+    async def _persist(self, in_q: asyncio.Queue, out_q: asyncio.Queue):
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                await out_q.put(_DONE)
+                return
+            try:
+                # The sink may share its storage with other threads (Discord, scheduler); it locks itself
+                if await asyncio.to_thread(self.sink, item):
+                    self.stats['persisted'] += 1
+                    await out_q.put(item)
+                else:
+                    self.stats['duplicates'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Persist error: {e}")
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        """Run the pipeline, yielding each item as soon as it has been persisted"""
+        self._reset_stats()
+        fetched_q = asyncio.Queue(self.buffer_size)
+        unique_q = asyncio.Queue(self.buffer_size)
+        parsed_q = asyncio.Queue(self.buffer_size)
+        persisted_q = asyncio.Queue(self.buffer_size)
+
+        tasks = [
+            asyncio.create_task(self._fetch_all(fetched_q)),
+            asyncio.create_task(self._dedupe(fetched_q, unique_q)),
+            asyncio.create_task(self._parse(unique_q, parsed_q)),
+            asyncio.create_task(self._persist(parsed_q, persisted_q)),
+        ]
+        # A stage that dies never forwards _DONE; fail with its error instead of waiting forever
+        failed = asyncio.get_running_loop().create_future()
+
+        def on_stage_done(task):
+            if not task.cancelled() and task.exception() is not None and not failed.done():
+                failed.set_exception(task.exception())
+
+        for task in tasks:
+            task.add_done_callback(on_stage_done)
+        try:
+            while True:
+                getter = asyncio.ensure_future(persisted_q.get())
+                await asyncio.wait((getter, failed), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    failed.result()
+                item = getter.result()
+                if item is _DONE:
+                    break
+                yield item
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run(self) -> Dict:
+        async for _ in self.stream():
+            pass
+        return self.stats
+
+    def run_sync(self) -> Dict:
+        """Blocking entry point for the scheduler thread"""
+        return asyncio.run(self.run())
@@ -0,0 +1,201 @@
+"""
+Compact record types for leads and companies
+
+Lead and Company are slots dataclasses: no per-instance __dict__, and no key
+strings stored per record. Low-cardinality strings (platform, source, status,
+type) are interned, so a million leads from six platforms share six platform
+strings.
+
+Both types still behave like the dicts they replace (record['url'],
+record.get('content', ''), 'real_emails' in record, record['status'] = ...),
+so existing call sites keep working. Fields that were never set stay absent
+instead of reading as None, which keeps the JSON/CSV output identical to the
+dict-based format. Keys without a slot go to a small `extra` dict.
+"""
+
+import sys
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __bool__(self):
+        return False
+
+
+MISSING: Any = _Missing()
+
+
+class _Record:
+    __slots__ = ()
+
+    # Filled in by _record() once the dataclass exists
+    _FIELDS: tuple = ()
+    _FIELD_SET: frozenset = frozenset()
+    _INTERNED: frozenset = frozenset()
+
+    def __post_init__(self):
+        for name in self._INTERNED:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        try:
+            return cls(**data)
+        except TypeError:
+            pass  # unknown keys, sort them into extra below
+
+        known = {}
+        extra = None
+        for key, value in data.items():
+            if key in cls._FIELD_SET:
+                known[key] = value
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record = cls(**known)
+        record.extra = extra
+        return record
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for name in self._FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self):
+        return replace(self, extra=dict(self.extra) if self.extra else None)
+
+    # Mapping interface, so records can be used wherever a dict was
+    def __getitem__(self, key: str):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in self._FIELD_SET:
+            if key in self._INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return list(self.to_dict())
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+def _record(*interned: str):
+    """Make a slots dataclass and record which of its fields are interned"""
+    def wrap(cls):
+        cls = dataclass(slots=True)(cls)
+        cls._FIELDS = tuple(f.name for f in fields(cls) if f.name != 'extra')
+        cls._FIELD_SET = frozenset(cls._FIELDS)
+        cls._INTERNED = frozenset(interned)
+        return cls
+    return wrap
+
+
+@_record('platform', 'source', 'status')
+class Lead(_Record):
+    platform: str = MISSING
+    source: str = MISSING
+    title: str = MISSING
+    author: str = MISSING
+    content: str = MISSING
+    url: str = MISSING
+    created_at: str = MISSING
+    timestamp: str = MISSING
+    status: str = MISSING
+    id: int = MISSING
+    contacted_email: str = MISSING
+    contacted_at: str = MISSING
+    extra: Optional[Dict] = None
+
+    # Columns of the monthly leads CSV, in the order add_lead fills them
+    CSV_FIELDS = ('platform', 'source', 'title', 'author', 'content', 'url', 'created_at', 'timestamp', 'status', 'id')
+
+    def csv_row(self) -> List:
+        return [self.get(name, '') for name in self.CSV_FIELDS]
+
+    def context_ref(self) -> Dict:
+        """Small reference to this lead for logs, instead of a full copy"""
+        return {'lead_id': self.get('id'), 'platform': self.get('platform'), 'url': self.get('url')}
+
+
+@_record('source', 'type', 'status', 'technology', 'funding', 'batch')
+class Company(_Record):
+    name: str = MISSING
+    website: Optional[str] = MISSING
+    source: str = MISSING
+    type: str = MISSING
+    location: str = MISSING
+    description: str = MISSING
+    phone: Optional[str] = MISSING
+    address: Optional[str] = MISSING
+    query: str = MISSING
+    batch: str = MISSING
+    funding: str = MISSING
+    github_url: str = MISSING
+    followers: str = MISSING
+    technology: str = MISSING
+    trending: bool = MISSING
+    verified: bool = MISSING
+    angellist_url: str = MISSING
+    real_emails: List[str] = MISSING
+    email_count: int = MISSING
+    discovered_at: str = MISSING
+    status: str = MISSING
+    id: int = MISSING
+    contacted_email: str = MISSING
+    contacted_at: str = MISSING
+    extra: Optional[Dict] = None
+
+    def context_ref(self) -> Dict:
+        """Small reference to this company for logs, instead of a full copy"""
+        return {'company_id': self.get('id'), 'name': self.get('name'), 'website': self.get('website')}
+
+
+def as_lead(data) -> Lead:
+    return data if isinstance(data, Lead) else Lead.from_dict(data)
+
+
+def as_company(data) -> Company:
+    return data if isinstance(data, Company) else Company.from_dict(data)
@@ -0,0 +1,157 @@
+"""
+Per-domain site map cache for email crawling
+
+Instead of probing every guessed contact/about/careers path on every crawl,
+each company site is mapped once: robots.txt and the sitemaps it lists (or
+/sitemap.xml) are fetched, and the contact-like pages the sitemap contains
+become the crawl list. Every page fetched is recorded with its status, so a
+path that 404'd is not requested again until missing_ttl_days pass, and a
+site without a sitemap is soon crawled only at the paths that answered. The
+map is kept in SQLite (shared with the enrichment workers) and refreshed once
+it is older than ttl_days.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import html_parsing
+import http_client
+import parse_pool
+
+# Sitemap pages worth crawling for contact emails
+RELEVANT_PATH_RE = re.compile(r'contact|about|career|jobs|team|press|media|support|help|sales|partner|investor|'
+                              r'legal|privacy|terms|imprint|impressum', re.I)
+MISSING_STATUSES = (404, 410)
+
+
+def _path(url: str) -> str:
+    return urlparse(url).path or '/'
+
+
+class SiteMapCache:
+    def __init__(self, path: str = 'site_maps.db', ttl_days: float = 30, missing_ttl_days: float = 7,
+                 max_pages: int = 20, max_sitemaps: int = 3):
+        self.ttl = ttl_days * 86400
+        self.missing_ttl = missing_ttl_days * 86400
+        self.max_pages = max_pages
+        self.max_sitemaps = max_sitemaps
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS sites (
+                               domain TEXT PRIMARY KEY,
+                               robots TEXT NOT NULL,
+                               pages TEXT NOT NULL,
+                               fetched_at REAL NOT NULL)''')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS pages (
+                               domain TEXT NOT NULL,
+                               path TEXT NOT NULL,
+                               status INTEGER NOT NULL,
+                               checked_at REAL NOT NULL,
+                               PRIMARY KEY (domain, path)) WITHOUT ROWID''')
+        self.db.commit()
+
+    def pages_to_check(self, website_url: str, guessed_paths: List[str], session,
+                       user_agent: str = '*') -> Tuple[List[str], float]:
+        """(URLs worth fetching on this site, seconds robots.txt asks between requests)"""
+        parts = urlparse(website_url if '://' in website_url else f"https://{website_url}")
+        base = f"{parts.scheme}://{parts.netloc}"
+        domain = parts.netloc.lower()
+
+        robots_text, sitemap_pages = self._site(domain, base, session)
+        robots = RobotFileParser()
+        robots.parse(robots_text.splitlines())
+        statuses = self._statuses(domain)
+        now = time.time()
+
+        # Pages the sitemap lists are known to exist; without any, fall back to the guesses.
+        # A site that lives under a path (a profile page on a shared host) only gets the guesses.
+        prefix = f"{parts.scheme}://{parts.netloc}{parts.path.rstrip('/')}"
+        if sitemap_pages and prefix == base:
+            candidates = [base + '/'] + [base + path for path in sitemap_pages]
+        else:
+            candidates = [prefix + '/'] + [prefix + (path if path.startswith('/') else f"/{path}")
+                                           for path in guessed_paths if path]
+        urls = []
+        for url in dict.fromkeys(candidates):
+            status, checked_at = statuses.get(_path(url), (None, 0))
+            if status in MISSING_STATUSES and now - checked_at < self.missing_ttl:
+                continue
+            if robots_text and not robots.can_fetch(user_agent, url):
+                continue
+            urls.append(url)
+        return urls, float(robots.crawl_delay(user_agent) or 0) if robots_text else 0.0
+
+    def record(self, url: str, status: int):
+        """Remember how a page answered"""
+        parts = urlparse(url)
+        with self._lock:
+            self.db.execute('INSERT OR REPLACE INTO pages (domain, path, status, checked_at) VALUES (?, ?, ?, ?)',
+                            (parts.netloc.lower(), parts.path or '/', status, time.time()))
+            self.db.commit()
+
+    def _statuses(self, domain: str):
+        with self._lock:
+            rows = self.db.execute('SELECT path, status, checked_at FROM pages WHERE domain = ?', (domain,)).fetchall()
+        return {path: (status, checked_at) for path, status, checked_at in rows}
+
+    def _site(self, domain: str, base: str, session) -> Tuple[str, List[str]]:
+        """(robots.txt text, relevant sitemap paths), fetched again once older than the TTL"""
+        with self._lock:
+            row = self.db.execute('SELECT robots, pages, fetched_at FROM sites WHERE domain = ?', (domain,)).fetchone()
+        if row and time.time() - row[2] < self.ttl:
+            return row[0], json.loads(row[1])
+
+        robots_text, pages = self._discover(domain, base, session)
+        with self._lock:
+            self.db.execute('INSERT OR REPLACE INTO sites (domain, robots, pages, fetched_at) VALUES (?, ?, ?, ?)',
+                            (domain, robots_text, json.dumps(pages), time.time()))
+            self.db.commit()
+        return robots_text, pages
+
+    def _discover(self, domain: str, base: str, session) -> Tuple[str, List[str]]:
+        robots_text = ''
+        try:
+            # Google reads at most 500 KiB of robots.txt; so do we
+            response = http_client.fetch(session, f"{base}/robots.txt", timeout=5, max_bytes=512 * 1024)
+            if response.ok and 'html' not in response.headers.get('Content-Type', ''):
+                robots_text = response.text
+        except Exception:
+            pass
+
+        robots = RobotFileParser()
+        robots.parse(robots_text.splitlines())
+        queue = list(robots.site_maps() or []) or [f"{base}/sitemap.xml"]
+        pages = []
+        fetched = 0
+        while queue and fetched < self.max_sitemaps:
+            sitemap_url = queue.pop(0)
+            fetched += 1
+            try:
+                # A truncated sitemap still lists its first pages
+                response = http_client.fetch(session, sitemap_url, timeout=10, max_bytes=10 * 1024 * 1024)
+                if not response.ok:
+                    continue
+                page_urls, child_sitemaps = parse_pool.parse(html_parsing.parse_sitemap, response.content)
+            except Exception:
+                continue
+            queue.extend(child_sitemaps)
+            for url in page_urls:
+                parts = urlparse(url)
+                if parts.netloc.lower().removeprefix('www.') == domain.removeprefix('www.') \
+                        and RELEVANT_PATH_RE.search(parts.path) and parts.path.count('/') <= 2:
+                    pages.append(parts.path)
+
+        # Shortest paths first: /contact before /about/team/jane-doe
+        pages = sorted(dict.fromkeys(pages), key=lambda path: (path.count('/'), len(path)))[:self.max_pages]
+        return robots_text, pages
+
+    def close(self):
+        with self._lock:
+            self.db.close()
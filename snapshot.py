@@ -0,0 +1,341 @@
+"""
+Binary columnar snapshot for LeadManager
+
+job_data.snap holds every lead and company in a form that is usable straight
+from mmap, without parsing the whole history at startup:
+
+    [magic][record heap][columns...][header JSON][header length][magic]
+
+The heap holds each record's JSON, back to back; an offsets column points
+into it. Next to it, the fields that statistics and filters need are stored
+as packed columns - ids, categorical fields such as status and platform as
+one- or two-byte codes into a per-column string table, timestamps as epoch
+seconds and counts as integers. The header at the end describes where each
+column starts.
+
+RecordStore wraps one collection (leads or companies) of a mapped snapshot.
+It behaves like the list LeadManager used to keep, but a record is only
+decoded from the heap when it is actually accessed, and counts or status
+filters are answered from the columns. Records added or touched since the
+snapshot are kept as objects and written back on the next save, while
+untouched ones are copied across as raw bytes.
+"""
+
+import itertools
+import json
+import math
+import mmap
+import os
+import struct
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from records import Company, Lead
+
+MAGIC = b'HBSNAP01'
+_FOOTER = struct.Struct('<Q8s')
+
+# Per collection: record type, categorical columns, timestamp columns, integer columns
+SCHEMAS = {
+    'leads': (Lead, ('status', 'platform'), ('timestamp', 'created_at'), ()),
+    'companies': (Company, ('status', 'source'), ('discovered_at',), ('email_count',)),
+}
+
+
+def _epoch(value) -> float:
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return math.nan
+
+
+class LazyRecords:
+    """Read-only list of store positions whose records are decoded on access"""
+
+    def __init__(self, store: 'RecordStore', positions: List[int]):
+        self.store = store
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store[position] for position in self.positions[index]]
+        return self.store[self.positions[index]]
+
+    def __iter__(self):
+        return (self.store[position] for position in self.positions)
+
+    def __bool__(self):
+        return bool(self.positions)
+
+
+class RecordStore:
+    def __init__(self, name: str, snapshot: Optional['Snapshot'] = None):
+        self.name = name
+        self.record_type, self.category_fields, self.time_fields, self.int_fields = SCHEMAS[name]
+        self.snapshot = snapshot
+        self.base_count = snapshot.counts[name] if snapshot else 0
+        # Decoded snapshot records by position; they may be mutated, so they are kept
+        self._decoded: Dict[int, object] = {}
+        # Records added since the snapshot
+        self._added: List = []
+
+    def _column(self, field: str):
+        return self.snapshot.column(f"{self.name}.{field}")
+
+    # List interface
+
+    def __len__(self):
+        return self.base_count + len(self._added)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index >= self.base_count:
+            return self._added[index - self.base_count]
+        record = self._decoded.get(index)
+        if record is None:
+            record = self.record_type.from_dict(json.loads(bytes(self._blob(index))))
+            self._decoded[index] = record
+        return record
+
+    def peek(self, index: int):
+        """Record at index for reading only - decoded without being kept"""
+        if index >= self.base_count or index in self._decoded:
+            return self[index]
+        return self.record_type.from_dict(json.loads(bytes(self._blob(index))))
+
+    def __iter__(self) -> Iterator:
+        return (self[position] for position in range(len(self)))
+
+    def scan(self, start: int = 0) -> Iterator:
+        """Read-only pass over the records from start on, without keeping them decoded"""
+        return (self.peek(position) for position in range(max(0, start), len(self)))
+
+    def append(self, record):
+        self._added.append(record)
+
+    def extend(self, records):
+        self._added.extend(records)
+
+    def _blob(self, index: int) -> bytes:
+        offsets = self._column('offsets')
+        return self.snapshot.heap[offsets[index]:offsets[index + 1]]
+
+    # Column queries
+
+    def find(self, record_id) -> Optional[object]:
+        """Record with this id; ids are sequential, so this is normally one lookup"""
+        if isinstance(record_id, int) and 0 < record_id <= len(self) and self._id_at(record_id - 1) == record_id:
+            return self[record_id - 1]
+        if self.base_count and isinstance(record_id, int):
+            try:
+                return self[self._column('id').tolist().index(record_id)]
+            except ValueError:
+                pass
+        for record in self._added:
+            if record.get('id') == record_id:
+                return record
+        return None
+
+    def _id_at(self, position: int):
+        if position >= self.base_count:
+            return self._added[position - self.base_count].get('id')
+        record = self._decoded.get(position)
+        if record is not None:
+            return record.get('id')
+        return self._column('id')[position]
+
+    def _code(self, field: str, value) -> Optional[int]:
+        table = self.snapshot.tables[f"{self.name}.{field}"]
+        return table.index(value) if value in table else None
+
+    def counts(self, field: str) -> Dict:
+        """Number of records per value of a categorical field"""
+        result: Dict = {}
+        if self.base_count:
+            table = self.snapshot.tables[f"{self.name}.{field}"]
+            column = self._column(field)
+            if column.format == 'B':
+                codes = column.tobytes()
+                counted = (codes.count(bytes((code,))) for code in range(len(table)))
+            else:
+                codes = array(column.format, column.tobytes())
+                counted = (codes.count(code) for code in range(len(table)))
+            for value, found in zip(table, counted):
+                if found:
+                    result[value] = result.get(value, 0) + found
+            for position, record in self._decoded.items():
+                # Decoded records may have changed since the snapshot
+                result[table[column[position]]] -= 1
+                value = record.get(field)
+                result[value] = result.get(value, 0) + 1
+        for record in self._added:
+            value = record.get(field)
+            result[value] = result.get(value, 0) + 1
+        return {value: count for value, count in result.items() if count}
+
+    def count(self, field: str, value) -> int:
+        return self.counts(field).get(value, 0)
+
+    def positions(self, field: str, value) -> List[int]:
+        """Positions of the records whose field equals value, in order"""
+        found = []
+        if self.base_count:
+            code = self._code(field, value)
+            column = self._column(field)
+            if code is not None and column.format == 'B':
+                # One byte per record: map the wanted code to 1 and everything else to 0
+                mask = bytes(code == byte for byte in range(256))
+                found = list(itertools.compress(range(self.base_count), column.tobytes().translate(mask)))
+            elif code is not None:
+                found = list(itertools.compress(range(self.base_count), map(code.__eq__, column)))
+            if self._decoded:
+                changed = {position for position, record in self._decoded.items()
+                           if (record.get(field) == value) != (column[position] == code)}
+                if changed:
+                    found = sorted(set(found).symmetric_difference(changed))
+        found.extend(self.base_count + i for i, record in enumerate(self._added) if record.get(field) == value)
+        return found
+
+    def select(self, field: str, value) -> LazyRecords:
+        return LazyRecords(self, self.positions(field, value))
+
+    def int_column(self, field: str) -> List[int]:
+        """Current value of an integer field for every record (0 when missing)"""
+        values = self._column(field).tolist() if self.base_count else []
+        for position, record in self._decoded.items():
+            values[position] = record.get(field) or 0
+        values.extend(record.get(field) or 0 for record in self._added)
+        return values
+
+    # Snapshot writing
+
+    def _rows(self):
+        """(json bytes, categorical values, times, ints) for every record, in order"""
+        tables = self.snapshot.tables if self.snapshot else {}
+        columns = {field: self._column(field) for field in
+                   self.category_fields + self.time_fields + self.int_fields} if self.base_count else {}
+        for position in range(len(self)):
+            record = self._added[position - self.base_count] if position >= self.base_count else self._decoded.get(position)
+            if record is None:
+                # Untouched since the last snapshot: copy its bytes and column values as they are
+                yield (self._blob(position),
+                       [tables[f"{self.name}.{field}"][columns[field][position]] for field in self.category_fields],
+                       [columns[field][position] for field in self.time_fields],
+                       [columns[field][position] for field in self.int_fields],
+                       self._column('id')[position])
+            else:
+                yield (json.dumps(record.to_dict(), default=str).encode('utf-8'),
+                       [record.get(field) for field in self.category_fields],
+                       [_epoch(record.get(field)) for field in self.time_fields],
+                       [int(record.get(field) or 0) for field in self.int_fields],
+                       record.get('id') or 0)
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length, magic = _FOOTER.unpack_from(self.map, len(self.map) - _FOOTER.size)
+        if magic != MAGIC or self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        header_start = len(self.map) - _FOOTER.size - header_length
+        self.header = json.loads(self.map[header_start:header_start + header_length])
+        self.meta = self.header['meta']
+        self.counts = self.header['counts']
+        self.tables = self.header['tables']
+        heap_start, heap_length = self.header['heap']
+        self.heap = memoryview(self.map)[heap_start:heap_start + heap_length]
+        self._columns = {}
+
+    def column(self, name: str):
+        column = self._columns.get(name)
+        if column is None:
+            offset, typecode, count = self.header['columns'][name]
+            size = array(typecode).itemsize
+            column = memoryview(self.map)[offset:offset + count * size].cast(typecode)
+            self._columns[name] = column
+        return column
+
+    def close(self):
+        # Views into the map must go first, or mmap refuses to close
+        self._columns.clear()
+        self.heap.release()
+        try:
+            self.map.close()
+        except BufferError:
+            pass  # a record view is still alive somewhere; the map is freed with it
+        self._file.close()
+
+
+def write_snapshot(path: str, stores: Dict[str, RecordStore], meta: Dict):
+    """Write all stores to path atomically (temp file + rename)"""
+    tmp_path = f"{path}.tmp"
+    header = {'meta': meta, 'counts': {}, 'tables': {}, 'columns': {}}
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        heap_start = f.tell()
+        built = {}
+        for name, store in stores.items():
+            # Offsets are relative to the start of the heap, which all collections share
+            position = f.tell() - heap_start
+            offsets = array('Q', [position])
+            ids = array('q')
+            tables = {field: {None: 0} for field in store.category_fields}
+            categories = {field: [] for field in store.category_fields}
+            times = {field: array('d') for field in store.time_fields}
+            ints = {field: array('q') for field in store.int_fields}
+            for blob, category_values, time_values, int_values, record_id in store._rows():
+                f.write(blob)
+                position += len(blob)
+                offsets.append(position)
+                ids.append(record_id if isinstance(record_id, int) else 0)
+                for field, value in zip(store.category_fields, category_values):
+                    table = tables[field]
+                    if value not in table:
+                        table[value] = len(table)
+                    categories[field].append(table[value])
+                for field, value in zip(store.time_fields, time_values):
+                    times[field].append(value)
+                for field, value in zip(store.int_fields, int_values):
+                    ints[field].append(value)
+            header['counts'][name] = len(ids)
+            # Codes take one byte each unless a field has more than 256 distinct values
+            categories = {field: array('B' if len(tables[field]) <= 256 else 'H', codes)
+                          for field, codes in categories.items()}
+            header['tables'].update({f"{name}.{field}": list(table) for field, table in tables.items()})
+            built[name] = [('offsets', offsets), ('id', ids)] + list(categories.items()) + list(times.items()) + list(ints.items())
+        header['heap'] = [heap_start, f.tell() - heap_start]
+
+        for name, columns in built.items():
+            for field, column in columns:
+                f.write(b'\0' * (-f.tell() % 8))
+                header['columns'][f"{name}.{field}"] = [f.tell(), column.typecode, len(column)]
+                column.tofile(f)
+
+        encoded = json.dumps(header, default=str).encode('utf-8')
+        f.write(encoded)
+        f.write(_FOOTER.pack(len(encoded), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_stores(path: str):
+    """(snapshot, {name: RecordStore}) for an existing snapshot file, or (None, empty stores)"""
+    try:
+        snapshot = Snapshot(path)
+    except FileNotFoundError:
+        return None, {name: RecordStore(name) for name in SCHEMAS}
+    return snapshot, {name: RecordStore(name, snapshot) for name in SCHEMAS}
@@ -0,0 +1,361 @@
+"""
+Span-based timing for bot jobs, scrapers, enrichment steps and HTTP requests
+
+A span times one piece of work and knows its parent, so a slow
+discover_companies run breaks down into its sources (Selenium included), each
+company's enrichment (Hunter lookup, website crawl), every HTTP request and
+the politeness sleeps in between:
+
+    with tracing.span('enrich', company=name):
+        ...
+
+    @tracing.traced('bot.scan_job_sources', report=True)
+    def scan_job_sources(self): ...
+
+Every span records its wall time, the seconds it spent in tracing.sleep, and
+the bytes and requests fetched through http_client, its children's included.
+Sleep is summed over threads, so a span whose children run in parallel can
+sleep longer than it lasts. Its working time is instead the wall time during
+which something under it was not sleeping: the union of its own and its
+children's busy intervals, so parallel sources never count twice.
+
+Finished spans are appended to the trace file as OTLP/JSON lines, one
+ExportTraceServiceRequest per line. This is the format the OpenTelemetry
+Collector's file exporter writes and its otlpjsonfile receiver reads, so a
+trace can be loaded into Jaeger, Tempo and the like as is. Nothing is recorded
+until configure() is given a file: spans are then a shared no-op and sleep()
+is plain time.sleep. To total a trace file by span name:
+
+    python tracing.py trace.jsonl
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+# Totals every span carries for itself plus its finished children
+COUNTERS = ('sleep.seconds', 'http.requests', 'bytes.fetched')
+
+_current: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('tracing_span', default=None)
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'kind', 'attributes', 'trace_id', 'span_id', 'parent', 'report',
+                 'start_ns', 'end_ns', 'counters', 'status', 'message', 'busy', '_token', '_sleeps', '_children')
+
+    def __init__(self, tracer: 'Tracer', name: str, kind: int, attributes: Dict[str, Any], report: bool):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.report = report
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.status = None
+        self.message = ''
+        self.start_ns = self.end_ns = 0
+        # Merged (start_ns, end_ns) intervals when this span or a child was not sleeping, set by end()
+        self.busy: List[List[int]] = []
+        self._token = None
+        self._sleeps: List[tuple] = []
+        self._children: List[tuple] = []
+
+    def __enter__(self) -> 'Span':
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc is not None and self.status is None:
+            self.error(f"{exc_type.__name__}: {exc}")
+        self.end()
+        return False
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def add(self, counter: str, amount):
+        with self.tracer.lock:
+            self.counters[counter] += amount
+
+    def slept(self, start_ns: int, end_ns: int):
+        with self.tracer.lock:
+            self.counters['sleep.seconds'] += (end_ns - start_ns) / 1e9
+            self._sleeps.append((start_ns, end_ns))
+
+    def error(self, message: str = ''):
+        self.status = STATUS_ERROR
+        self.message = message
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        with self.tracer.lock:
+            sleeps, children = self._sleeps, self._children
+            self._sleeps, self._children = [], []
+        # Busy on our own while outside every child and awake; inside a child, busy when the child was
+        own = _subtract(self.start_ns, self.end_ns, _merge(sleeps + [(start, end) for start, end, _ in children]))
+        self.busy = _merge(own + [interval for _, _, busy in children for interval in busy],
+                           self.start_ns, self.end_ns)
+        with self.tracer.lock:
+            if self.parent is not None:
+                for counter, amount in self.counters.items():
+                    self.parent.counters[counter] += amount
+                self.parent._children.append((self.start_ns, self.end_ns, self.busy))
+        self.tracer.finish(self)
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def work_seconds(self) -> float:
+        return sum(end - start for start, end in self.busy) / 1e9
+
+
+class _NoSpan:
+    """What span() returns while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        pass
+
+    def add(self, counter, amount):
+        pass
+
+    def slept(self, start_ns, end_ns):
+        pass
+
+    def error(self, message=''):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    def __init__(self, path: Optional[str] = None, service_name: str = 'jobpulse', flush_every: int = 512):
+        self.path = path
+        self.service_name = service_name
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self._finished: List[Span] = []
+        self._write_lock = threading.Lock()
+
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, report: bool = False, **attributes):
+        if not self.path:
+            return NO_SPAN
+        return Span(self, name, kind, attributes, report)
+
+    def finish(self, span: Span):
+        with self.lock:
+            self._finished.append(span)
+            due = span.parent is None or len(self._finished) >= self.flush_every
+        if span.report:
+            work = span.work_seconds
+            print(f"⏱ {span.name}: {span.seconds:.1f}s ({work:.1f}s working, {span.seconds - work:.1f}s idle; "
+                  f"{span.counters['sleep.seconds']:.1f}s slept across threads), "
+                  f"{span.counters['http.requests']} requests, {span.counters['bytes.fetched'] / 1e6:.1f} MB")
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            spans, self._finished = self._finished, []
+        if not spans or not self.path:
+            return
+        line = json.dumps(self._export(spans), separators=(',', ':')) + '\n'
+        try:
+            # One append per batch, so worker processes sharing the file never interleave lines
+            with self._write_lock:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"⚠ Could not write trace to {self.path}: {e}")
+
+    def _export(self, spans: List[Span]) -> Dict:
+        return {'resourceSpans': [{
+            'resource': {'attributes': _attributes({'service.name': self.service_name, 'process.pid': os.getpid()})},
+            'scopeSpans': [{'scope': {'name': 'tracing'}, 'spans': [_otlp(span) for span in spans]}],
+        }]}
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict]:
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            # OTLP/JSON carries 64-bit integers as strings
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        attributes.append({'key': key, 'value': typed})
+    return attributes
+
+
+def _merge(intervals: List, low: Optional[int] = None, high: Optional[int] = None) -> List[List[int]]:
+    """intervals sorted, with overlapping ones joined, clipped to [low, high] when given"""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if low is not None:
+            start, end = max(start, low), min(end, high)
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract(start: int, end: int, holes: List[List[int]]) -> List[List[int]]:
+    """[start, end] minus the merged intervals in holes"""
+    remaining = []
+    cursor = start
+    for hole_start, hole_end in holes:
+        if hole_start >= end:
+            break
+        if hole_start > cursor:
+            remaining.append([cursor, hole_start])
+        cursor = max(cursor, hole_end)
+    if cursor < end:
+        remaining.append([cursor, end])
+    return remaining
+
+
+def _otlp(span: Span) -> Dict:
+    values = dict(span.attributes)
+    values.update(span.counters)
+    values['sleep.seconds'] = round(float(span.counters['sleep.seconds']), 6)
+    values['work.seconds'] = round(span.work_seconds, 6)
+    values['idle.seconds'] = round(span.seconds - span.work_seconds, 6)
+    record = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'parentSpanId': span.parent.span_id if span.parent else '',
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns),
+        'attributes': _attributes(values),
+    }
+    if span.status is not None:
+        record['status'] = {'code': span.status, 'message': span.message}
+    return record
+
+
+# Shared by every scraper in the process; off until configure() names a file
+tracer = Tracer()
+
+
+def configure(path: Optional[str], service_name: str = 'jobpulse'):
+    """Write spans to path (appending); None turns tracing off"""
+    tracer.flush()
+    tracer.path = path
+    tracer.service_name = service_name
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, report: bool = False, **attributes):
+    """A context manager timing the block as a child of the current span"""
+    return tracer.span(name, kind, report, **attributes)
+
+
+def current():
+    """The innermost open span (the no-op span when there is none), to set attributes on"""
+    return _current.get() or NO_SPAN
+
+
+def traced(name: str, report: bool = False):
+    """Decorator: every call runs in a span called name; report prints its totals when it ends"""
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.path:
+                return function(*args, **kwargs)
+            with tracer.span(name, report=report):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind(function: Callable) -> Callable:
+    """function, run with the caller's current span as parent (for thread pools, which start with none)"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(function, *args, **kwargs)
+
+
+def sleep(seconds: float):
+    """time.sleep, counted against the current span and its parents as sleeping rather than working"""
+    active = _current.get()
+    if active is None:
+        time.sleep(seconds)
+        return
+    # When the sleep actually ran, so working time excludes real idle time only
+    start = time.time_ns()
+    try:
+        time.sleep(seconds)
+    finally:
+        active.slept(start, time.time_ns())
+
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """Per span name: count, wall, working, idle and sleeping seconds, requests and bytes"""
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get('resourceSpans', []):
+                for scope in resource.get('scopeSpans', []):
+                    for record in scope.get('spans', []):
+                        values = {a['key']: next(iter(a['value'].values())) for a in record.get('attributes', [])}
+                        entry = totals[record['name']]
+                        entry['count'] += 1
+                        entry['seconds'] += (int(record['endTimeUnixNano']) - int(record['startTimeUnixNano'])) / 1e9
+                        for key in ('work.seconds', 'idle.seconds', 'sleep.seconds', 'http.requests', 'bytes.fetched'):
+                            entry[key] += float(values.get(key, 0))
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Total a trace file's spans by name")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    totals = summarize(args.path)
+    print(f"{'span':40} {'count':>7} {'wall s':>10} {'work s':>10} {'idle s':>10} {'sleep s':>10} "
+          f"{'requests':>9} {'MB':>8}")
+    for name, entry in sorted(totals.items(), key=lambda item: -item[1]['seconds']):
+        print(f"{name[:40]:40} {entry['count']:7.0f} {entry['seconds']:10.2f} {entry['work.seconds']:10.2f} "
+              f"{entry['idle.seconds']:10.2f} {entry['sleep.seconds']:10.2f} {entry['http.requests']:9.0f} "
+              f"{entry['bytes.fetched'] / 1e6:8.2f}")
+
+
+atexit.register(tracer.flush)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Write-ahead log for LeadManager
+
+Every mutation (a new lead or company, a status change) is appended to the
+log as one JSON line and fsynced before it is applied in memory, so nothing
+is lost on a crash or a container restart between snapshots. Each entry has
+a sequence number; a snapshot records the last sequence it contains, and at
+startup only the entries after it are replayed. Once a snapshot is written
+the log is truncated (compaction), so its size stays proportional to the
+changes since the last snapshot.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterator
+
+
+class WriteAheadLog:
+    def __init__(self, path: str = 'job_data.wal', fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a+', encoding='utf-8')
+            # A crash mid-append leaves a partial line; start the next entry on a fresh one
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != '\n':
+                    self._file.write('\n')
+        return self._file
+
+    def append(self, op: str, data: Dict) -> int:
+        """Durably log one mutation and return its sequence number"""
+        with self._lock:
+            self.seq += 1
+            f = self._open()
+            f.write(json.dumps({'seq': self.seq, 'op': op, 'data': data}, default=str) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            return self.seq
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict]:
+        """Entries newer than after_seq, in order, skipping lines torn by a crash"""
+        self.seq = max(self.seq, after_seq)
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    print(f"⚠ Ignoring incomplete entry in {self.path}")
+                    continue
+                self.seq = max(self.seq, entry['seq'])
+                if entry['seq'] > after_seq:
+                    yield entry
+
+    @property
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def compact(self, upto_seq: int):
+        """Drop entries up to upto_seq - call only once a snapshot containing them is on disk"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            # Entries logged while the snapshot was being written are kept
+            newer = list(self.replay(upto_seq)) if self.seq > upto_seq else []
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in newer:
+                    f.write(json.dumps(entry, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,129 @@
+"""
+Durable work queue for company enrichment
+
+Discovery puts companies into a SQLite table (WAL mode, so any number of
+processes on the same volume can share it); enrichment workers claim them
+with a lease. A claimed task is invisible to other workers until its lease
+expires, so a worker that crashes mid-crawl only delays its tasks - the next
+claim after the lease runs out picks them up again. Tasks are keyed by the
+company key (registrable domain, else normalized name), so a domain that is
+queued or being crawled is never queued a second time.
+
+Finished tasks stay in the table with their result until the process that
+owns LeadManager collects them; LeadManager keeps a single writer that way.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from records import Company
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+def worker_id(index: int = 0) -> str:
+    """Lease owner name, unique per process and container"""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class EnrichmentQueue:
+    def __init__(self, path: str = 'enrichment_queue.db', lease_seconds: float = 600, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS tasks (
+                               key TEXT PRIMARY KEY,
+                               company TEXT NOT NULL,
+                               status TEXT NOT NULL,
+                               owner TEXT,
+                               lease_expires REAL,
+                               attempts INTEGER NOT NULL DEFAULT 0,
+                               enqueued_at REAL NOT NULL,
+                               finished_at REAL)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, enqueued_at)')
+
+    def put(self, key: str, company: Company) -> bool:
+        """Queue a company; False when its key is already queued, in progress or awaiting collection"""
+        with self._lock:
+            cursor = self.db.execute('INSERT OR IGNORE INTO tasks (key, company, status, enqueued_at) VALUES (?, ?, ?, ?)',
+                                     (key, json.dumps(company.to_dict(), default=str), PENDING, time.time()))
+            return cursor.rowcount > 0
+
+    def claim(self, owner: str, limit: int = 1) -> List[Tuple[str, Company]]:
+        """Lease up to limit pending tasks, or tasks whose previous lease has expired"""
+        now = time.time()
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.db.execute('''SELECT key, company, attempts FROM tasks
+                                          WHERE status = ? OR (status = ? AND lease_expires < ?)
+                                          ORDER BY enqueued_at LIMIT ?''',
+                                       (PENDING, LEASED, now, limit)).fetchall()
+                claimed = []
+                for key, company, attempts in rows:
+                    if attempts >= self.max_attempts:
+                        # Its workers kept dying on it; stop handing it out
+                        self.db.execute('UPDATE tasks SET status = ?, owner = NULL, finished_at = ? WHERE key = ?',
+                                        (FAILED, now, key))
+                        continue
+                    self.db.execute('''UPDATE tasks SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1
+                                       WHERE key = ?''', (LEASED, owner, now + self.lease_seconds, key))
+                    claimed.append((key, Company.from_dict(json.loads(company))))
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        return claimed
+
+    def complete(self, key: str, owner: str, company: Company) -> bool:
+        """Store the enriched company; False if the lease was lost to another worker meanwhile"""
+        with self._lock:
+            cursor = self.db.execute('''UPDATE tasks SET status = ?, company = ?, owner = NULL, finished_at = ?
+                                        WHERE key = ? AND status = ? AND owner = ?''',
+                                     (DONE, json.dumps(company.to_dict(), default=str), time.time(), key, LEASED, owner))
+            return cursor.rowcount > 0
+
+    def release(self, key: str, owner: str):
+        """Give a task back without a result, e.g. when a worker shuts down mid-crawl"""
+        with self._lock:
+            self.db.execute('UPDATE tasks SET status = ?, owner = NULL, lease_expires = NULL WHERE key = ? AND owner = ?',
+                            (PENDING, key, owner))
+
+    def collect(self, limit: int = 500) -> Tuple[List[Company], List[Company]]:
+        """(enriched, given up) companies finished since the last call; they leave the queue"""
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.db.execute('SELECT key, company, status FROM tasks WHERE status IN (?, ?) LIMIT ?',
+                                       (DONE, FAILED, limit)).fetchall()
+                self.db.executemany('DELETE FROM tasks WHERE key = ?', [(key,) for key, _, _ in rows])
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        done = [Company.from_dict(json.loads(company)) for _, company, status in rows if status == DONE]
+        failed = [Company.from_dict(json.loads(company)) for _, company, status in rows if status == FAILED]
+        return done, failed
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.db.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+
+    def outstanding(self) -> int:
+        """Tasks not finished yet (pending or leased)"""
+        counts = self.counts()
+        return counts.get(PENDING, 0) + counts.get(LEASED, 0)
+
+    def close(self):
+        with self._lock:
+            self.db.close()